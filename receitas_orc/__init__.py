@@ -0,0 +1,21 @@
+"""
+__init__.py
+
+Pacote do pipeline de apropriação de receitas orçamentárias.
+
+A importação do pacote é propositalmente leve: nenhum subpacote é importado
+aqui. pandas, SQLAlchemy e o CLR (pythonnet) só são carregados pelos módulos
+que os usam, quando são de fato necessários.
+"""
+
+from typing import Any
+
+# Atalhos carregados sob demanda (ex: receitas_orc.executar_lote(1, 12))
+_ATALHOS = ("executar_pipeline", "executar_lote")
+
+
+def __getattr__(nome: str) -> Any:
+    if nome in _ATALHOS:
+        from receitas_orc.services import execucao_pipeline
+        return getattr(execucao_pipeline, nome)
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
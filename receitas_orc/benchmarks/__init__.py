@@ -0,0 +1,6 @@
+"""
+__init__.py
+
+Este arquivo serve para marcar o diretório 'benchmarks' como um pacote Python.
+Os benchmarks rodam sobre dados sintéticos, sem acesso ao OLAP ou ao SQL Server.
+"""
@@ -0,0 +1,151 @@
+"""
+dados_sinteticos.py
+
+Este módulo gera, de forma determinística, dados sintéticos com o mesmo
+formato das seis fontes do pipeline (receitas orçadas, executadas e
+planejadas, ações, centros de custo e FatoFechamento). As colunas das fontes
+MDX usam os nomes técnicos devolvidos pelo Pyadomd, para que a renomeação
+padrão também seja exercitada.
+"""
+
+import calendar
+import logging
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from receitas_orc.services.indice_mensal import MESES_ABREVIADOS
+from receitas_orc.services.regras_classificacao import CAMINHO_REGRAS
+
+logger = logging.getLogger(__name__)
+
+# Tamanho das fontes na escala 1.0
+PROJETOS_POR_ESCALA = 300
+LINHAS_FECHAMENTO_POR_ESCALA = 50000
+
+COL_FOTOGRAFIA = '[PPA].[PPA com Fotografia].[Descrição de PPA com Fotografia].[MEMBER_CAPTION]'
+COL_PROJETO = '[Iniciativa].[Iniciativas].[Iniciativa].[MEMBER_CAPTION]'
+COL_ACAO = '[Ação].[Ação].[Nome de Ação].[MEMBER_CAPTION]'
+COL_CDGNVL4 = '[Natureza Orçamentária].[Código Estruturado 4 nível].[Código Estruturado 4 nível].[MEMBER_CAPTION]'
+COL_DESCNVL4 = '[Natureza Orçamentária].[Descrição de Natureza 4 nível].[Descrição de Natureza 4 nível].[MEMBER_CAPTION]'
+COL_MES = '[Tempo].[Mês].[Número Mês].[MEMBER_CAPTION]'
+
+FONTES_RECEITA = [
+    'CSN Programas e Projetos Nacionais',
+    'Convênios, Subvenções e Auxílios',
+    'Empresas Beneficiadas',
+    'Contribuição Social Ordinária',
+    'Receitas de Serviços',
+]
+UNIDADES = ['SP - Atendimento ao Cliente', 'SP - Capital', 'SP - Interior', 'SP - Litoral', 'SP - Sede']
+PROJETO_ESPECIAL = 'Suporte a Negócios - Remuneração de Recursos Humanos Relacionado a Negócios'
+
+
+def _legendas_fotografia(ano: int) -> Dict[int, str]:
+    nomes = {mes: abreviado.capitalize() for abreviado, mes in MESES_ABREVIADOS.items()}
+    return {mes: f"{calendar.monthrange(ano, mes)[1]:02d}/{nomes[mes]}" for mes in range(1, 13)}
+
+
+def _nomes_projetos(quantidade: int) -> list:
+    """Projetos das regras de classificação (para que todas as estratégias rodem) mais projetos genéricos."""
+    regras = pd.read_csv(CAMINHO_REGRAS)
+    nomes = []
+    for projeto, correspondencia in zip(regras['PROJETO'], regras['Correspondencia'].fillna('exato')):
+        if correspondencia == 'exato':
+            nomes.append(projeto)
+        elif correspondencia == 'prefixo':
+            nomes.extend(f"{projeto.strip()} Sintético {i}" for i in range(3))
+    nomes.extend(f"Projeto Sintético {i:05d}" for i in range(max(quantidade - len(nomes), 0)))
+    return nomes[:max(quantidade, 1)]
+
+
+def gerar_fontes_sinteticas(escala: float = 1.0, semente: int = 42, ano: int = 2025) -> Dict[str, pd.DataFrame]:
+    """
+    Gera as seis fontes do pipeline com tamanho proporcional à escala.
+
+    Args:
+        escala (float): Fator de escala (1.0 ≈ 300 projetos e 50 mil linhas de fechamento).
+        semente (int): Semente do gerador aleatório; a mesma semente gera os mesmos dados.
+        ano (int): Ano de referência das fotografias e das datas do fechamento.
+
+    Returns:
+        Dict[str, pd.DataFrame]: Fontes com as mesmas chaves usadas em `consultas`.
+    """
+    rng = np.random.default_rng(semente)
+    legendas = _legendas_fotografia(ano)
+    projetos = _nomes_projetos(int(PROJETOS_POR_ESCALA * escala))
+
+    # --- Cadastro: ações e centros de custo por projeto ---
+    linhas_cc = []
+    for p, projeto in enumerate(projetos):
+        for a in range(int(rng.integers(1, 9))):
+            acao = f"Ação {a + 1:02d} - {projeto}"
+            unidades = rng.choice(len(UNIDADES), size=int(rng.integers(1, 3)), replace=False)
+            if projeto == PROJETO_ESPECIAL and a == 0:
+                unidades = np.union1d(unidades, [0])
+            for u in unidades:
+                cc = f"{p + 1:05d}.{a + 1:06d}.{u + 1:03d}"
+                linhas_cc.append((cc, cc[:12], acao, projeto, UNIDADES[u]))
+    df_cc = pd.DataFrame(linhas_cc, columns=['CC', 'CC_NVL2', 'ACAO', 'PROJETO', 'UNIDADE'])
+    acoes = df_cc[['PROJETO', 'ACAO']].drop_duplicates().reset_index(drop=True)
+
+    # --- Despesas planejadas por ação, uma fotografia por mês ---
+    meses = np.arange(1, 13)
+    acoes_mes = acoes.loc[acoes.index.repeat(12)].reset_index(drop=True)
+    df_acoes = pd.DataFrame({
+        COL_FOTOGRAFIA: [legendas[m] for m in np.tile(meses, len(acoes))],
+        COL_PROJETO: acoes_mes['PROJETO'].to_numpy(),
+        COL_ACAO: acoes_mes['ACAO'].to_numpy(),
+        '[Measures].[DespesaAjustado]': rng.gamma(2.0, 50000.0, size=len(acoes_mes)).round(2),
+    })
+
+    # --- Receitas orçadas e executadas por projeto e natureza ---
+    def _receitas(coluna_valor: str, fator: float) -> pd.DataFrame:
+        quantidade = rng.integers(1, len(FONTES_RECEITA) + 1, size=len(projetos))
+        pares = [(projeto, fonte) for projeto, q in zip(projetos, quantidade)
+                 for fonte in rng.choice(FONTES_RECEITA, size=int(q), replace=False)]
+        pares_mes = [(legendas[m], projeto, fonte) for projeto, fonte in pares for m in meses]
+        df = pd.DataFrame(pares_mes, columns=[COL_FOTOGRAFIA, COL_PROJETO, COL_DESCNVL4])
+        df.insert(2, COL_CDGNVL4, df[COL_DESCNVL4].map({f: f"4.1.{i + 1:02d}" for i, f in enumerate(FONTES_RECEITA)}))
+        df[coluna_valor] = (rng.gamma(2.0, 80000.0, size=len(df)) * fator).round(2)
+        return df
+
+    df_orcadas = _receitas('[Measures].[ReceitaAjustado]', 1.0)
+    df_exec = _receitas('[Measures].[Executado_Receita_ano]', 0.7)
+
+    # --- Receitas e despesas planejadas (%) por projeto e mês ---
+    projetos_mes = np.repeat(projetos, 12)
+    receita = rng.gamma(2.0, 60000.0, size=len(projetos_mes)).round(2)
+    despesa = rng.gamma(2.0, 60000.0, size=len(projetos_mes)).round(2)
+    df_percent = pd.DataFrame({
+        COL_FOTOGRAFIA: [legendas[m] for m in np.tile(meses, len(projetos))],
+        COL_PROJETO: projetos_mes,
+        COL_MES: np.tile(meses, len(projetos)).astype(str),
+        '[Measures].[csnExecutado]': (despesa * rng.random(len(despesa))).round(2),
+        '[Measures].[ReceitaAjustado]': receita,
+        '[Measures].[DespesaAjustado]': despesa,
+        '[Measures].[% Executado (R/D)]': receita / despesa,
+    })
+
+    # --- FatoFechamento: lançamentos diários de despesa por CC ---
+    linhas_fechamento = max(int(LINHAS_FECHAMENTO_POR_ESCALA * escala), 1)
+    dias = pd.date_range(f"{ano}-01-01", f"{ano}-12-31", freq="D")
+    df_fechamento = pd.DataFrame({
+        'DATA': dias[rng.integers(0, len(dias), size=linhas_fechamento)],
+        'CC': df_cc['CC'].to_numpy()[rng.integers(0, len(df_cc), size=linhas_fechamento)],
+        'VALOR': rng.gamma(1.5, 3000.0, size=linhas_fechamento).round(2),
+    }).sort_values(['DATA', 'CC'], ascending=[True, False], kind='stable', ignore_index=True)
+
+    logger.debug(
+        f"Dados sintéticos gerados (escala {escala}): {len(projetos)} projetos, "
+        f"{len(df_acoes)} ações, {len(df_fechamento)} linhas de fechamento."
+    )
+    return {
+        "RECEITAS_ORCADAS_2025": df_orcadas,
+        "RECEITAS_EXEC_2025": df_exec,
+        "RECEITAS_DESPESAS_PERCENT": df_percent,
+        "acoes": df_acoes,
+        "cc": df_cc,
+        "FatoFechamento": df_fechamento,
+    }
@@ -0,0 +1,232 @@
+"""
+executar_benchmark.py
+
+Este módulo executa o pipeline de apropriação sobre dados sintéticos e mede,
+etapa por etapa e com a instrumentação do pipeline (utils.instrumentacao),
+o tempo de parede, o tempo de CPU, o pico de memória alocada (tracemalloc) e
+as linhas e bytes de entrada e saída. O resultado é gravado em JSON,
+para comparação entre versões. Não há acesso ao OLAP nem ao SQL Server.
+
+Uso:
+    python -m receitas_orc.benchmarks.executar_benchmark --escalas 0.5 1 4 --saida benchmark.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from receitas_orc.benchmarks.dados_sinteticos import gerar_fontes_sinteticas
+from receitas_orc.services import pipeline_service
+from receitas_orc.services.dataframe_processing import classificar_projetos_em_dataframe, renomear_colunas_padrao
+from receitas_orc.services.dicionarios_categoricos import DicionariosCategoricos, decodificar
+from receitas_orc.services.exportadores import obter_exportador
+from receitas_orc.services.indice_mensal import IndiceMensal, adicionar_chave_mes
+from receitas_orc.services.indices_juncao import IndicesJuncao
+from receitas_orc.utils.instrumentacao import Instrumentacao
+
+logger = logging.getLogger(__name__)
+
+# 2: a etapa 'exportar_excel' passou a ser 'exportar_resultado', com o formato no relatório
+# 3: etapas medidas pela instrumentação do pipeline (campos pai, rótulos e bytes de entrada/saída)
+VERSAO_FORMATO = 3
+
+
+def executar_benchmark(
+    escala: float = 1.0,
+    mes: int = 6,
+    semente: int = 42,
+    diretorio_saida: Optional[str] = None,
+    medir_memoria: bool = True,
+    codificar_dimensoes: bool = True,
+    formato: str = "xlsx"
+) -> Dict[str, Any]:
+    """
+    Executa todas as etapas do pipeline uma vez, sobre dados sintéticos.
+
+    Args:
+        escala (float): Fator de escala dos dados sintéticos.
+        mes (int): Mês de referência processado.
+        semente (int): Semente dos dados sintéticos.
+        diretorio_saida (str, opcional): Onde gravar o resultado; padrão é um diretório temporário.
+        medir_memoria (bool): Se True, mede o pico de memória de cada etapa.
+        codificar_dimensoes (bool): Se True, aplica os dicionários categóricos compartilhados.
+        formato (str): Formato da exportação ('xlsx', 'parquet' ou 'csv').
+
+    Returns:
+        Dict[str, Any]: Parâmetros, tamanho das fontes e medições de cada etapa.
+    """
+    # Instância própria: as etapas internas do pipeline (@instrumentar) continuam na
+    # instrumentação padrão e o relatório traz só as etapas do benchmark
+    instrumentacao = Instrumentacao(medir_memoria)
+    try:
+        linhas_fontes = _executar_etapas(instrumentacao, escala, mes, semente, diretorio_saida, codificar_dimensoes, formato)
+    finally:
+        instrumentacao.encerrar()
+    etapas = instrumentacao.relatorio()["etapas"]
+
+    return {
+        "escala": escala,
+        "mes": mes,
+        "semente": semente,
+        "codificar_dimensoes": codificar_dimensoes,
+        "formato": formato,
+        "linhas_fontes": linhas_fontes,
+        "tempo_total_s": round(sum(e["tempo_s"] for e in etapas if e["etapa"] != "gerar_dados"), 6),
+        "etapas": etapas,
+    }
+
+
+def _executar_etapas(
+    instrumentacao: Instrumentacao,
+    escala: float,
+    mes: int,
+    semente: int,
+    diretorio_saida: Optional[str],
+    codificar_dimensoes: bool,
+    formato: str
+) -> Dict[str, int]:
+    """Executa as etapas do benchmark, cada uma medida como etapa da instrumentação, e retorna as linhas de cada fonte."""
+    with instrumentacao.etapa("gerar_dados") as registro:
+        fontes = gerar_fontes_sinteticas(escala, semente)
+        registro.saida(*fontes.values())
+
+    df_orcadas, df_acoes = fontes["RECEITAS_ORCADAS_2025"], fontes["acoes"]
+    df_exec, df_percent = fontes["RECEITAS_EXEC_2025"], fontes["RECEITAS_DESPESAS_PERCENT"]
+    df_cc, df_fechamento = fontes["cc"], fontes["FatoFechamento"]
+
+    with instrumentacao.etapa("renomear_colunas") as registro:
+        registro.entrada(df_orcadas, df_acoes, df_exec, df_percent)
+        df_orcadas, df_acoes, df_exec, df_percent = (
+            renomear_colunas_padrao(df) for df in (df_orcadas, df_acoes, df_exec, df_percent)
+        )
+        registro.saida(df_orcadas, df_acoes, df_exec, df_percent)
+
+    with instrumentacao.etapa("classificar_projetos") as registro:
+        registro.entrada(df_orcadas, df_acoes)
+        df_orcadas = classificar_projetos_em_dataframe(df_orcadas)
+        df_acoes = classificar_projetos_em_dataframe(df_acoes)
+        registro.saida(df_orcadas, df_acoes)
+
+    if codificar_dimensoes:
+        todas = (df_orcadas, df_acoes, df_cc, df_exec, df_percent, df_fechamento)
+        with instrumentacao.etapa("codificar_dimensoes") as registro:
+            registro.entrada(*todas)
+            dicionarios = DicionariosCategoricos()
+            dicionarios.registrar(*todas)
+            df_orcadas, df_acoes, df_cc, df_exec, df_percent, df_fechamento = (dicionarios.codificar(df) for df in todas)
+            registro.saida(df_orcadas, df_acoes, df_cc, df_exec, df_percent, df_fechamento)
+
+    with instrumentacao.etapa("indexar_meses") as registro:
+        registro.entrada(df_orcadas, df_acoes, df_exec)
+        indices = [IndiceMensal(adicionar_chave_mes(df)) for df in (df_acoes, df_orcadas, df_exec)]
+        registro.saida(*(indice.df for indice in indices))
+
+    with instrumentacao.etapa("filtrar_mes") as registro:
+        registro.entrada(*(indice.df for indice in indices), df_fechamento)
+        df_despesas_mes, df_receitas_mes, df_exec_mes = (
+            pipeline_service.filtrar_por_mes_indexado(indice, mes, nome)
+            for indice, nome in zip(indices, ("Despesas", "Receitas", "Receitas_exec"))
+        )
+        meses_fechamento = df_fechamento['DATA'].dt.month.to_numpy()
+        df_fechamento_mes = df_fechamento[meses_fechamento == mes]
+        df_fechamento_anual = df_fechamento[meses_fechamento <= mes]
+        registro.saida(df_despesas_mes, df_receitas_mes, df_exec_mes, df_fechamento_mes, df_fechamento_anual)
+
+    with instrumentacao.etapa("indexar_juncoes") as registro:
+        registro.entrada(df_cc)
+        indices_juncao = IndicesJuncao(df_cc)
+        registro.valores["linhas_saida"] = len(indices_juncao.cc)
+
+    entradas = (df_receitas_mes, df_despesas_mes, df_cc, df_fechamento_mes, df_exec_mes, df_percent, df_fechamento_anual)
+    with instrumentacao.etapa("preparar_dados_base") as registro:
+        registro.entrada(*entradas)
+        df_preparado = pipeline_service._preparar_dados_base(*entradas, indices_juncao=indices_juncao)
+        registro.saida(df_preparado)
+
+    with instrumentacao.etapa("executar_estrategias") as registro:
+        registro.entrada(df_preparado)
+        df_resultado = pipeline_service._executar_estrategias(df_preparado)
+        registro.saida(df_resultado)
+
+    exportador = obter_exportador(formato)
+    with tempfile.TemporaryDirectory() as diretorio_temporario:
+        caminho_saida = os.path.join(diretorio_saida or diretorio_temporario, f"benchmark_escala_{escala:g}{exportador.extensao}")
+        with instrumentacao.etapa("exportar_resultado") as registro:
+            registro.entrada(df_resultado)
+            registro.valores["linhas_saida"] = exportador.exportar(decodificar(df_resultado), caminho_saida)
+            registro.valores["tamanho_arquivo_bytes"] = os.path.getsize(caminho_saida)
+
+    return {nome: len(df) for nome, df in fontes.items()}
+
+
+def executar_suite(escalas: List[float], repeticoes: int = 1, **kwargs) -> Dict[str, Any]:
+    """
+    Executa o benchmark para cada escala, `repeticoes` vezes.
+
+    Args:
+        escalas (List[float]): Fatores de escala.
+        repeticoes (int): Número de execuções por escala.
+        **kwargs: Repassados a `executar_benchmark`.
+
+    Returns:
+        Dict[str, Any]: Relatório com o ambiente de execução e todas as medições.
+    """
+    execucoes = []
+    for escala in escalas:
+        for repeticao in range(repeticoes):
+            logger.info(f"Benchmark: escala {escala:g}, repetição {repeticao + 1}/{repeticoes}...")
+            execucoes.append({"repeticao": repeticao + 1, **executar_benchmark(escala, **kwargs)})
+
+    return {
+        "versao_formato": VERSAO_FORMATO,
+        "data_execucao": datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+        },
+        "execucoes": execucoes,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Executa o benchmark pela linha de comando e grava o relatório JSON."""
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de apropriação com dados sintéticos.")
+    parser.add_argument("--escalas", type=float, nargs="+", default=[1.0], help="Fatores de escala (ex: 0.5 1 4).")
+    parser.add_argument("--repeticoes", type=int, default=1, help="Execuções por escala.")
+    parser.add_argument("--mes", type=int, default=6, help="Mês de referência processado.")
+    parser.add_argument("--semente", type=int, default=42, help="Semente dos dados sintéticos.")
+    parser.add_argument("--saida", default="benchmark.json", help="Arquivo JSON de saída.")
+    parser.add_argument("--sem-memoria", action="store_true", help="Não mede o pico de memória (tempos mais precisos).")
+    parser.add_argument("--sem-dicionarios", action="store_true", help="Não codifica as colunas-chave.")
+    parser.add_argument("--formato", choices=("xlsx", "parquet", "csv"), default="xlsx", help="Formato da exportação.")
+    args = parser.parse_args(argv)
+
+    relatorio = executar_suite(
+        args.escalas,
+        repeticoes=args.repeticoes,
+        mes=args.mes,
+        semente=args.semente,
+        medir_memoria=not args.sem_memoria,
+        codificar_dimensoes=not args.sem_dicionarios,
+        formato=args.formato,
+    )
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    logger.info(f"✅ Relatório de benchmark gravado em '{args.saida}'.")
+    return relatorio
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] [%(name)s] %(message)s")
+    main(sys.argv[1:])
@@ -0,0 +1,112 @@
+"""
+tempo_inicializacao.py
+
+Este módulo mede o tempo de inicialização (cold start) do pacote: cada
+cenário roda em um processo Python novo, e são registrados o tempo de
+parede e quais módulos pesados (pandas, SQLAlchemy, CLR) foram carregados.
+
+Uso:
+    python -m receitas_orc.benchmarks.tempo_inicializacao --repeticoes 5 --saida inicializacao.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODULOS_PESADOS = ("pandas", "numpy", "sqlalchemy", "clr", "pyadomd")
+
+# Cenário -> código executado no processo novo. O código imprime, na última
+# linha, a lista (JSON) dos módulos pesados presentes em sys.modules.
+_VERIFICAR_MODULOS = (
+    "import json, sys; "
+    f"print(json.dumps([m for m in {MODULOS_PESADOS!r} if m in sys.modules]))"
+)
+CENARIOS = {
+    "import_receitas_orc": "import receitas_orc; " + _VERIFICAR_MODULOS,
+    "main_help": (
+        "import sys, contextlib, io\n"
+        "from receitas_orc.main import main\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        "    try:\n"
+        "        main(['--help'])\n"
+        "    except SystemExit:\n"
+        "        pass\n"
+        + _VERIFICAR_MODULOS
+    ),
+}
+
+
+def medir_cenario(codigo: str, repeticoes: int = 5) -> Dict[str, Any]:
+    """
+    Executa o código em `repeticoes` processos novos e mede o tempo de cada um.
+
+    Args:
+        codigo (str): Código Python executado com `python -c`.
+        repeticoes (int): Número de processos executados.
+
+    Returns:
+        Dict[str, Any]: Tempos (s), mediana, mínimo e módulos pesados carregados.
+    """
+    ambiente = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    tempos: List[float] = []
+    modulos: List[str] = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        processo = subprocess.run(
+            [sys.executable, "-c", codigo], capture_output=True, text=True, env=ambiente, check=True
+        )
+        tempos.append(round(time.perf_counter() - inicio, 6))
+        modulos = json.loads(processo.stdout.strip().splitlines()[-1])
+
+    return {
+        "tempos_s": tempos,
+        "mediana_s": round(statistics.median(tempos), 6),
+        "minimo_s": min(tempos),
+        "modulos_pesados": modulos,
+    }
+
+
+def medir_inicializacao(repeticoes: int = 5) -> Dict[str, Any]:
+    """
+    Mede todos os cenários de inicialização, incluindo a linha de base do interpretador.
+
+    Args:
+        repeticoes (int): Processos executados por cenário.
+
+    Returns:
+        Dict[str, Any]: Relatório com as medições de cada cenário.
+    """
+    cenarios = {"interpretador": "import json, sys; " + _VERIFICAR_MODULOS, **CENARIOS}
+    resultados = {}
+    for nome, codigo in cenarios.items():
+        logger.info(f"Medindo inicialização: {nome} ({repeticoes} processos)...")
+        resultados[nome] = medir_cenario(codigo, repeticoes)
+    return {"python": sys.version.split()[0], "repeticoes": repeticoes, "cenarios": resultados}
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Executa a medição pela linha de comando e grava o relatório JSON."""
+    parser = argparse.ArgumentParser(description="Mede o tempo de inicialização do pacote receitas_orc.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Processos executados por cenário.")
+    parser.add_argument("--saida", default="inicializacao.json", help="Arquivo JSON de saída.")
+    args = parser.parse_args(argv)
+
+    relatorio = medir_inicializacao(args.repeticoes)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    for nome, resultado in relatorio["cenarios"].items():
+        logger.info(f"⏱️ {nome}: mediana {resultado['mediana_s']:.3f}s | módulos pesados: {resultado['modulos_pesados']}")
+    return relatorio
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] [%(name)s] %(message)s")
+    main(sys.argv[1:])
@@ -6,8 +6,29 @@ e serviços utilizados pelo projeto 'receitas_orc'.
 Cada entrada no dicionário CONEXOES representa uma configuração de
 conexão específica, incluindo tipo (SQL, Azure SQL, MDX), servidor,
 banco de dados, driver, e autenticação.
+
+Conexões SQL podem declarar a chave opcional "pool" para sobrescrever
+os parâmetros de POOL_PADRAO usados na criação da engine SQLAlchemy.
 """
 
+# Parâmetros padrão do pool de conexões das engines SQLAlchemy.
+# - pool_size: conexões mantidas abertas no pool
+# - max_overflow: conexões extras permitidas em picos de uso
+# - pool_pre_ping: testa a conexão antes de entregá-la (evita conexões "mortas")
+# - pool_recycle: segundos até uma conexão ser reciclada
+POOL_PADRAO = {
+    "pool_size": 5,
+    "max_overflow": 5,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+}
+
+# Opções das engines SQLAlchemy (mssql+pyodbc) aplicadas a todas as conexões SQL.
+# fast_executemany envia os INSERTs em lote pelo ODBC, em vez de linha a linha.
+ENGINE_PADRAO = {
+    "fast_executemany": True,
+}
+
 CONEXOES = {
     "SPSVSQL39_FINANCA": {
         "tipo": "sql",
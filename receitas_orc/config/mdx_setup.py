@@ -5,10 +5,13 @@ Este módulo é responsável por configurar o ambiente necessário para a
 interação com o Microsoft Analysis Services (MDX) usando o Pyadomd.
 Isso inclui a adição do diretório da DLL ao PATH do sistema e o
 carregamento das referências .NET.
+
+O pythonnet (`clr`) só é importado dentro de setup_mdx_environment: carregar
+o runtime .NET custa alguns segundos e não deve acontecer na importação do
+pacote. Use receitas_orc.config.startup para inicializar uma única vez.
 """
 
 import os
-import clr
 from typing import Tuple, Type
 
 def setup_mdx_environment(dll_path: str) -> Tuple[Type, Type]:
@@ -39,6 +42,8 @@ def setup_mdx_environment(dll_path: str) -> Tuple[Type, Type]:
         os.sys.path.append(dll_dir)
 
     # Adiciona referência à DLL e importa os componentes necessários
+    import clr
+
     clr.AddReference(dll_path)
 
     from Microsoft.AnalysisServices.AdomdClient import AdomdConnection
@@ -1,5 +1,5 @@
 SELECT DATA,RIGHT(CODGERENCIAL,16) AS CC, sum(UNIFICAVALOR) AS VALOR
-FROM FatoFechamento WHERE YEAR(DATA) = 2025 AND TIPO = 'DESPESA'
+FROM FatoFechamento WHERE DATA >= '${data_inicio}' AND DATA < '${data_fim_exclusiva}' AND TIPO = 'DESPESA'
 GROUP BY DATA,RIGHT(CODGERENCIAL,16)
 
 ORDER BY DATA,RIGHT(CODGERENCIAL,16) DESC
\ No newline at end of file
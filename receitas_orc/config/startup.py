@@ -0,0 +1,68 @@
+"""
+startup.py
+
+Este módulo faz a inicialização preguiçosa do cliente ADOMD (pythonnet +
+Pyadomd). O runtime .NET só é carregado quando a primeira consulta MDX é
+executada, e apenas uma vez por processo; execuções que usam somente fontes
+SQL ou o cache de resultados nunca pagam esse custo.
+"""
+
+import logging
+import os
+import threading
+from typing import Optional, Type
+
+from receitas_orc.config.mdx_setup import setup_mdx_environment
+
+logger = logging.getLogger(__name__)
+
+# Caminho da DLL do cliente do Analysis Services
+DLL_PATH = os.getenv("ADOMD_DLL_PATH", r"C:\Microsoft.AnalysisServices.AdomdClient.dll")
+
+# Classes carregadas pela inicialização (None enquanto não inicializadas ou em caso de falha)
+AdomdConnection: Optional[Type] = None
+Pyadomd: Optional[Type] = None
+
+_tentativa_feita = False
+_lock = threading.Lock()
+
+
+def inicializar_adomd(dll_path: str = DLL_PATH) -> bool:
+    """
+    Carrega a DLL do ADOMD e as classes AdomdConnection e Pyadomd.
+
+    Args:
+        dll_path (str): Caminho da DLL Microsoft.AnalysisServices.AdomdClient.dll.
+
+    Returns:
+        bool: True se o ambiente MDX foi inicializado com sucesso.
+    """
+    global AdomdConnection, Pyadomd, _tentativa_feita
+    _tentativa_feita = True
+    try:
+        AdomdConnection, Pyadomd = setup_mdx_environment(dll_path)
+        logger.info("Ambiente MDX inicializado com sucesso.")
+        return True
+    except Exception as e:
+        AdomdConnection, Pyadomd = None, None
+        logger.error(f"❌ Falha crítica ao inicializar ambiente MDX: {e}", exc_info=True)
+        return False
+
+
+def obter_pyadomd() -> Type:
+    """
+    Retorna a classe Pyadomd, inicializando o ambiente MDX na primeira chamada
+    do processo (chamadas concorrentes aguardam a mesma inicialização).
+
+    Returns:
+        Type: A classe Pyadomd.
+
+    Raises:
+        RuntimeError: Se o ambiente MDX não pôde ser inicializado.
+    """
+    with _lock:
+        if not _tentativa_feita:
+            inicializar_adomd()
+    if Pyadomd is None:
+        raise RuntimeError("Ambiente MDX indisponível: a inicialização do ADOMD falhou.")
+    return Pyadomd
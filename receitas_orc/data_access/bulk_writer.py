@@ -0,0 +1,333 @@
+"""
+bulk_writer.py
+
+Este módulo contém as rotinas de carga em massa no SQL Server. Os dados são
+gravados em blocos (com fast_executemany na engine) em uma tabela de
+staging, que depois substitui a tabela de destino por meio de renomeações
+dentro de uma única transação. Leitores nunca enxergam a tabela vazia ou
+parcialmente carregada.
+
+Também oferece a publicação incremental (upsert): um hash de conteúdo por
+linha identifica o que foi inserido, alterado ou removido desde a última
+publicação, e somente essas linhas são enviadas ao servidor.
+"""
+
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import sqlalchemy
+from sqlalchemy.types import TypeEngine
+
+logger = logging.getLogger(__name__)
+
+# Linhas enviadas por lote de INSERT na carga em massa
+TAMANHO_BLOCO_ESCRITA = int(os.getenv("TAMANHO_BLOCO_ESCRITA", "20000"))
+
+SUFIXO_STAGING = "__staging"
+SUFIXO_ANTIGA = "__antiga"
+
+_IDENTIFICADOR_VALIDO = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# Tamanho máximo de um identificador no SQL Server (sysname)
+TAMANHO_MAXIMO_IDENTIFICADOR = 128
+
+
+def validar_identificador(nome: str) -> str:
+    """
+    Garante que um nome de tabela/esquema pode ser interpolado com segurança no SQL.
+
+    Args:
+        nome (str): Nome do objeto no banco.
+
+    Returns:
+        str: O próprio nome, se válido.
+
+    Raises:
+        ValueError: Se o nome contiver caracteres fora de [A-Za-z0-9_].
+    """
+    if not _IDENTIFICADOR_VALIDO.match(nome or ""):
+        raise ValueError(f"Nome de objeto SQL inválido: '{nome}'")
+    return nome
+
+
+def citar_identificador(nome: str) -> str:
+    """
+    Delimita um nome de coluna entre colchetes para uso no SQL, escapando ']' como ']]'.
+
+    Nomes de coluna do resultado têm espaços, acentos, vírgulas e parênteses
+    (ex: 'Convênios, Subvenções e Auxílios'), por isso são citados em vez de validados.
+
+    Args:
+        nome (str): Nome da coluna.
+
+    Returns:
+        str: O nome delimitado (ex: '[CSN Programas e Projetos Nacionais]').
+
+    Raises:
+        ValueError: Se o nome for vazio ou tiver mais de TAMANHO_MAXIMO_IDENTIFICADOR caracteres.
+    """
+    nome = str(nome)
+    if not nome or len(nome) > TAMANHO_MAXIMO_IDENTIFICADOR:
+        raise ValueError(f"Nome de coluna SQL inválido: '{nome}'")
+    return "[" + nome.replace("]", "]]") + "]"
+
+
+def inferir_tipos_sql(df: pd.DataFrame) -> Dict[str, TypeEngine]:
+    """
+    Define tipos SQL explícitos para cada coluna a partir dos dtypes do DataFrame,
+    evitando que o pandas crie colunas TEXT/FLOAT genéricas.
+
+    Textos viram NVARCHAR com o tamanho máximo observado (ou NVARCHAR(MAX)
+    acima de 4000 caracteres).
+
+    Args:
+        df (pd.DataFrame): DataFrame a ser gravado.
+
+    Returns:
+        Dict[str, TypeEngine]: Mapeamento coluna -> tipo SQLAlchemy.
+    """
+    tipos: Dict[str, TypeEngine] = {}
+    for coluna, dtype in df.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            tipos[coluna] = sqlalchemy.Boolean()
+        elif pd.api.types.is_integer_dtype(dtype):
+            tipos[coluna] = sqlalchemy.BigInteger()
+        elif pd.api.types.is_float_dtype(dtype):
+            tipos[coluna] = sqlalchemy.Float(precision=53)
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            tipos[coluna] = sqlalchemy.DateTime()
+        else:
+            tamanho = df[coluna].astype("string").str.len().max()
+            tamanho = 1 if pd.isna(tamanho) else int(tamanho)
+            tipos[coluna] = sqlalchemy.NVARCHAR(length=max(tamanho, 1) if tamanho <= 4000 else None)
+    return tipos
+
+
+def carregar_com_troca_atomica(
+    conexao: sqlalchemy.engine.base.Connection,
+    df: pd.DataFrame,
+    tabela: str,
+    tamanho_bloco: Optional[int] = None,
+    tipos_colunas: Optional[Dict[str, TypeEngine]] = None,
+    schema: str = "dbo"
+) -> None:
+    """
+    Carrega o DataFrame em uma tabela de staging e a troca pela tabela de destino
+    em uma única transação (sp_rename), descartando a versão anterior.
+
+    Args:
+        conexao (Connection): Conexão SQLAlchemy com o SQL Server.
+        df (pd.DataFrame): Dados a publicar.
+        tabela (str): Nome da tabela de destino.
+        tamanho_bloco (int, optional): Linhas por lote de INSERT. Default é TAMANHO_BLOCO_ESCRITA.
+        tipos_colunas (dict, optional): Tipos SQL por coluna; os não informados são inferidos.
+        schema (str, optional): Esquema da tabela. Default é "dbo".
+    """
+    tabela = validar_identificador(tabela)
+    schema = validar_identificador(schema)
+    staging = tabela + SUFIXO_STAGING
+    antiga = tabela + SUFIXO_ANTIGA
+    tipos = {**inferir_tipos_sql(df), **(tipos_colunas or {})}
+
+    # 1. Carga em massa na staging (fora da transação de troca)
+    df.to_sql(
+        name=staging,
+        con=conexao,
+        schema=schema,
+        if_exists="replace",
+        index=False,
+        chunksize=tamanho_bloco or TAMANHO_BLOCO_ESCRITA,
+        dtype=tipos,
+    )
+    conexao.commit()
+    logger.debug(f"Staging '{schema}.{staging}' carregada com {len(df)} linhas.")
+
+    # 2. Troca atômica: staging assume o nome da tabela de destino
+    with conexao.begin():
+        conexao.exec_driver_sql(
+            f"IF OBJECT_ID(N'{schema}.{antiga}', N'U') IS NOT NULL DROP TABLE [{schema}].[{antiga}];"
+        )
+        conexao.exec_driver_sql(
+            f"IF OBJECT_ID(N'{schema}.{tabela}', N'U') IS NOT NULL "
+            f"EXEC sp_rename N'{schema}.{tabela}', N'{antiga}';"
+        )
+        conexao.exec_driver_sql(f"EXEC sp_rename N'{schema}.{staging}', N'{tabela}';")
+        conexao.exec_driver_sql(
+            f"IF OBJECT_ID(N'{schema}.{antiga}', N'U') IS NOT NULL DROP TABLE [{schema}].[{antiga}];"
+        )
+    logger.debug(f"Tabela '{schema}.{tabela}' substituída atomicamente.")
+
+
+# --- Publicação incremental (upsert) ---
+
+COLUNA_HASH = "HASH_LINHA"
+SUFIXO_DELTA = "__delta"
+SUFIXO_REMOVER = "__remover"
+
+
+def calcular_hash_linhas(df: pd.DataFrame, chaves: List[str]) -> pd.Series:
+    """
+    Calcula um hash de conteúdo por linha, considerando todas as colunas que
+    não são chave de negócio. O hash é determinístico entre execuções.
+
+    Args:
+        df (pd.DataFrame): Dados a publicar.
+        chaves (List[str]): Colunas da chave de negócio.
+
+    Returns:
+        pd.Series: Hash int64 de cada linha (compatível com BIGINT).
+    """
+    colunas_conteudo = [c for c in df.columns if c not in chaves and c != COLUNA_HASH]
+    hashes = pd.util.hash_pandas_object(df[colunas_conteudo], index=False)
+    return pd.Series(hashes.to_numpy().view("int64"), index=df.index, name=COLUNA_HASH)
+
+
+def calcular_delta(
+    df_novo: pd.DataFrame,
+    df_publicado: pd.DataFrame,
+    chaves: List[str]
+) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, int]]:
+    """
+    Compara os dados novos (com COLUNA_HASH) com as chaves e hashes já publicados.
+
+    Args:
+        df_novo (pd.DataFrame): Dados a publicar, já com a coluna COLUNA_HASH.
+        df_publicado (pd.DataFrame): Chaves e COLUNA_HASH lidos da tabela de destino.
+        chaves (List[str]): Colunas da chave de negócio.
+
+    Returns:
+        Tuple: (linhas a inserir/atualizar, chaves a remover, contagens por tipo de mudança).
+    """
+    # Int64 (nulo-aware) evita que os hashes virem float no outer join e percam precisão
+    comparacao = pd.merge(
+        df_novo[chaves + [COLUNA_HASH]].astype({COLUNA_HASH: "Int64"}),
+        df_publicado[chaves + [COLUNA_HASH]].astype({COLUNA_HASH: "Int64"}),
+        on=chaves,
+        how="outer",
+        suffixes=("", "_publicado"),
+        indicator=True,
+        sort=False,
+    )
+    novas = comparacao["_merge"] == "left_only"
+    alteradas = (
+        (comparacao["_merge"] == "both")
+        & (comparacao[COLUNA_HASH] != comparacao[COLUNA_HASH + "_publicado"]).fillna(False)
+    ).astype(bool)
+    removidas = comparacao["_merge"] == "right_only"
+
+    df_enviar = df_novo.merge(comparacao.loc[novas | alteradas, chaves], on=chaves, how="inner")
+
+    df_remover = comparacao.loc[removidas, chaves].reset_index(drop=True)
+    contagens = {"inseridas": int(novas.sum()), "alteradas": int(alteradas.sum()), "removidas": int(removidas.sum())}
+    return df_enviar, df_remover, contagens
+
+
+def _condicao_chaves(chaves: List[str], alias_destino: str, alias_origem: str) -> str:
+    # Trata NULL = NULL como correspondência, como faz o merge do pandas
+    return " AND ".join(
+        f"([{alias_destino}].{c} = [{alias_origem}].{c} OR "
+        f"([{alias_destino}].{c} IS NULL AND [{alias_origem}].{c} IS NULL))"
+        for c in map(citar_identificador, chaves)
+    )
+
+
+def publicar_incremental(
+    conexao: sqlalchemy.engine.base.Connection,
+    df: pd.DataFrame,
+    tabela: str,
+    chaves: List[str],
+    tamanho_bloco: Optional[int] = None,
+    tipos_colunas: Optional[Dict[str, TypeEngine]] = None,
+    schema: str = "dbo"
+) -> Dict[str, int]:
+    """
+    Publica apenas as linhas inseridas, alteradas ou removidas desde a última
+    publicação, usando o hash de conteúdo por linha para detectar mudanças.
+
+    Se a tabela ainda não existir (ou tiver colunas diferentes), faz uma carga
+    completa com troca atômica, já gravando a coluna COLUNA_HASH.
+
+    Args:
+        conexao (Connection): Conexão SQLAlchemy com o SQL Server.
+        df (pd.DataFrame): Dados a publicar.
+        tabela (str): Nome da tabela de destino.
+        chaves (List[str]): Colunas da chave de negócio (ex: PROJETO, ACAO, CC, MES).
+        tamanho_bloco (int, optional): Linhas por lote de INSERT. Default é TAMANHO_BLOCO_ESCRITA.
+        tipos_colunas (dict, optional): Tipos SQL por coluna; os não informados são inferidos.
+        schema (str, optional): Esquema da tabela. Default é "dbo".
+
+    Returns:
+        Dict[str, int]: Quantidade de linhas inseridas, alteradas e removidas.
+
+    Raises:
+        ValueError: Se faltar alguma chave no DataFrame, se as chaves não forem únicas
+                    ou se algum nome de coluna for vazio ou longo demais.
+    """
+    tabela = validar_identificador(tabela)
+    schema = validar_identificador(schema)
+    for chave in chaves:
+        citar_identificador(chave)
+        if chave not in df.columns:
+            raise ValueError(f"Chave de negócio '{chave}' não existe no DataFrame.")
+    if df.duplicated(subset=chaves).any():
+        raise ValueError(f"As chaves {chaves} não identificam unicamente as linhas do DataFrame.")
+
+    df_com_hash = df.assign(**{COLUNA_HASH: calcular_hash_linhas(df, chaves)})
+    colunas = list(df_com_hash.columns)
+    colunas_citadas = {coluna: citar_identificador(coluna) for coluna in colunas}
+
+    inspetor = sqlalchemy.inspect(conexao)
+    colunas_publicadas = (
+        [c["name"] for c in inspetor.get_columns(tabela, schema=schema)]
+        if inspetor.has_table(tabela, schema=schema) else []
+    )
+    if sorted(colunas_publicadas) != sorted(colunas):
+        logger.info(f"Tabela '{schema}.{tabela}' inexistente ou com colunas diferentes: carga completa.")
+        carregar_com_troca_atomica(conexao, df_com_hash, tabela, tamanho_bloco, tipos_colunas, schema)
+        return {"inseridas": len(df_com_hash), "alteradas": 0, "removidas": 0}
+
+    lista_chaves = ", ".join(colunas_citadas[c] for c in chaves)
+    df_publicado = pd.read_sql_query(
+        f"SELECT {lista_chaves}, [{COLUNA_HASH}] FROM [{schema}].[{tabela}]", conexao
+    )
+    conexao.commit()
+
+    df_enviar, df_remover, contagens = calcular_delta(df_com_hash, df_publicado, chaves)
+    logger.info(f"Delta para '{schema}.{tabela}': {contagens}")
+    if not len(df_enviar) and not len(df_remover):
+        return contagens
+
+    tipos = {**inferir_tipos_sql(df_com_hash), **(tipos_colunas or {})}
+    delta = tabela + SUFIXO_DELTA
+    remover = tabela + SUFIXO_REMOVER
+    df_enviar.to_sql(
+        name=delta, con=conexao, schema=schema, if_exists="replace", index=False,
+        chunksize=tamanho_bloco or TAMANHO_BLOCO_ESCRITA, dtype=tipos,
+    )
+    df_remover.to_sql(
+        name=remover, con=conexao, schema=schema, if_exists="replace", index=False,
+        dtype={c: tipos[c] for c in chaves},
+    )
+    conexao.commit()
+
+    lista_colunas = ", ".join(colunas_citadas[c] for c in colunas)
+    atualizacoes = ", ".join(
+        f"[t].{colunas_citadas[c]} = [s].{colunas_citadas[c]}" for c in colunas if c not in chaves
+    )
+    with conexao.begin():
+        conexao.exec_driver_sql(
+            f"DELETE [t] FROM [{schema}].[{tabela}] AS [t] "
+            f"JOIN [{schema}].[{remover}] AS [s] ON {_condicao_chaves(chaves, 't', 's')};"
+        )
+        conexao.exec_driver_sql(
+            f"MERGE [{schema}].[{tabela}] AS [t] USING [{schema}].[{delta}] AS [s] "
+            f"ON {_condicao_chaves(chaves, 't', 's')} "
+            f"WHEN MATCHED THEN UPDATE SET {atualizacoes} "
+            f"WHEN NOT MATCHED BY TARGET THEN INSERT ({lista_colunas}) "
+            f"VALUES ({', '.join(f'[s].{colunas_citadas[c]}' for c in colunas)});"
+        )
+        conexao.exec_driver_sql(f"DROP TABLE [{schema}].[{delta}]; DROP TABLE [{schema}].[{remover}];")
+
+    return contagens
@@ -0,0 +1,131 @@
+"""
+columnar_fetch.py
+
+Este módulo monta DataFrames a partir de cursores (ex: Pyadomd) lendo as
+linhas em blocos e gravando cada coluna diretamente em um buffer tipado:
+medidas numéricas vão para arrays NumPy float64 e legendas de membros são
+codificadas em dicionário (um código inteiro por linha e uma única cópia de
+cada texto distinto). Assim, evita-se a lista de tuplas do fetchall() e a
+cópia extra feita pelo pandas ao convertê-la.
+"""
+
+import logging
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_PENDENTE = "pendente"
+_NUMERICO = "numerico"
+_DICIONARIO = "dicionario"
+
+
+class BufferColuna:
+    """
+    Acumula os valores de uma coluna bloco a bloco, escolhendo o tipo de
+    armazenamento a partir do primeiro valor não nulo encontrado.
+    """
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.tipo = _PENDENTE
+        self.nulos_iniciais = 0
+        self.blocos: List[np.ndarray] = []
+        self.dicionario: Dict[Any, int] = {}
+
+    def adicionar(self, valores: tuple) -> None:
+        """
+        Acrescenta os valores de um bloco à coluna.
+
+        Args:
+            valores (tuple): Valores da coluna no bloco, na ordem das linhas.
+        """
+        if self.tipo == _PENDENTE:
+            primeiro = next((v for v in valores if v is not None), None)
+            if primeiro is None:
+                self.nulos_iniciais += len(valores)
+                return
+            numerico = isinstance(primeiro, (int, float, np.number)) and not isinstance(primeiro, bool)
+            self.tipo = _NUMERICO if numerico else _DICIONARIO
+            if self.nulos_iniciais:
+                self._adicionar_nulos(self.nulos_iniciais)
+
+        if self.tipo == _NUMERICO:
+            try:
+                # None vira NaN na conversão para float64
+                self.blocos.append(np.asarray(valores, dtype=np.float64))
+                return
+            except (TypeError, ValueError):
+                logger.debug(f"Coluna '{self.nome}' deixou de ser numérica; usando codificação por dicionário.")
+                self._converter_para_dicionario()
+
+        codigos = self.dicionario
+        self.blocos.append(np.fromiter(
+            (codigos.setdefault(v, len(codigos)) for v in valores),
+            dtype=np.int32,
+            count=len(valores)
+        ))
+
+    def _adicionar_nulos(self, quantidade: int) -> None:
+        if self.tipo == _NUMERICO:
+            self.blocos.append(np.full(quantidade, np.nan))
+        else:
+            self.adicionar((None,) * quantidade)
+
+    def _converter_para_dicionario(self) -> None:
+        numericos = np.concatenate(self.blocos) if self.blocos else np.empty(0)
+        self.tipo = _DICIONARIO
+        self.blocos = []
+        self.adicionar(tuple(None if np.isnan(v) else v for v in numericos.tolist()))
+
+    def finalizar(self) -> np.ndarray:
+        """
+        Devolve os valores da coluna como um único array.
+
+        Returns:
+            np.ndarray: Array float64 (medidas) ou object (legendas), onde cada texto
+                        distinto é o mesmo objeto Python em todas as linhas.
+        """
+        if self.tipo == _PENDENTE:
+            return np.full(self.nulos_iniciais, None, dtype=object)
+
+        codigos_ou_valores = self.blocos[0] if len(self.blocos) == 1 else np.concatenate(self.blocos)
+        self.blocos = []
+        if self.tipo == _NUMERICO:
+            return codigos_ou_valores
+
+        categorias = np.empty(len(self.dicionario), dtype=object)
+        categorias[:] = list(self.dicionario)
+        return categorias[codigos_ou_valores]
+
+
+def ler_cursor_em_colunas(cursor, tamanho_bloco: int) -> pd.DataFrame:
+    """
+    Lê todas as linhas de um cursor já executado, em blocos, e monta o DataFrame
+    a partir de buffers colunares.
+
+    Args:
+        cursor: Cursor DB-API com `description` e `fetchmany(tamanho)`.
+        tamanho_bloco (int): Número de linhas lidas por chamada a fetchmany.
+
+    Returns:
+        pd.DataFrame: DataFrame com as colunas na ordem de `cursor.description`.
+    """
+    nomes = [col.name for col in cursor.description]
+    buffers = [BufferColuna(nome) for nome in nomes]
+    total_linhas = 0
+
+    while True:
+        linhas = cursor.fetchmany(tamanho_bloco)
+        if not linhas:
+            break
+        total_linhas += len(linhas)
+        for buffer, valores in zip(buffers, zip(*linhas)):
+            buffer.adicionar(valores)
+
+    logger.debug(f"Leitura colunar concluída: {total_linhas} linhas em blocos de {tamanho_bloco}.")
+    dados = {nome: buffer.finalizar() for nome, buffer in zip(nomes, buffers)}
+    # copy=False: o DataFrame referencia os arrays já montados, sem nova cópia
+    return pd.DataFrame(dados, columns=nomes, copy=False)
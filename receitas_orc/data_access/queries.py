@@ -4,22 +4,88 @@ queries.py
 Este módulo define a estrutura de dados para as consultas (SQL e MDX)
 utilizadas no projeto e organiza um dicionário de consultas pré-definidas.
 Ele facilita o acesso centralizado e padronizado às definições de consulta.
+
+Os arquivos de consulta são templates com placeholders ${nome}, preenchidos
+com parâmetros tipados (ano, faixa de meses, unidade Sebrae) para que o
+filtro seja aplicado no próprio servidor.
 """
 
 import os
-from typing import Dict
-from receitas_orc.utils.sql_utils import carregar_sql
+from typing import Any, Dict, Optional
+from receitas_orc.utils.sql_utils import carregar_template_sql
 from receitas_orc.config.config_connections import CONEXOES
 
 SQL_DIR = os.path.join(os.path.dirname(__file__), '..', 'config', 'sql')
 
+# Parâmetros aceitos pelos templates: nome -> (tipo, mínimo, máximo, valor padrão).
+# Todos são inteiros validados por faixa, o que torna a renderização segura
+# tanto em SQL quanto em MDX (nenhum texto livre é interpolado).
+PARAMETROS_CONSULTA: Dict[str, tuple] = {
+    "ano": (int, 2000, 2100, 2025),
+    "mes_inicio": (int, 1, 12, 1),
+    "mes_fim": (int, 1, 12, 12),
+    "unidade_sebrae": (int, 1, 99, 26),
+}
+
+
+def validar_parametros(parametros: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Valida os parâmetros informados, completa com os valores padrão e calcula
+    os valores derivados usados nos templates.
+
+    Valores derivados:
+        - ano_mes_inicio / ano_mes_fim: chaves AAAAMM do membro [Tempo] no cubo.
+        - data_inicio / data_fim_exclusiva: datas 'AAAAMMDD' para filtros SQL
+          em faixa (DATA >= inicio AND DATA < fim), que aproveitam índices.
+
+    Args:
+        parametros (dict, optional): Valores a sobrescrever os padrões.
+
+    Returns:
+        dict: Parâmetros validados mais os valores derivados.
+
+    Raises:
+        ValueError: Se houver parâmetro desconhecido, de tipo inválido ou fora da faixa.
+    """
+    parametros = parametros or {}
+    desconhecidos = set(parametros) - set(PARAMETROS_CONSULTA)
+    if desconhecidos:
+        raise ValueError(f"Parâmetros de consulta desconhecidos: {sorted(desconhecidos)}")
+
+    valores: Dict[str, Any] = {}
+    for nome, (tipo, minimo, maximo, padrao) in PARAMETROS_CONSULTA.items():
+        valor = parametros.get(nome, padrao)
+        if isinstance(valor, bool):
+            raise ValueError(f"Parâmetro '{nome}' inválido: {valor!r}")
+        try:
+            valor = tipo(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"Parâmetro '{nome}' deve ser do tipo {tipo.__name__}: {valor!r}")
+        if not minimo <= valor <= maximo:
+            raise ValueError(f"Parâmetro '{nome}' fora da faixa [{minimo}, {maximo}]: {valor}")
+        valores[nome] = valor
+
+    if valores["mes_inicio"] > valores["mes_fim"]:
+        raise ValueError("'mes_inicio' não pode ser maior que 'mes_fim'.")
+
+    ano = valores["ano"]
+    valores["ano_mes_inicio"] = ano * 100 + valores["mes_inicio"]
+    valores["ano_mes_fim"] = ano * 100 + valores["mes_fim"]
+    valores["data_inicio"] = f"{ano:04d}{valores['mes_inicio']:02d}01"
+    if valores["mes_fim"] == 12:
+        valores["data_fim_exclusiva"] = f"{ano + 1:04d}0101"
+    else:
+        valores["data_fim_exclusiva"] = f"{ano:04d}{valores['mes_fim'] + 1:02d}01"
+
+    return valores
+
 
 class Consulta:
     """
     Representa uma definição de consulta para um banco de dados SQL ou MDX.
     Encapsula informações como título, tipo, nome do arquivo SQL/MDX e conexão.
     """
-    def __init__(self, titulo: str, sql_filename: str, tipo: str, conexao: str):
+    def __init__(self, titulo: str, sql_filename: str, tipo: str, conexao: str, ttl_cache: Optional[float] = None):
         """
         Inicializa uma nova instância de Consulta.
 
@@ -28,6 +94,8 @@ class Consulta:
             sql_filename (str): O nome do arquivo contendo a consulta SQL ou MDX.
             tipo (str): O tipo da consulta ('sql' ou 'mdx').
             conexao (str): O nome da conexão a ser usada, conforme definida em CONEXOES.
+            ttl_cache (float, optional): Validade, em segundos, do resultado no cache em disco.
+                                         Default é None (usa o TTL padrão do cache).
 
         Raises:
             ValueError: Se o nome da conexão não estiver definido em CONEXOES.
@@ -36,21 +104,40 @@ class Consulta:
         self.tipo = tipo
         self.sql_filename = sql_filename
         self.conexao = conexao  # ex: "FINANCA" ou "OLAP_SME"
+        self.ttl_cache = ttl_cache
 
         if conexao not in CONEXOES:
             raise ValueError(f"Conexão '{conexao}' não está definida em CONEXOES.py")
 
         self.info_conexao = CONEXOES[conexao]  # carrega automaticamente a configuração da conexão
 
+    def renderizar(self, **parametros: Any) -> str:
+        """
+        Preenche o template da consulta com os parâmetros informados.
+
+        Args:
+            **parametros: Valores de PARAMETROS_CONSULTA (ex: ano=2025, mes_fim=3).
+                          Os não informados assumem o valor padrão.
+
+        Returns:
+            str: O texto final da consulta SQL ou MDX.
+
+        Raises:
+            ValueError: Se algum parâmetro for inválido.
+        """
+        template = carregar_template_sql(os.path.join(SQL_DIR, self.sql_filename))
+        return template.substitute(validar_parametros(parametros))
+
     @property
     def sql(self) -> str:
         """
-        Propriedade que carrega o conteúdo SQL/MDX do arquivo sob demanda.
+        Propriedade que carrega o conteúdo SQL/MDX do arquivo sob demanda,
+        renderizado com os parâmetros padrão.
 
         Returns:
             str: O conteúdo da consulta SQL ou MDX.
         """
-        return carregar_sql(os.path.join(SQL_DIR, self.sql_filename))
+        return self.renderizar()
 
 # Dicionário contendo consultas SQL e MDX pré-definidas para uso
 
@@ -83,13 +170,15 @@ consultas: Dict[str, Consulta] = {
         titulo="Centro de Custo",
         tipo="sql",
         sql_filename="cc.sql",
-        conexao="SPSVSQL39_HubDados"
+        conexao="SPSVSQL39_HubDados",
+        ttl_cache=24 * 60 * 60  # Cadastro de centros de custo muda pouco
     ),
     "FatoFechamento": Consulta(
         titulo="Fato Fechamento",
         tipo="sql",
         sql_filename="fatofechamento.sql",
-        conexao="SPSVSQL39_FINANCA"
+        conexao="SPSVSQL39_FINANCA",
+        ttl_cache=60 * 60  # Fechamento é atualizado ao longo do dia
     )
 }
 
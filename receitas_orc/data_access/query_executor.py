@@ -6,9 +6,14 @@ consultas SQL ou MDX e retornar os resultados como um DataFrame do pandas.
 Ele lida com a lógica específica de execução para cada tipo de consulta.
 """
 
+import os
 import pandas as pd
 import logging
-from typing import Callable
+from typing import Callable, Iterator, Optional
+
+from receitas_orc.config.startup import obter_pyadomd
+from receitas_orc.data_access.columnar_fetch import ler_cursor_em_colunas
+from receitas_orc.data_access.result_cache import CacheResultados, MODOS_CACHE
 
     
         # ... (resto do código)
@@ -17,6 +22,9 @@ from typing import Callable
 # Adiciona uma instância do logger para este módulo
 logger = logging.getLogger(__name__)
 
+# Linhas lidas por bloco do cursor MDX na montagem colunar do DataFrame
+TAMANHO_BLOCO_MDX = int(os.getenv("TAMANHO_BLOCO_MDX", "10000"))
+
 
 class CriadorDataFrame:
     """
@@ -26,7 +34,16 @@ class CriadorDataFrame:
     bancos de dados (SQL Server, Azure SQL, MDX/Analysis Services).
     """
 
-    def __init__(self, funcao_conexao: Callable, conexao: str, consulta: str, tipo: str = "sql"):
+    def __init__(
+        self,
+        funcao_conexao: Callable,
+        conexao: str,
+        consulta: str,
+        tipo: str = "sql",
+        cache: Optional[CacheResultados] = None,
+        ttl_cache: Optional[float] = None,
+        modo_cache: str = "usar"
+    ):
         """
         Inicializa o executor de consultas.
 
@@ -35,42 +52,109 @@ class CriadorDataFrame:
             conexao (str): O nome da configuração de conexão a ser usada (ex: "FINANCA").
             consulta (str): A string da consulta SQL ou MDX a ser executada.
             tipo (str, optional): O tipo de consulta ('sql', 'azure_sql', 'mdx'). Default é "sql".
+            cache (CacheResultados, optional): Cache em disco dos resultados. Default é None (sem cache).
+            ttl_cache (float, optional): Validade do resultado em cache, em segundos.
+                                         Default é o TTL padrão do cache.
+            modo_cache (str, optional): 'usar', 'atualizar' ou 'ignorar'. Default é "usar".
+
+        Raises:
+            ValueError: Se o modo de cache não for reconhecido.
         """
+        if modo_cache not in MODOS_CACHE:
+            raise ValueError(f"Modo de cache '{modo_cache}' inválido. Use um de {MODOS_CACHE}.")
+
         self.funcao_conexao = funcao_conexao
         self.conexao = conexao
         self.consulta = consulta
         self.tipo = tipo.lower()
+        self.cache = cache
+        self.ttl_cache = ttl_cache
+        self.modo_cache = modo_cache
 
     def executar(self) -> pd.DataFrame:
         """
         Executa a consulta e retorna o resultado como um DataFrame.
 
+        Se houver cache configurado, um resultado válido em disco é devolvido sem
+        acessar o servidor; resultados novos (não vazios) são gravados no cache.
+
         Returns:
             pd.DataFrame: Um DataFrame contendo os resultados da consulta, ou um
                           DataFrame vazio em caso de erro.
         """
+        usar_cache = self.cache is not None and self.modo_cache != "ignorar"
+
+        if usar_cache and self.modo_cache == "usar":
+            df_cache = self.cache.obter(self.conexao, self.consulta, self.ttl_cache)
+            if df_cache is not None:
+                return df_cache
+
+        df = self._executar_no_servidor()
+
+        if usar_cache and not df.empty:
+            self.cache.salvar(self.conexao, self.consulta, df)
+
+        return df
+
+    def executar_em_blocos(self, tamanho_bloco: int) -> Iterator[pd.DataFrame]:
+        """
+        Executa uma consulta SQL e devolve o resultado em blocos de até
+        `tamanho_bloco` linhas, sem materializar o resultado completo.
+
+        A conexão permanece aberta enquanto os blocos são consumidos e é
+        devolvida ao pool ao final (ou se o consumo for interrompido).
+
+        Args:
+            tamanho_bloco (int): Número máximo de linhas por bloco.
+
+        Yields:
+            pd.DataFrame: Blocos consecutivos do resultado.
+
+        Raises:
+            ValueError: Se o tipo de consulta não for SQL.
+        """
+        if self.tipo not in ("sql", "azure_sql"):
+            raise ValueError(f"Leitura em blocos não suportada para consultas do tipo '{self.tipo}'.")
+
+        info_conexao = self.funcao_conexao(self.conexao)
+        try:
+            yield from pd.read_sql_query(self.consulta, info_conexao, chunksize=tamanho_bloco)
+        except Exception as erro:
+            logger.error(f"Erro ao ler a consulta em blocos ({self.tipo}): {erro}", exc_info=True)
+            raise
+        finally:
+            if hasattr(info_conexao, "close"):
+                info_conexao.close()
+
+    def _executar_no_servidor(self) -> pd.DataFrame:
+        """
+        Executa a consulta diretamente no servidor, sem passar pelo cache.
+
+        Returns:
+            pd.DataFrame: Resultado da consulta, ou um DataFrame vazio em caso de erro.
+        """
         try:
             info_conexao = self.funcao_conexao(self.conexao)
 
             if self.tipo in ("sql", "azure_sql"):
                 # Execute a consulta inteira, sem split, para garantir que DECLARE @DT funcione
-                return pd.read_sql_query(self.consulta, info_conexao)
+                try:
+                    return pd.read_sql_query(self.consulta, info_conexao)
+                finally:
+                    # Devolve a conexão ao pool da engine assim que a leitura termina
+                    if hasattr(info_conexao, "close"):
+                        info_conexao.close()
 
             elif self.tipo == "mdx":
-                # --- Importação Tardia (Lazy Import) ---
-                # Importamos Pyadomd apenas no momento do uso. Isso é crucial
-                # porque garante que a função setup_mdx_environment() em main.py
-                # já tenha sido executada e preparado o ambiente .NET (CLR).
-                # Se importássemos no topo do arquivo, o Python tentaria carregar
-                # Pyadomd antes que o ambiente estivesse pronto, causando um NameError.
-                from pyadomd import Pyadomd
+                # --- Inicialização Tardia (Lazy) ---
+                # O runtime .NET (CLR) e o Pyadomd só são carregados na primeira
+                # consulta MDX do processo; as seguintes reaproveitam a classe.
+                Pyadomd = obter_pyadomd()
 
                 with Pyadomd(info_conexao) as conexao:
                     with conexao.cursor() as cursor:
                         cursor.execute(self.consulta)
-                        dados = cursor.fetchall()
-                        colunas = [col.name for col in cursor.description]
-                        return pd.DataFrame(dados, columns=colunas)
+                        return ler_cursor_em_colunas(cursor, TAMANHO_BLOCO_MDX)
 
             else:
                 raise ValueError(f"Tipo de consulta '{self.tipo}' não suportado.")
@@ -0,0 +1,201 @@
+"""
+result_cache.py
+
+Este módulo implementa um cache persistente em disco para os resultados
+das consultas executadas por CriadorDataFrame. Cada resultado é gravado em
+Parquet (formato colunar), identificado pelo nome da conexão mais um hash
+do texto da consulta, e respeita um tempo de validade (TTL) por consulta e
+um tamanho total máximo, com descarte dos arquivos menos usados (LRU).
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações padrão (podem ser sobrescritas por variáveis de ambiente) ---
+CACHE_DIR = os.getenv(
+    "CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "receitas_orc")
+)
+CACHE_TTL_PADRAO = float(os.getenv("CACHE_TTL_SEGUNDOS", str(4 * 60 * 60)))
+CACHE_TAMANHO_MAXIMO = int(os.getenv("CACHE_TAMANHO_MAXIMO_MB", "2048")) * 1024**2
+
+# Modos de uso do cache:
+# - "usar": lê do cache quando válido e grava resultados novos
+# - "atualizar": ignora o conteúdo atual, executa a consulta e regrava o cache
+# - "ignorar": não lê nem grava (bypass completo)
+MODOS_CACHE = ("usar", "atualizar", "ignorar")
+
+EXTENSAO = ".parquet"
+
+
+class CacheResultados:
+    """
+    Cache em disco de DataFrames resultantes de consultas.
+
+    A data de modificação de cada arquivo marca quando o resultado foi gravado
+    (usada no TTL) e a data de acesso marca o último uso (usada no LRU).
+    """
+
+    def __init__(
+        self,
+        diretorio: str = CACHE_DIR,
+        ttl_padrao: float = CACHE_TTL_PADRAO,
+        tamanho_maximo: int = CACHE_TAMANHO_MAXIMO
+    ):
+        """
+        Inicializa o cache.
+
+        Args:
+            diretorio (str): Diretório onde os arquivos Parquet serão armazenados.
+            ttl_padrao (float): Validade padrão de um resultado, em segundos.
+            tamanho_maximo (int): Tamanho total máximo do cache, em bytes.
+        """
+        self.diretorio = diretorio
+        self.ttl_padrao = ttl_padrao
+        self.tamanho_maximo = tamanho_maximo
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def chave(conexao: str, consulta: str) -> str:
+        """
+        Calcula a chave do cache a partir da conexão e do texto da consulta.
+
+        Args:
+            conexao (str): Nome da conexão (ex: "OLAP_SME").
+            consulta (str): Texto da consulta SQL ou MDX.
+
+        Returns:
+            str: Identificador hexadecimal estável para o par conexão/consulta.
+        """
+        hash_consulta = hashlib.sha256(consulta.encode("utf-8")).hexdigest()
+        return f"{conexao}_{hash_consulta[:32]}"
+
+    def _caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, chave + EXTENSAO)
+
+    def obter(self, conexao: str, consulta: str, ttl: Optional[float] = None) -> Optional[pd.DataFrame]:
+        """
+        Retorna o resultado armazenado, se existir e ainda estiver dentro do TTL.
+
+        Args:
+            conexao (str): Nome da conexão.
+            consulta (str): Texto da consulta.
+            ttl (float, optional): Validade em segundos. Default é `ttl_padrao`.
+
+        Returns:
+            pd.DataFrame ou None: O DataFrame em cache, ou None se ausente/expirado.
+        """
+        caminho = self._caminho(self.chave(conexao, consulta))
+        ttl = self.ttl_padrao if ttl is None else ttl
+
+        try:
+            gravado_em = os.path.getmtime(caminho)
+        except OSError:
+            return None
+
+        idade = time.time() - gravado_em
+        if idade > ttl:
+            logger.debug(f"Cache expirado para '{conexao}' ({idade:.0f}s > {ttl:.0f}s).")
+            return None
+
+        try:
+            df = pd.read_parquet(caminho)
+        except Exception as erro:
+            logger.warning(f"⚠️ Falha ao ler cache '{caminho}': {erro}. A consulta será reexecutada.")
+            return None
+
+        # Atualiza apenas o instante de acesso, preservando o de gravação (TTL)
+        os.utime(caminho, (time.time(), gravado_em))
+        logger.info(f"💾 Resultado de '{conexao}' carregado do cache ({idade:.0f}s de idade).")
+        return df
+
+    def salvar(self, conexao: str, consulta: str, df: pd.DataFrame) -> None:
+        """
+        Grava um resultado no cache e aplica o limite de tamanho total.
+
+        Falhas de gravação são apenas registradas no log: o cache nunca
+        deve interromper o pipeline.
+
+        Args:
+            conexao (str): Nome da conexão.
+            consulta (str): Texto da consulta.
+            df (pd.DataFrame): Resultado a ser armazenado.
+        """
+        caminho = self._caminho(self.chave(conexao, consulta))
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            df.to_parquet(temporario, index=False)
+            # Troca atômica: leitores nunca veem um arquivo parcialmente escrito
+            os.replace(temporario, caminho)
+        except Exception as erro:
+            logger.warning(f"⚠️ Não foi possível gravar o cache de '{conexao}': {erro}")
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            return
+
+        self._aplicar_limite()
+
+    def invalidar(self, conexao: str, consulta: str) -> None:
+        """Remove do cache o resultado de uma conexão/consulta, se existir."""
+        caminho = self._caminho(self.chave(conexao, consulta))
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+    def limpar(self) -> None:
+        """Remove todos os resultados armazenados no cache."""
+        for caminho, _, _ in self._listar():
+            os.remove(caminho)
+
+    def _listar(self) -> list:
+        """Lista (caminho, último acesso, tamanho) de cada arquivo do cache."""
+        if not os.path.isdir(self.diretorio):
+            return []
+
+        arquivos = []
+        for nome in os.listdir(self.diretorio):
+            if not nome.endswith(EXTENSAO):
+                continue
+            caminho = os.path.join(self.diretorio, nome)
+            try:
+                estado = os.stat(caminho)
+            except OSError:
+                continue
+            arquivos.append((caminho, estado.st_atime, estado.st_size))
+        return arquivos
+
+    def _aplicar_limite(self) -> None:
+        """Descarta os arquivos menos usados até o cache caber em `tamanho_maximo`."""
+        with self._lock:
+            arquivos = sorted(self._listar(), key=lambda item: item[1])
+            tamanho_total = sum(tamanho for _, _, tamanho in arquivos)
+
+            for caminho, _, tamanho in arquivos:
+                if tamanho_total <= self.tamanho_maximo:
+                    break
+                try:
+                    os.remove(caminho)
+                except OSError:
+                    continue
+                tamanho_total -= tamanho
+                logger.debug(f"Cache: removido '{os.path.basename(caminho)}' (LRU).")
+
+
+_cache_padrao: Optional[CacheResultados] = None
+
+
+def obter_cache_padrao() -> CacheResultados:
+    """Retorna a instância de cache compartilhada pelo processo, criando-a sob demanda."""
+    global _cache_padrao
+    if _cache_padrao is None:
+        _cache_padrao = CacheResultados()
+    return _cache_padrao
@@ -0,0 +1,329 @@
+"""
+snapshot.py
+
+Este módulo implementa os snapshots das fontes do pipeline. No modo
+"gravar", o resultado de cada consulta é salvo em Parquet (formato colunar)
+em um diretório versionado, junto de um manifesto com a impressão digital
+da consulta (hash da conexão, do tipo e do texto renderizado). No modo
+"reproduzir", as consultas são atendidas pelo snapshot, sem CLR, ODBC ou
+acesso à rede: a lógica de negócio pode ser reexecutada, perfilada e
+testada sobre um mês congelado em qualquer máquina.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações padrão (podem ser sobrescritas por variáveis de ambiente) ---
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+# Reproduz consultas cuja impressão digital mudou desde a gravação (ex: outro mes_fim)
+SNAPSHOT_ACEITAR_DIVERGENTE = os.getenv("SNAPSHOT_ACEITAR_DIVERGENTE", "0") == "1"
+
+# Modos de uso do snapshot:
+# - "gravar": executa as consultas normalmente e grava cada resultado no snapshot
+# - "reproduzir": lê os resultados do snapshot, sem executar nenhuma consulta
+MODOS_SNAPSHOT = ("gravar", "reproduzir")
+
+VERSAO_FORMATO = 1
+ARQUIVO_MANIFESTO = "manifesto.json"
+EXTENSAO = ".parquet"
+
+
+def impressao_consulta(conexao: str, tipo: str, texto_consulta: str) -> str:
+    """
+    Calcula a impressão digital de uma consulta renderizada.
+
+    Args:
+        conexao (str): Nome da conexão (ex: "OLAP_SME").
+        tipo (str): Tipo da consulta ('sql' ou 'mdx').
+        texto_consulta (str): Texto da consulta já renderizado com os parâmetros.
+
+    Returns:
+        str: Hash SHA-256 hexadecimal da conexão, do tipo e do texto.
+    """
+    conteudo = f"{conexao}\n{tipo}\n{texto_consulta}"
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def novo_diretorio_snapshot(base: str = SNAPSHOT_DIR) -> str:
+    """Retorna um diretório de snapshot novo em `base`, nomeado pela data e hora atuais."""
+    return os.path.join(base, datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+
+def resolver_diretorio_snapshot(caminho: str) -> str:
+    """
+    Localiza o snapshot a reproduzir. Se `caminho` não contém um manifesto,
+    mas contém snapshots versionados, o mais recente é usado.
+
+    Args:
+        caminho (str): Diretório de um snapshot ou da base de snapshots.
+
+    Returns:
+        str: Diretório do snapshot.
+
+    Raises:
+        FileNotFoundError: Se nenhum snapshot for encontrado.
+    """
+    if os.path.isfile(os.path.join(caminho, ARQUIVO_MANIFESTO)):
+        return caminho
+    versoes = sorted(
+        nome for nome in (os.listdir(caminho) if os.path.isdir(caminho) else [])
+        if os.path.isfile(os.path.join(caminho, nome, ARQUIVO_MANIFESTO))
+    )
+    if not versoes:
+        raise FileNotFoundError(f"Nenhum snapshot encontrado em '{caminho}'.")
+    return os.path.join(caminho, versoes[-1])
+
+
+class SnapshotFontes:
+    """
+    Snapshot das fontes de uma execução: um arquivo Parquet por consulta e
+    um manifesto JSON com a impressão digital, os parâmetros e o tamanho de
+    cada resultado.
+    """
+
+    def __init__(self, diretorio: str, modo: str = "reproduzir", aceitar_divergente: Optional[bool] = None):
+        """
+        Abre (modo "reproduzir") ou cria (modo "gravar") um snapshot.
+
+        Args:
+            diretorio (str): Diretório do snapshot. No modo "reproduzir", também
+                             aceita a base de snapshots (usa o mais recente).
+            modo (str): 'gravar' ou 'reproduzir'.
+            aceitar_divergente (bool, opcional): Na reprodução, usa o resultado congelado
+                                                 mesmo se a consulta atual for diferente
+                                                 da gravada. Padrão é SNAPSHOT_ACEITAR_DIVERGENTE.
+
+        Raises:
+            ValueError: Se o modo for inválido ou o formato do snapshot não for suportado.
+            FileNotFoundError: Se, no modo "reproduzir", o snapshot não existir.
+        """
+        if modo not in MODOS_SNAPSHOT:
+            raise ValueError(f"Modo de snapshot inválido: '{modo}'. Use um de {MODOS_SNAPSHOT}.")
+
+        self.modo = modo
+        self.aceitar_divergente = SNAPSHOT_ACEITAR_DIVERGENTE if aceitar_divergente is None else aceitar_divergente
+        self._lock = threading.Lock()
+
+        if modo == "reproduzir":
+            self.diretorio = resolver_diretorio_snapshot(diretorio)
+            with open(os.path.join(self.diretorio, ARQUIVO_MANIFESTO), encoding="utf-8") as f:
+                self._manifesto = json.load(f)
+            versao = self._manifesto.get("versao_formato")
+            if versao != VERSAO_FORMATO:
+                raise ValueError(f"Formato de snapshot não suportado: {versao} (esperado {VERSAO_FORMATO}).")
+            logger.info(f"🧊 Reproduzindo o snapshot '{self.diretorio}' ({len(self.consultas())} consultas).")
+        else:
+            self.diretorio = diretorio
+            self._manifesto = {
+                "versao_formato": VERSAO_FORMATO,
+                "criado_em": datetime.now().isoformat(timespec="seconds"),
+                "consultas": {},
+            }
+            logger.info(f"🧊 Gravando snapshot das fontes em '{self.diretorio}'.")
+
+    @property
+    def reproduzindo(self) -> bool:
+        return self.modo == "reproduzir"
+
+    def consultas(self) -> list:
+        """Retorna os nomes das consultas presentes no snapshot."""
+        with self._lock:
+            return list(self._manifesto["consultas"])
+
+    def entrada(self, nome: str) -> Dict[str, Any]:
+        """
+        Retorna a entrada do manifesto de uma consulta.
+
+        Raises:
+            KeyError: Se a consulta não estiver no snapshot.
+        """
+        with self._lock:
+            if nome not in self._manifesto["consultas"]:
+                raise KeyError(f"Consulta '{nome}' não está no snapshot '{self.diretorio}'.")
+            return dict(self._manifesto["consultas"][nome])
+
+    def _caminho(self, nome: str) -> str:
+        return os.path.join(self.diretorio, nome + EXTENSAO)
+
+    def _registrar(self, nome: str, impressao: str, parametros: Optional[Dict[str, Any]], linhas: int, colunas: list) -> None:
+        """Acrescenta a consulta ao manifesto e o regrava de forma atômica."""
+        with self._lock:
+            self._manifesto["consultas"][nome] = {
+                "arquivo": nome + EXTENSAO,
+                "impressao": impressao,
+                "parametros": parametros or {},
+                "linhas": int(linhas),
+                "colunas": [str(coluna) for coluna in colunas],
+                "gravado_em": datetime.now().isoformat(timespec="seconds"),
+            }
+            caminho = os.path.join(self.diretorio, ARQUIVO_MANIFESTO)
+            temporario = f"{caminho}.tmp"
+            with open(temporario, "w", encoding="utf-8") as f:
+                json.dump(self._manifesto, f, ensure_ascii=False, indent=2, default=str)
+            os.replace(temporario, caminho)
+
+    def gravar(self, nome: str, impressao: str, df: pd.DataFrame, parametros: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Grava o resultado de uma consulta no snapshot.
+
+        Falhas de gravação são apenas registradas no log: o snapshot não deve
+        interromper a execução que está sendo gravada.
+
+        Args:
+            nome (str): Nome lógico da consulta.
+            impressao (str): Impressão digital da consulta (ver `impressao_consulta`).
+            df (pd.DataFrame): Resultado da consulta.
+            parametros (dict, optional): Parâmetros usados na renderização.
+        """
+        caminho = self._caminho(nome)
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.diretorio, exist_ok=True)
+            df.to_parquet(temporario, index=False)
+            os.replace(temporario, caminho)
+        except Exception as erro:
+            logger.error(f"❌ Não foi possível gravar a consulta '{nome}' no snapshot: {erro}")
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            return
+        self._registrar(nome, impressao, parametros, len(df), list(df.columns))
+        logger.info(f"🧊 Consulta '{nome}' gravada no snapshot ({len(df)} linhas).")
+
+    def gravar_blocos(
+        self,
+        nome: str,
+        impressao: str,
+        blocos: Iterable[pd.DataFrame],
+        parametros: Optional[Dict[str, Any]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Repassa os blocos de uma leitura incremental, gravando cada um no
+        snapshot à medida que passa (o resultado completo nunca fica em memória).
+
+        Como em `gravar`, falhas de gravação (ex: tipos de coluna que mudam entre
+        blocos) apenas encerram a gravação da consulta, com registro no log; os
+        blocos continuam sendo repassados.
+
+        Args:
+            nome (str): Nome lógico da consulta.
+            impressao (str): Impressão digital da consulta.
+            blocos (Iterable[pd.DataFrame]): Blocos lidos do servidor.
+            parametros (dict, optional): Parâmetros usados na renderização.
+
+        Yields:
+            pd.DataFrame: Os mesmos blocos recebidos.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        caminho = self._caminho(nome)
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        escritor, linhas, colunas, gravando = None, 0, [], True
+
+        def _abandonar(erro: Exception) -> None:
+            logger.error(f"❌ Não foi possível gravar a consulta '{nome}' no snapshot: {erro}")
+            if escritor is not None:
+                escritor.close()
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+        try:
+            for bloco in blocos:
+                if gravando:
+                    try:
+                        if escritor is None:
+                            os.makedirs(self.diretorio, exist_ok=True)
+                            tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+                            escritor = pq.ParquetWriter(temporario, tabela.schema)
+                            colunas = list(bloco.columns)
+                        else:
+                            tabela = pa.Table.from_pandas(bloco, schema=escritor.schema, preserve_index=False)
+                        escritor.write_table(tabela)
+                        linhas += len(bloco)
+                    except Exception as erro:
+                        _abandonar(erro)
+                        escritor, gravando = None, False
+                yield bloco
+        finally:
+            if escritor is not None:
+                escritor.close()
+
+        if not gravando:
+            return
+        try:
+            if escritor is None:
+                # Nenhum bloco lido: grava um resultado vazio para a consulta constar no snapshot
+                os.makedirs(self.diretorio, exist_ok=True)
+                pd.DataFrame().to_parquet(temporario, index=False)
+            os.replace(temporario, caminho)
+        except Exception as erro:
+            _abandonar(erro)
+            return
+        self._registrar(nome, impressao, parametros, linhas, colunas)
+        logger.info(f"🧊 Consulta '{nome}' gravada no snapshot em blocos ({linhas} linhas).")
+
+    def _conferir_impressao(self, nome: str, impressao: Optional[str]) -> None:
+        entrada = self.entrada(nome)
+        if impressao is None or entrada["impressao"] == impressao:
+            return
+        mensagem = (
+            f"A consulta '{nome}' mudou desde a gravação do snapshot "
+            f"(parâmetros gravados: {entrada['parametros']})."
+        )
+        if not self.aceitar_divergente:
+            raise ValueError(f"{mensagem} Use SNAPSHOT_ACEITAR_DIVERGENTE=1 para reproduzir o resultado congelado.")
+        logger.warning(f"⚠️ {mensagem} O resultado congelado será usado.")
+
+    def ler(self, nome: str, impressao: Optional[str] = None) -> pd.DataFrame:
+        """
+        Lê o resultado de uma consulta do snapshot.
+
+        Args:
+            nome (str): Nome lógico da consulta.
+            impressao (str, optional): Impressão digital da consulta atual; se diferir
+                                       da gravada, a leitura falha (ou, com
+                                       `aceitar_divergente`, um aviso é registrado no log).
+
+        Returns:
+            pd.DataFrame: O resultado gravado.
+
+        Raises:
+            KeyError: Se a consulta não estiver no snapshot.
+            ValueError: Se a consulta mudou desde a gravação e a divergência não é aceita.
+        """
+        self._conferir_impressao(nome, impressao)
+        df = pd.read_parquet(self._caminho(nome))
+        logger.info(f"🧊 Consulta '{nome}' lida do snapshot ({len(df)} linhas).")
+        return df
+
+    def ler_blocos(self, nome: str, tamanho_bloco: int, impressao: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        Lê o resultado de uma consulta do snapshot em blocos.
+
+        Args:
+            nome (str): Nome lógico da consulta.
+            tamanho_bloco (int): Linhas por bloco.
+            impressao (str, optional): Impressão digital da consulta atual.
+
+        Yields:
+            pd.DataFrame: Blocos de até `tamanho_bloco` linhas.
+
+        Raises:
+            KeyError: Se a consulta não estiver no snapshot.
+            ValueError: Se a consulta mudou desde a gravação e a divergência não é aceita.
+        """
+        import pyarrow.parquet as pq
+
+        self._conferir_impressao(nome, impressao)
+        arquivo = pq.ParquetFile(self._caminho(nome))
+        for lote in arquivo.iter_batches(batch_size=tamanho_bloco):
+            yield lote.to_pandas()
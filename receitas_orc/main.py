@@ -3,145 +3,120 @@ main.py
 
 Ponto de entrada principal para o pipeline de processamento de
 receitas orçamentárias. Orquestra a execução do pipeline.
+
+A importação deste módulo é leve: pandas, SQLAlchemy e os serviços do
+pipeline só são carregados depois que os argumentos são interpretados (o
+`--help` não os carrega), e o CLR só na primeira consulta MDX.
 """
+import argparse
 import logging
-import pandas as pd
-
-# Importações do projeto
-from receitas_orc.config.mdx_setup import setup_mdx_environment
-from receitas_orc.services.global_services import selecionar_consulta_por_nome
-from receitas_orc.services.dataframe_processing import renomear_colunas_padrao, classificar_projetos_em_dataframe
-from receitas_orc.services import pipeline_service
-
-# --- Configurações Globais ---
-DLL_PATH = r"C:\Microsoft.AnalysisServices.AdomdClient.dll"
-RESULT_FILE_NAME = "resultado_pipeline.xlsx"
+import sys
+from typing import Any, List, Optional
 
-# Configuração de exibição do Pandas
-pd.set_option('display.max_columns', None)
-pd.set_option('display.max_rows', 20)
-pd.set_option('display.width', 1200)
-
-# --- Configuração de Logging ---
-logging.basicConfig(level=logging.DEBUG, format="%(asctime)s [%(levelname)s] [%(name)s] %(message)s")
 logger = logging.getLogger(__name__)
 
+# Nomes reexportados de receitas_orc.services.execucao_pipeline, carregados sob demanda
+_REEXPORTADOS = (
+    "abrir_snapshot", "carregar_fontes", "descrever_grafos", "processar_mes", "exportar_resultado",
+    "executar_pipeline", "executar_lote",
+    "RESULT_FILE_NAME", "RESULT_FILE_NAME_LOTE", "COLUNA_MES_REFERENCIA",
+)
 
-def executar_pipeline():
-    """Orquestra a execução do pipeline e exporta o resultado formatado para Excel."""
-    logger.info("🚀 Iniciando pipeline de execução...")
-    
-    try:
-        setup_mdx_environment(DLL_PATH)
-        logger.info("Ambiente MDX inicializado com sucesso.")
-    except Exception as e:
-        logger.error(f"❌ Falha crítica ao inicializar ambiente MDX: {e}", exc_info=True)
-        return
-    
-    logger.info("--- Etapa 1: Carregando dados brutos ---")
-    resultados = selecionar_consulta_por_nome("RECEITAS_ORCADAS_2025, cc, acoes, FatoFechamento,RECEITAS_EXEC_2025,RECEITAS_DESPESAS_PERCENT")
-    df_orcadas = resultados.get("RECEITAS_ORCADAS_2025")
-    df_acoes = resultados.get("acoes")
-    df_cc = resultados.get("cc")
-    df_FatoFechamento_original = resultados.get("FatoFechamento")
-    df_exec_receitas = resultados.get("RECEITAS_EXEC_2025")
-    df_plan_receitasDespesas_SME = resultados.get("RECEITAS_DESPESAS_PERCENT")
+# Formatos de saída (os mesmos de receitas_orc.services.exportadores.EXPORTADORES,
+# repetidos aqui para validar a opção sem carregar o pandas)
+FORMATOS_SAIDA = ("xlsx", "parquet", "csv")
 
 
+def __getattr__(nome: str) -> Any:
+    if nome in _REEXPORTADOS:
+        from receitas_orc.services import execucao_pipeline
+        return getattr(execucao_pipeline, nome)
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
 
 
-    if any(df is None or df.empty for df in [df_orcadas, df_acoes, df_cc,df_FatoFechamento_original,df_exec_receitas]):
-        logger.error("Falha ao carregar DataFrames essenciais (orcadas, acoes, cc). Encerrando.")
-        return
+def configurar_ambiente() -> None:
+    """Configura o logging e a exibição do pandas para uma execução pela linha de comando."""
+    import pandas as pd
 
-    logger.info("Renomeando colunas...")
-    df_orcadas = renomear_colunas_padrao(df_orcadas)
-    df_acoes = renomear_colunas_padrao(df_acoes)
-    df_exec_receitas = renomear_colunas_padrao(df_exec_receitas)
-    df_plan_receitasDespesas_SME = renomear_colunas_padrao(df_plan_receitasDespesas_SME)
+    # Configuração de exibição do Pandas
+    pd.set_option('display.max_columns', None)
+    pd.set_option('display.max_rows', 20)
+    pd.set_option('display.width', 1200)
 
-    logger.info("--- Etapa 2: Obtendo mês de referência ---")
-    mes_selecionado = pipeline_service.obter_mes_do_usuario()
-    if mes_selecionado is None:
-        return
+    # --- Configuração de Logging ---
+    logging.basicConfig(level=logging.DEBUG, format="%(asctime)s [%(levelname)s] [%(name)s] %(message)s")
 
-    logger.info(f"--- Etapa 3: Filtrando dados para o mês {mes_selecionado} ---")
-    df_despesas_do_mes = pipeline_service.filtrar_por_mes_string(df_acoes, mes_selecionado, "Despesas", "FotografiaPPA")
-    df_receitas_do_mes = pipeline_service.filtrar_por_mes_string(df_orcadas, mes_selecionado, "Receitas", "FotografiaPPA")
-    df_exec_receitasAnual_do_mes = pipeline_service.filtrar_por_mes_string(df_exec_receitas, mes_selecionado, "Receitas_exec_2025", "FotografiaPPA")
-    
-    df_fechamento_do_mes = pd.DataFrame()
-    df_fechamento_anual = pd.DataFrame()
-
-
-    if df_FatoFechamento_original is not None and not df_FatoFechamento_original.empty:
-        df_FatoFechamento_original['DATA'] = pd.to_datetime(df_FatoFechamento_original['DATA'])
-        df_fechamento_do_mes = pipeline_service.filtrar_por_mes_datetime(df_FatoFechamento_original, mes_selecionado, "FatoFechamento", "DATA")
-        condicao_anual = df_FatoFechamento_original['DATA'].dt.month <= mes_selecionado
-        df_fechamento_anual = df_FatoFechamento_original[condicao_anual].copy()
-
-    logger.info("--- Etapa 4: Classificando projetos ---")
-    df_receitas_classificadas = classificar_projetos_em_dataframe(df_receitas_do_mes)
-    df_despesas_classificadas = classificar_projetos_em_dataframe(df_despesas_do_mes)
-
-    logger.info("--- Etapa 5: Aplicando lógica de negócio ---")
-    df_resultado_final = pipeline_service.aplicar_estrategias_de_apropriacao(
-        df_receitas_classificadas,
-        df_despesas_classificadas,
-        df_cc,
-        df_fechamento_do_mes,
-        df_exec_receitasAnual_do_mes,
-        df_plan_receitasDespesas_SME,
-        df_fechamento_anual
+
+def _intervalo_meses(valor: str) -> tuple:
+    """Converte '3' ou '1-12' em (mes_inicio, mes_fim)."""
+    partes = valor.split("-")
+    try:
+        if len(partes) not in (1, 2):
+            raise ValueError
+        mes_inicio, mes_fim = int(partes[0]), int(partes[-1])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Intervalo de meses inválido: '{valor}'. Use N ou N-M.")
+    if not 1 <= mes_inicio <= mes_fim <= 12:
+        raise argparse.ArgumentTypeError(f"Intervalo de meses inválido: '{valor}'. Os meses devem estar entre 1 e 12.")
+    return mes_inicio, mes_fim
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    """Cria o parser dos argumentos de linha de comando."""
+    parser = argparse.ArgumentParser(description="Pipeline de apropriação de receitas orçamentárias.")
+    parser.add_argument(
+        "--meses", type=_intervalo_meses, metavar="N[-M]",
+        help="Processa, sem interação, um mês ou um intervalo de meses (ex: 1-12) com uma única carga de dados."
     )
-    
-    #Filtrar o resultado final para manter apenas as linhas '100% CSN'
- 
-    if not df_resultado_final.empty and 'TipoRegra' in df_resultado_final.columns:
-        logger.info("Filtrando o resultado final para manter apenas as regras '100% CSN'...")
-        condicao_tipo_regra = (df_resultado_final['TipoRegra'] != 'Outra Regra')
+    parser.add_argument(
+        "--formato", choices=FORMATOS_SAIDA,
+        help="Formato do arquivo de resultado (padrão: FORMATO_SAIDA ou xlsx)."
+    )
+    parser.add_argument(
+        "--detalhar-receitas", action="store_true", default=None,
+        help="Acrescenta ao resultado uma coluna por natureza de receita (padrão: DETALHAR_RECEITAS)."
+    )
+    parser.add_argument(
+        "--grafo", action="store_true",
+        help="Mostra os grafos de etapas do pipeline (formato DOT) e encerra, sem executar."
+    )
+    snapshot = parser.add_mutually_exclusive_group()
+    snapshot.add_argument(
+        "--gravar-snapshot", nargs="?", const="", metavar="DIR",
+        help="Grava as fontes consultadas em um novo snapshot versionado em DIR (padrão: SNAPSHOT_DIR)."
+    )
+    snapshot.add_argument(
+        "--reproduzir-snapshot", nargs="?", const="", metavar="DIR",
+        help="Lê as fontes do snapshot DIR (ou do mais recente em DIR), sem acessar os servidores."
+    )
+    return parser
 
-        # 2. Defina a segunda condição (usando '!=' para "diferente de")
-        condicao_despesa_anual = (df_resultado_final['CSN_APROPRIAR_ANUAL'] != 0)
 
-        # 3. Aplique ambas as condições usando o operador '&'
-        #    Cada condição precisa estar entre parênteses.
-        df_resultado_final = df_resultado_final[condicao_tipo_regra & condicao_despesa_anual].copy()
+def main(argv: Optional[List[str]] = None):
+    """Função principal para iniciar a execução do pipeline."""
+    args = criar_parser().parse_args(argv)
+    configurar_ambiente()
 
+    from receitas_orc.services import execucao_pipeline
+    if args.grafo:
+        print(execucao_pipeline.descrever_grafos())
+        return
 
-    logger.info("--- Etapa 6: Gerando saída formatada para Excel ---")
-    if df_resultado_final.empty:
-        logger.warning("O resultado final está vazio (ou não contém regras '100% CSN'). Nenhum arquivo será gerado.")
+    # Sem as opções de snapshot, vale a variável de ambiente SNAPSHOT_MODO
+    snapshot = None
+    if args.gravar_snapshot is not None:
+        snapshot = execucao_pipeline.abrir_snapshot("gravar", args.gravar_snapshot)
+    elif args.reproduzir_snapshot is not None:
+        snapshot = execucao_pipeline.abrir_snapshot("reproduzir", args.reproduzir_snapshot)
+
+    if args.meses is None:
+        execucao_pipeline.executar_pipeline(
+            snapshot=snapshot, formato=args.formato, detalhar_receitas=args.detalhar_receitas
+        )
     else:
-        try:
-            with pd.ExcelWriter(RESULT_FILE_NAME, engine='xlsxwriter') as writer:
-                df_resultado_final.to_excel(writer, sheet_name='Resultado', index=False)
-                
-                workbook = writer.book
-                worksheet = writer.sheets['Resultado']
-                
-                format_brl = workbook.add_format({'num_format': '#,##0.00'}) # Adicionado .00 para centavos
-                format_pct = workbook.add_format({'num_format': '0.00%'})
-                
-                for col_idx, col_name in enumerate(df_resultado_final.columns):
-                    if '(%)' in col_name:
-                        worksheet.set_column(col_idx, col_idx, 15, format_pct) # Aumentado para 15
-                    # Corrigido para não formatar colunas de texto
-                    elif col_name not in ['PROJETO', 'ACAO', 'CC', 'FotografiaPPA_despesas', 'TipoRegra']:
-                        worksheet.set_column(col_idx, col_idx, 18, format_brl)
-            
-            logger.info(f"✅ Pipeline executado e exportado com sucesso para '{RESULT_FILE_NAME}'")
-            logger.info("O arquivo Excel contém os dados filtrados e formatados.")
-        except Exception as e:
-            logger.error(f"❌ Falha ao exportar para Excel: {e}", exc_info=True)
-
-
-
-
-def main():
-    """Função principal para iniciar a execução do pipeline."""
-    executar_pipeline()
+        execucao_pipeline.executar_lote(
+            *args.meses, snapshot=snapshot, formato=args.formato, detalhar_receitas=args.detalhar_receitas
+        )
 
 if __name__ == "__main__":
-    main()
-
+    main(sys.argv[1:])
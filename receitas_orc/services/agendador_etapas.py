@@ -0,0 +1,229 @@
+"""
+agendador_etapas.py
+
+Este módulo contém o agendador de etapas do pipeline. O pipeline é descrito
+como um grafo acíclico (DAG) de etapas nomeadas, cada uma com entradas e
+saídas declaradas; as dependências são deduzidas desses nomes. O agendador
+executa concorrentemente, em um pool de threads, todas as etapas cujas
+entradas já estão disponíveis, de modo que etapas independentes (renomeação,
+classificação, filtros mensais...) se sobrepõem em vez de rodar em série.
+O grafo pode ser inspecionado (ordem, dependências, níveis e formato DOT).
+"""
+
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from receitas_orc.utils.instrumentacao import obter_instrumentacao
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações padrão (podem ser sobrescritas por variáveis de ambiente) ---
+# Número de etapas executadas simultaneamente
+ETAPAS_PARALELAS = int(os.getenv("ETAPAS_PARALELAS", str(min(os.cpu_count() or 1, 8))))
+
+
+class Etapa:
+    """Etapa do grafo: uma função, os nomes dos valores que ela lê e os que ela produz."""
+
+    def __init__(self, nome: str, funcao: Callable, entradas: Tuple[str, ...], saidas: Tuple[str, ...]):
+        self.nome = nome
+        self.funcao = funcao
+        self.entradas = entradas
+        self.saidas = saidas
+
+    def executar(self, valores: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Chama a função com as entradas como argumentos posicionais, na ordem de `entradas`.
+
+        Returns:
+            Dict[str, Any]: Saída -> valor. Com mais de uma saída, a função deve
+                            retornar uma tupla na ordem de `saidas`.
+        """
+        resultado = self.funcao(*(valores[entrada] for entrada in self.entradas))
+        if len(self.saidas) == 0:
+            return {}
+        if len(self.saidas) == 1:
+            return {self.saidas[0]: resultado}
+        if not isinstance(resultado, tuple) or len(resultado) != len(self.saidas):
+            raise ValueError(f"A etapa '{self.nome}' deve retornar uma tupla com {len(self.saidas)} valores.")
+        return dict(zip(self.saidas, resultado))
+
+
+class GrafoEtapas:
+    """
+    Grafo acíclico de etapas. Uma etapa depende das etapas que produzem suas
+    entradas; entradas que nenhuma etapa produz são valores iniciais,
+    informados em `executar`.
+    """
+
+    def __init__(self, nome: str = "pipeline"):
+        """
+        Args:
+            nome (str): Nome do grafo (usado no log e no formato DOT).
+        """
+        self.nome = nome
+        self.etapas: Dict[str, Etapa] = {}
+        self._produtor: Dict[str, str] = {}
+
+    def adicionar(
+        self,
+        nome: str,
+        funcao: Callable,
+        entradas: Iterable[str] = (),
+        saidas: Iterable[str] = ()
+    ) -> "GrafoEtapas":
+        """
+        Acrescenta uma etapa ao grafo.
+
+        Args:
+            nome (str): Nome único da etapa.
+            funcao (Callable): Função chamada com as entradas, na ordem declarada.
+            entradas (Iterable[str]): Nomes dos valores lidos pela etapa.
+            saidas (Iterable[str]): Nomes dos valores produzidos pela etapa.
+
+        Returns:
+            GrafoEtapas: O próprio grafo, para encadeamento.
+
+        Raises:
+            ValueError: Se a etapa já existir, se uma saída já tiver produtor
+                        ou se a etapa fechar um ciclo.
+        """
+        entradas, saidas = tuple(entradas), tuple(saidas)
+        if nome in self.etapas:
+            raise ValueError(f"Etapa '{nome}' já existe no grafo '{self.nome}'.")
+        for saida in saidas:
+            if saida in self._produtor:
+                raise ValueError(f"O valor '{saida}' já é produzido pela etapa '{self._produtor[saida]}'.")
+
+        self.etapas[nome] = Etapa(nome, funcao, entradas, saidas)
+        self._produtor.update({saida: nome for saida in saidas})
+        try:
+            self.ordem_topologica()
+        except ValueError:
+            del self.etapas[nome]
+            for saida in saidas:
+                del self._produtor[saida]
+            raise
+        return self
+
+    def dependencias(self) -> Dict[str, List[str]]:
+        """Retorna, para cada etapa, as etapas das quais ela depende."""
+        return {
+            nome: sorted({self._produtor[entrada] for entrada in etapa.entradas if entrada in self._produtor})
+            for nome, etapa in self.etapas.items()
+        }
+
+    def valores_iniciais(self) -> List[str]:
+        """Retorna os valores que devem ser informados em `executar` (não produzidos por nenhuma etapa)."""
+        return sorted({
+            entrada for etapa in self.etapas.values() for entrada in etapa.entradas if entrada not in self._produtor
+        })
+
+    def niveis(self) -> List[List[str]]:
+        """
+        Agrupa as etapas em níveis: as de um mesmo nível não dependem umas
+        das outras e podem rodar ao mesmo tempo.
+
+        Raises:
+            ValueError: Se o grafo tiver um ciclo.
+        """
+        dependencias = {nome: set(deps) for nome, deps in self.dependencias().items()}
+        concluidas: set = set()
+        niveis = []
+        while len(concluidas) < len(dependencias):
+            nivel = [nome for nome, deps in dependencias.items() if nome not in concluidas and deps <= concluidas]
+            if not nivel:
+                pendentes = sorted(set(dependencias) - concluidas)
+                raise ValueError(f"Ciclo entre as etapas do grafo '{self.nome}': {pendentes}")
+            niveis.append(nivel)
+            concluidas.update(nivel)
+        return niveis
+
+    def ordem_topologica(self) -> List[str]:
+        """Retorna as etapas em uma ordem compatível com as dependências."""
+        return [nome for nivel in self.niveis() for nome in nivel]
+
+    def para_dot(self) -> str:
+        """Descreve o grafo no formato DOT do Graphviz (etapas como nós, valores nas arestas)."""
+        linhas = [f'digraph "{self.nome}" {{', "  rankdir=LR;"]
+        for nome in self.ordem_topologica():
+            linhas.append(f'  "{nome}";')
+        for nome, etapa in self.etapas.items():
+            for entrada in etapa.entradas:
+                if entrada in self._produtor:
+                    linhas.append(f'  "{self._produtor[entrada]}" -> "{nome}" [label="{entrada}"];')
+        linhas.append("}")
+        return "\n".join(linhas)
+
+    def executar(
+        self,
+        valores_iniciais: Dict[str, Any],
+        max_workers: Optional[int] = None,
+        **rotulos: Any
+    ) -> Dict[str, Any]:
+        """
+        Executa o grafo: cada etapa é submetida ao pool assim que todas as
+        suas dependências terminam.
+
+        Cada etapa é medida pela instrumentação (como filha da etapa em
+        andamento na thread que chamou `executar`). Quando a instrumentação
+        mede memória, as etapas rodam uma a uma, pois o pico do tracemalloc é
+        global ao processo e não distinguiria etapas simultâneas.
+
+        Args:
+            valores_iniciais (dict): Valores de entrada do grafo (ver `valores_iniciais()`).
+            max_workers (int, optional): Etapas simultâneas. Default é ETAPAS_PARALELAS.
+            **rotulos: Rótulos da instrumentação aplicados a todas as etapas (ex: mes=3).
+
+        Returns:
+            Dict[str, Any]: Os valores iniciais mais todas as saídas produzidas.
+
+        Raises:
+            ValueError: Se faltar algum valor inicial.
+            Exception: A primeira exceção levantada por uma etapa (as etapas
+                       ainda não iniciadas são canceladas).
+        """
+        faltantes = [valor for valor in self.valores_iniciais() if valor not in valores_iniciais]
+        if faltantes:
+            raise ValueError(f"Valores iniciais ausentes para o grafo '{self.nome}': {faltantes}")
+
+        instrumentacao = obter_instrumentacao()
+        workers = 1 if instrumentacao.medir_memoria else (max_workers or ETAPAS_PARALELAS)
+        pai = instrumentacao.etapa_atual()
+
+        def _executar_etapa(etapa: Etapa, valores: Dict[str, Any]) -> Dict[str, Any]:
+            with instrumentacao.etapa(etapa.nome, pai_externo=pai, **rotulos) as registro:
+                registro.entrada(*(valores[entrada] for entrada in etapa.entradas))
+                saidas = etapa.executar(valores)
+                registro.saida(*saidas.values())
+                return saidas
+
+        valores = dict(valores_iniciais)
+        dependencias = {nome: set(deps) for nome, deps in self.dependencias().items()}
+        concluidas: set = set()
+        em_execucao: Dict[Any, str] = {}
+
+        logger.debug(f"🧭 Executando o grafo '{self.nome}' ({len(self.etapas)} etapas, {workers} workers).")
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f"etapa_{self.nome}") as executor:
+            while len(concluidas) < len(self.etapas):
+                agendadas = set(em_execucao.values())
+                for nome, deps in dependencias.items():
+                    if nome not in concluidas and nome not in agendadas and deps <= concluidas:
+                        # Cópia rasa: o laço principal continua publicando saídas enquanto a etapa roda
+                        em_execucao[executor.submit(_executar_etapa, self.etapas[nome], dict(valores))] = nome
+
+                terminadas, _ = wait(list(em_execucao), return_when=FIRST_COMPLETED)
+                for futuro in terminadas:
+                    nome = em_execucao.pop(futuro)
+                    try:
+                        valores.update(futuro.result())
+                    except Exception as e:
+                        logger.error(f"❌ Falha na etapa '{nome}' do grafo '{self.nome}': {e}")
+                        for pendente in em_execucao:
+                            pendente.cancel()
+                        raise
+                    concluidas.add(nome)
+
+        return valores
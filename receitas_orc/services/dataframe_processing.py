@@ -6,10 +6,11 @@ de DataFrames Pandas, como a renomeação padrão de colunas e a
 normalização de texto.
 """
 
+import numpy as np
 import pandas as pd
 import unicodedata
 import logging
-import os 
+from functools import lru_cache
 
 # Configuração do logger para este módulo
 logger = logging.getLogger(__name__)
@@ -67,7 +68,12 @@ def normalizar_texto(texto: str) -> str:
     if pd.isna(texto):
         return ""
     
-    texto_str = str(texto).lower().strip()
+    return _normalizar_texto_str(str(texto))
+
+
+@lru_cache(maxsize=65536)
+def _normalizar_texto_str(texto: str) -> str:
+    texto_str = texto.lower().strip()
     
     # Remove acentos
     texto_normalizado = unicodedata.normalize('NFKD', texto_str)
@@ -76,7 +82,27 @@ def normalizar_texto(texto: str) -> str:
     # Remove pontuações específicas (pode ser expandido se necessário)
     texto_limpo = texto_sem_acentos.replace(',', '').replace('.', '')
     
-    return texto_limpo
+    # Colapsa espaços internos repetidos
+    return ' '.join(texto_limpo.split())
+
+
+def normalizar_serie(serie: pd.Series) -> pd.Series:
+    """
+    Versão vetorizada de `normalizar_texto` para colunas inteiras.
+
+    Cada valor distinto é normalizado uma única vez (via pd.factorize, com
+    memoização entre chamadas) e o resultado é propagado pelos códigos.
+
+    Args:
+        serie (pd.Series): Coluna de textos (valores nulos viram "").
+
+    Returns:
+        pd.Series: Textos normalizados, com o mesmo índice da série original.
+    """
+    codigos, unicos = pd.factorize(serie)
+    # A última posição ("") atende ao código -1 que o factorize usa para nulos
+    normalizados = np.array([normalizar_texto(v) for v in unicos] + [""], dtype=object)
+    return pd.Series(normalizados[codigos], index=serie.index, name=serie.name)
 
 
 
@@ -85,29 +111,28 @@ def classificar_projetos_em_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     Enriquece o DataFrame de projetos com uma classificação baseada em
     regras definidas em um arquivo de configuração externo (CSV).
 
+    As regras (exatas, por prefixo ou regex) são compiladas uma única vez e
+    reaproveitadas enquanto o arquivo não for alterado.
+
     Args:
         df (pd.DataFrame): O DataFrame de entrada com a coluna 'PROJETO'.
 
     Returns:
         pd.DataFrame: O DataFrame original com a nova coluna 'TipoRegra'.
     """
-    # --- Etapa 1: Carregar as regras do arquivo de configuração ---
-    caminho_regras = os.path.join(
-        os.path.dirname(__file__), '..', 'config', 'regras_classificacao.csv'
-    )
+    # Importação local: regras_classificacao depende de normalizar_texto deste módulo
+    from receitas_orc.services.regras_classificacao import CAMINHO_REGRAS, obter_motor_regras
+
+    # --- Etapa 1: Obter as regras compiladas do arquivo de configuração ---
+    caminho_regras = CAMINHO_REGRAS
     try:
-        regras_df = pd.read_csv(caminho_regras)
+        motor = obter_motor_regras(caminho_regras)
     except FileNotFoundError:
         logger.error(f"Arquivo de regras não encontrado em: {caminho_regras}")
-        df['TipoRegra'] = 'Erro: Arquivo de Regras Não Encontrado'
-        return df
+        return df.assign(TipoRegra='Erro: Arquivo de Regras Não Encontrado')
         
-    # --- Etapa 2: Aplicar as regras usando um merge ---
-    # pd.merge é a forma mais eficiente e "pandônica" de fazer essa junção.
-    # Usamos um 'left' join para manter todos os projetos originais.
-    df_classificado = pd.merge(df, regras_df, on='PROJETO', how='left')
-    
-    # --- Etapa 3: Definir um valor padrão para projetos não mapeados ---
-    df_classificado['TipoRegra'] = df_classificado['TipoRegra'].fillna('Outra Regra')
+    # --- Etapa 2: Classificar em uma única passada vetorizada ---
+    # Projetos sem regra aplicável recebem o valor padrão 'Outra Regra'.
+    df_classificado = df.assign(TipoRegra=motor.classificar(df['PROJETO']))
     
     return df_classificado
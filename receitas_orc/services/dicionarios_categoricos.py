@@ -0,0 +1,108 @@
+"""
+dicionarios_categoricos.py
+
+Este módulo contém os dicionários categóricos compartilhados pelos
+DataFrames de uma execução. Cada coluna-chave (PROJETO, ACAO, CC, ...) tem
+um único dicionário: o mesmo texto recebe o mesmo código inteiro em todos os
+DataFrames, de modo que merges e agrupamentos operam sobre códigos e as
+legendas só voltam a ser texto na exportação.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+COLUNAS_CHAVE = ('PROJETO', 'ACAO', 'CC', 'UNIDADE', 'FotografiaPPA', 'DESCNVL4', 'TipoRegra')
+
+
+class DicionariosCategoricos:
+    """
+    Conjunto de dicionários (um CategoricalDtype por coluna-chave) válido
+    durante uma execução do pipeline.
+
+    Os DataFrames são primeiro registrados (coleta dos valores distintos) e
+    depois codificados, todos com o mesmo dtype para cada coluna.
+    """
+
+    def __init__(self, colunas: Iterable[str] = COLUNAS_CHAVE):
+        """
+        Inicializa os dicionários vazios.
+
+        Args:
+            colunas (Iterable[str]): Colunas que devem ser codificadas.
+        """
+        self.colunas = tuple(colunas)
+        self._valores: Dict[str, Dict[str, None]] = {coluna: {} for coluna in self.colunas}
+        self._dtypes: Dict[str, pd.CategoricalDtype] = {}
+
+    def registrar(self, *dfs: Optional[pd.DataFrame]) -> None:
+        """
+        Acrescenta aos dicionários os valores distintos das colunas-chave.
+
+        Args:
+            *dfs (pd.DataFrame): DataFrames da execução (None é ignorado).
+        """
+        for df in dfs:
+            if df is None:
+                continue
+            for coluna in self.colunas:
+                if coluna in df.columns:
+                    valores = df[coluna]
+                    if isinstance(valores.dtype, pd.CategoricalDtype):
+                        valores = valores.cat.categories
+                    self._valores[coluna].update(dict.fromkeys(pd.unique(valores.dropna()).tolist()))
+        self._dtypes = {}
+
+    def dtype(self, coluna: str) -> pd.CategoricalDtype:
+        """
+        Retorna o dtype categórico compartilhado de uma coluna-chave.
+
+        Args:
+            coluna (str): Nome da coluna.
+
+        Returns:
+            pd.CategoricalDtype: Dtype com todas as categorias registradas, ordenadas.
+        """
+        if coluna not in self._dtypes:
+            # Categorias ordenadas: agrupamentos por código seguem a mesma ordem que sobre o texto
+            self._dtypes[coluna] = pd.CategoricalDtype(sorted(self._valores[coluna]))
+        return self._dtypes[coluna]
+
+    def codificar(self, df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """
+        Converte as colunas-chave do DataFrame para o dtype categórico compartilhado.
+        Valores não registrados viram nulos; por isso, registre antes de codificar.
+
+        Args:
+            df (pd.DataFrame): DataFrame a codificar.
+
+        Returns:
+            pd.DataFrame: Novo DataFrame com as colunas-chave codificadas.
+        """
+        if df is None:
+            return df
+        tipos = {coluna: self.dtype(coluna) for coluna in self.colunas if coluna in df.columns}
+        return df.astype(tipos) if tipos else df
+
+    def tamanho(self) -> Dict[str, int]:
+        """Retorna o número de valores distintos de cada dicionário."""
+        return {coluna: len(valores) for coluna, valores in self._valores.items()}
+
+
+def decodificar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte todas as colunas categóricas de volta para texto (object).
+
+    Args:
+        df (pd.DataFrame): DataFrame possivelmente codificado.
+
+    Returns:
+        pd.DataFrame: DataFrame sem colunas categóricas.
+    """
+    categoricas = [coluna for coluna, tipo in df.dtypes.items() if isinstance(tipo, pd.CategoricalDtype)]
+    if not categoricas:
+        return df
+    return df.astype({coluna: object for coluna in categoricas})
@@ -0,0 +1,455 @@
+"""
+execucao_pipeline.py
+
+Contém a orquestração de uma execução completa do pipeline: carga única das
+fontes, processamento de um ou de vários meses sobre os dados em memória e
+exportação do resultado. As etapas de preparação das fontes e as de cada mês
+são grafos de etapas (ver agendador_etapas), executados concorrentemente
+conforme as dependências. O ambiente MDX (CLR/Pyadomd) não é inicializado
+aqui: isso acontece sob demanda, na primeira consulta MDX executada (e nunca
+quando as fontes são reproduzidas de um snapshot).
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from receitas_orc.data_access.snapshot import SNAPSHOT_DIR, SnapshotFontes, novo_diretorio_snapshot
+from receitas_orc.services.global_services import (
+    COLUNA_MES_REFERENCIA, carregar_fechamento_agregado, selecionar_consulta_por_nome
+)
+from receitas_orc.services.dataframe_processing import renomear_colunas_padrao, classificar_projetos_em_dataframe
+from receitas_orc.services import pipeline_service
+from receitas_orc.services.agendador_etapas import GrafoEtapas
+from receitas_orc.services.dicionarios_categoricos import DicionariosCategoricos, decodificar
+from receitas_orc.services.exportadores import FORMATO_SAIDA, obter_exportador
+from receitas_orc.services.indice_mensal import IndiceMensal, adicionar_chave_mes
+from receitas_orc.services.indices_juncao import IndicesJuncao
+from receitas_orc.services.receitas_natureza import DETALHAR_RECEITAS, detalhar_receitas, resumir_receitas
+from receitas_orc.utils.copia_sob_escrita import copia_defensiva, modo_copia_sob_escrita
+from receitas_orc.utils.instrumentacao import instrumentar, nova_execucao, obter_instrumentacao
+
+# --- Configurações Globais ---
+RESULT_FILE_NAME = "resultado_pipeline.xlsx"
+RESULT_FILE_NAME_LOTE = "resultado_pipeline_lote.xlsx"
+# Codifica as colunas-chave com dicionários categóricos compartilhados
+CODIFICAR_DIMENSOES = os.getenv("CODIFICAR_DIMENSOES", "1") == "1"
+# Uso do cache em disco das consultas: 'usar', 'atualizar' ou 'ignorar'
+MODO_CACHE = os.getenv("CACHE_RESULTADOS", "usar")
+# Lê a FatoFechamento em blocos, agregando por CC/mês sem carregá-la inteira
+FECHAMENTO_EM_BLOCOS = os.getenv("FECHAMENTO_EM_BLOCOS", "0") == "1"
+# Ano de referência repassado aos templates das consultas
+ANO_REFERENCIA = int(os.getenv("ANO_REFERENCIA", "2025"))
+# Fontes preparadas por carregar_fontes e consumidas por processar_mes
+FONTES = (
+    "indice_despesas", "indice_receitas", "indice_exec_receitas", "df_cc", "df_plan_receitasDespesas_SME",
+    "agregador_fechamento", "df_fechamento", "meses_fechamento", "indices_juncao",
+)
+# Snapshot das fontes: '' (desativado), 'gravar' ou 'reproduzir' (ver SNAPSHOT_DIR)
+SNAPSHOT_MODO = os.getenv("SNAPSHOT_MODO", "")
+
+logger = logging.getLogger(__name__)
+
+
+def abrir_snapshot(modo: Optional[str] = None, diretorio: Optional[str] = None) -> Optional[SnapshotFontes]:
+    """
+    Abre o snapshot das fontes de uma execução.
+
+    Args:
+        modo (str, opcional): 'gravar' ou 'reproduzir'. Padrão é SNAPSHOT_MODO;
+                              vazio desativa o snapshot.
+        diretorio (str, opcional): No modo 'gravar', a base onde é criado um novo
+                                   snapshot versionado; no modo 'reproduzir', o snapshot
+                                   (ou a base, da qual o mais recente é usado).
+                                   Padrão é SNAPSHOT_DIR.
+
+    Returns:
+        SnapshotFontes ou None: O snapshot, ou None se desativado.
+    """
+    modo = SNAPSHOT_MODO if modo is None else modo
+    if not modo:
+        return None
+    diretorio = diretorio or SNAPSHOT_DIR
+    if modo == "gravar":
+        diretorio = novo_diretorio_snapshot(diretorio)
+    return SnapshotFontes(diretorio, modo)
+
+
+@instrumentar("carregar_fontes")
+def carregar_fontes(mes_fim: int, snapshot: Optional[SnapshotFontes] = None) -> Optional[Dict[str, Any]]:
+    """
+    Carrega e prepara, uma única vez, todas as fontes do pipeline.
+
+    A FatoFechamento é lida de janeiro até `mes_fim`, o que atende qualquer mês
+    de referência até ele. Os projetos são classificados e indexados por mês
+    aqui, para que cada mês processado depois seja apenas um fatiamento em memória.
+
+    Args:
+        mes_fim (int): Último mês de referência que será processado.
+        snapshot (SnapshotFontes, opcional): Snapshot no qual as fontes são gravadas
+                                             ou do qual são reproduzidas.
+
+    Returns:
+        dict ou None: Fontes preparadas, ou None se alguma fonte essencial falhar.
+    """
+    logger.info("--- Etapa 2: Carregando dados brutos ---")
+    parametros = {"ano": ANO_REFERENCIA}
+    parametros_fechamento = {"mes_fim": mes_fim}
+    nomes_consultas = ["RECEITAS_ORCADAS_2025", "cc", "acoes", "RECEITAS_EXEC_2025", "RECEITAS_DESPESAS_PERCENT"]
+    agregador_fechamento = None
+
+    if FECHAMENTO_EM_BLOCOS:
+        # A leitura em blocos da fato corre em paralelo com as demais consultas
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="fechamento") as executor:
+            futuro_fechamento = executor.submit(
+                carregar_fechamento_agregado, "FatoFechamento",
+                parametros={**parametros, **parametros_fechamento},
+                snapshot=snapshot
+            )
+            resultados = selecionar_consulta_por_nome(
+                nomes_consultas, paralelo=True, modo_cache=MODO_CACHE, parametros=parametros, snapshot=snapshot
+            )
+            try:
+                agregador_fechamento = futuro_fechamento.result()
+            except Exception as e:
+                logger.error(f"❌ Falha na leitura em blocos da FatoFechamento: {e}", exc_info=True)
+                return None
+    else:
+        resultados = selecionar_consulta_por_nome(
+            nomes_consultas + ["FatoFechamento"],
+            paralelo=True,
+            modo_cache=MODO_CACHE,
+            parametros=parametros,
+            parametros_por_consulta={"FatoFechamento": parametros_fechamento},
+            snapshot=snapshot
+        )
+
+    df_orcadas = resultados.get("RECEITAS_ORCADAS_2025")
+    df_acoes = resultados.get("acoes")
+    df_cc = resultados.get("cc")
+    df_FatoFechamento_original = resultados.get("FatoFechamento")
+    df_exec_receitas = resultados.get("RECEITAS_EXEC_2025")
+    df_plan_receitasDespesas_SME = resultados.get("RECEITAS_DESPESAS_PERCENT")
+
+    essenciais = [df_orcadas, df_acoes, df_cc, df_exec_receitas]
+    if agregador_fechamento is None:
+        essenciais.append(df_FatoFechamento_original)
+
+    if any(df is None or df.empty for df in essenciais):
+        logger.error("Falha ao carregar DataFrames essenciais (orcadas, acoes, cc). Encerrando.")
+        return None
+
+    logger.info("--- Preparando as fontes (renomeação, classificação e indexação mensal) ---")
+    valores = montar_grafo_fontes().executar({
+        "orcadas_bruto": df_orcadas,
+        "acoes_bruto": df_acoes,
+        "cc_bruto": df_cc,
+        "exec_receitas_bruto": df_exec_receitas,
+        "plan_receitas_despesas_bruto": df_plan_receitasDespesas_SME,
+        "fechamento_bruto": df_FatoFechamento_original,
+        "agregador_fechamento": agregador_fechamento,
+    })
+    return {nome: valores[nome] for nome in FONTES}
+
+
+def _codificar_dimensoes(*dfs: Optional[pd.DataFrame]) -> tuple:
+    """Aplica às fontes os dicionários categóricos compartilhados (se CODIFICAR_DIMENSOES)."""
+    if not CODIFICAR_DIMENSOES:
+        return dfs
+    # Um dicionário por coluna-chave, comum a todos os DataFrames da execução
+    dicionarios = DicionariosCategoricos()
+    dicionarios.registrar(*dfs)
+    logger.debug(f"Dicionários categóricos: {dicionarios.tamanho()}")
+    return tuple(dicionarios.codificar(df) for df in dfs)
+
+
+def _indexar_meses(df: pd.DataFrame) -> IndiceMensal:
+    """Indexa o DataFrame por mês; a legenda da fotografia PPA é interpretada uma vez por valor distinto."""
+    return IndiceMensal(adicionar_chave_mes(df, ano_padrao=ANO_REFERENCIA))
+
+
+def _preparar_fechamento(df_FatoFechamento: Optional[pd.DataFrame]) -> tuple:
+    """Converte DATA uma única vez e pré-calcula o mês de cada lançamento da FatoFechamento."""
+    if df_FatoFechamento is None:
+        return None, None
+    df_fechamento = copia_defensiva(df_FatoFechamento)
+    df_fechamento['DATA'] = pd.to_datetime(df_fechamento['DATA'], errors='coerce')
+    df_fechamento = df_fechamento.dropna(subset=['DATA'])
+    return df_fechamento, df_fechamento['DATA'].dt.month.to_numpy()
+
+
+def montar_grafo_fontes() -> GrafoEtapas:
+    """
+    Monta o grafo das etapas de preparação das fontes (após as consultas).
+    Renomeação, classificação, indexação mensal, índices de junção e
+    preparação da FatoFechamento de fontes diferentes são independentes e
+    rodam concorrentemente.
+
+    Returns:
+        GrafoEtapas: Grafo cujas saídas incluem todas as chaves de FONTES.
+    """
+    grafo = GrafoEtapas("fontes")
+    grafo.adicionar("renomear_orcadas", renomear_colunas_padrao, ["orcadas_bruto"], ["orcadas_renomeado"])
+    grafo.adicionar("renomear_acoes", renomear_colunas_padrao, ["acoes_bruto"], ["acoes_renomeado"])
+    grafo.adicionar("renomear_exec_receitas", renomear_colunas_padrao, ["exec_receitas_bruto"], ["exec_receitas_renomeado"])
+    grafo.adicionar(
+        "renomear_plan_receitas_despesas", renomear_colunas_padrao,
+        ["plan_receitas_despesas_bruto"], ["plan_receitas_despesas_renomeado"]
+    )
+    # A classificação não depende do mês: é feita uma vez, antes da indexação mensal
+    grafo.adicionar("classificar_orcadas", classificar_projetos_em_dataframe, ["orcadas_renomeado"], ["orcadas_classificado"])
+    grafo.adicionar("classificar_acoes", classificar_projetos_em_dataframe, ["acoes_renomeado"], ["acoes_classificado"])
+    grafo.adicionar(
+        "codificar_dimensoes", _codificar_dimensoes,
+        ["orcadas_classificado", "acoes_classificado", "cc_bruto", "exec_receitas_renomeado",
+         "plan_receitas_despesas_renomeado", "fechamento_bruto"],
+        ["df_orcadas", "df_acoes", "df_cc", "df_exec_receitas", "df_plan_receitasDespesas_SME", "df_FatoFechamento"]
+    )
+    grafo.adicionar("indexar_despesas", _indexar_meses, ["df_acoes"], ["indice_despesas"])
+    grafo.adicionar("indexar_receitas", _indexar_meses, ["df_orcadas"], ["indice_receitas"])
+    grafo.adicionar("indexar_exec_receitas", _indexar_meses, ["df_exec_receitas"], ["indice_exec_receitas"])
+    # Índices (PROJETO, ACAO) -> CC e CC -> posição, reutilizados por todos os meses
+    grafo.adicionar("indexar_juncoes", IndicesJuncao, ["df_cc"], ["indices_juncao"])
+    grafo.adicionar("preparar_fechamento", _preparar_fechamento, ["df_FatoFechamento"], ["df_fechamento", "meses_fechamento"])
+    return grafo
+
+
+def _separar_fechamento(agregador_fechamento, df_fechamento: Optional[pd.DataFrame], meses_fechamento, mes_selecionado: int) -> tuple:
+    """Separa a FatoFechamento do mês e a acumulada de janeiro até o mês."""
+    if agregador_fechamento is not None:
+        return (
+            agregador_fechamento.mensal(mes_selecionado, ANO_REFERENCIA),
+            agregador_fechamento.acumulado(mes_selecionado, ANO_REFERENCIA),
+        )
+    if df_fechamento is None or df_fechamento.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    df_fechamento_do_mes = df_fechamento[meses_fechamento == mes_selecionado]
+    df_fechamento_anual = df_fechamento[meses_fechamento <= mes_selecionado]
+    if df_fechamento_do_mes.empty:
+        logger.warning(f"Nenhum dado encontrado para o mês '{mes_selecionado}' em 'FatoFechamento'.")
+    return df_fechamento_do_mes, df_fechamento_anual
+
+
+def _filtrar_resultado(df_resultado_final: pd.DataFrame) -> pd.DataFrame:
+    """Mantém apenas as linhas com regra de apropriação e despesa anual a apropriar."""
+    if not df_resultado_final.empty and 'TipoRegra' in df_resultado_final.columns:
+        logger.info("Filtrando o resultado final para manter apenas as regras '100% CSN'...")
+        condicao_tipo_regra = (df_resultado_final['TipoRegra'] != 'Outra Regra')
+
+        # 2. Defina a segunda condição (usando '!=' para "diferente de")
+        condicao_despesa_anual = (df_resultado_final['CSN_APROPRIAR_ANUAL'] != 0)
+
+        # 3. Aplique ambas as condições usando o operador '&'
+        #    Cada condição precisa estar entre parênteses.
+        df_resultado_final = copia_defensiva(df_resultado_final[condicao_tipo_regra & condicao_despesa_anual])
+    return df_resultado_final
+
+
+def montar_grafo_mes(detalhar: bool = False) -> GrafoEtapas:
+    """
+    Monta o grafo das etapas de um mês de referência. Os três filtros mensais
+    e a separação da FatoFechamento são independentes e rodam concorrentemente.
+
+    Args:
+        detalhar (bool): Se True, o resultado recebe uma coluna por natureza de
+                         receita (etapa 'detalhar_receitas', após o filtro final).
+
+    Returns:
+        GrafoEtapas: Grafo cujos valores iniciais são as FONTES mais 'mes'; a saída final é 'resultado'.
+    """
+    filtrar = pipeline_service.filtrar_por_mes_indexado
+    grafo = GrafoEtapas("mes")
+    grafo.adicionar("filtrar_despesas", partial(filtrar, nome_df="Despesas"), ["indice_despesas", "mes"], ["despesas_mes"])
+    grafo.adicionar("filtrar_receitas", partial(filtrar, nome_df="Receitas"), ["indice_receitas", "mes"], ["receitas_mes"])
+    grafo.adicionar(
+        "filtrar_exec_receitas", partial(filtrar, nome_df="Receitas_exec_2025"),
+        ["indice_exec_receitas", "mes"], ["exec_receitas_mes"]
+    )
+    grafo.adicionar(
+        "separar_fechamento", _separar_fechamento,
+        ["agregador_fechamento", "df_fechamento", "meses_fechamento", "mes"], ["fechamento_mes", "fechamento_anual"]
+    )
+    # Receitas do mês em formato longo (PROJETO, natureza), sem pivot denso
+    grafo.adicionar("resumir_receitas", resumir_receitas, ["receitas_mes"], ["receitas_longas"])
+    # As etapas internas (preparar, executar estratégias...) herdam o rótulo do mês
+    grafo.adicionar(
+        "apropriar_mes", pipeline_service.aplicar_estrategias_de_apropriacao,
+        ["receitas_mes", "despesas_mes", "df_cc", "fechamento_mes", "exec_receitas_mes",
+         "df_plan_receitasDespesas_SME", "fechamento_anual", "indices_juncao", "receitas_longas"],
+        ["resultado_apropriado"]
+    )
+    if detalhar:
+        grafo.adicionar("filtrar_resultado", _filtrar_resultado, ["resultado_apropriado"], ["resultado_filtrado"])
+        grafo.adicionar("detalhar_receitas", detalhar_receitas, ["resultado_filtrado", "receitas_longas"], ["resultado"])
+    else:
+        grafo.adicionar("filtrar_resultado", _filtrar_resultado, ["resultado_apropriado"], ["resultado"])
+    return grafo
+
+
+def descrever_grafos() -> str:
+    """Retorna os grafos de etapas do pipeline no formato DOT, para inspeção."""
+    return "\n\n".join(grafo.para_dot() for grafo in (montar_grafo_fontes(), montar_grafo_mes(DETALHAR_RECEITAS)))
+
+
+def processar_mes(
+    fontes: Dict[str, Any],
+    mes_selecionado: int,
+    detalhar_receitas: Optional[bool] = None
+) -> pd.DataFrame:
+    """
+    Executa as etapas dependentes do mês sobre as fontes já carregadas.
+
+    Args:
+        fontes (dict): Fontes retornadas por `carregar_fontes`.
+        mes_selecionado (int): Mês de referência (1 a 12).
+        detalhar_receitas (bool, opcional): Acrescenta uma coluna por natureza de
+                                            receita ao resultado. Padrão é DETALHAR_RECEITAS.
+
+    Returns:
+        pd.DataFrame: Resultado final do mês (pode estar vazio).
+    """
+    with obter_instrumentacao().etapa("processar_mes", mes=mes_selecionado) as etapa:
+        logger.info(f"--- Etapas 3 a 5: Filtrando e apropriando os dados do mês {mes_selecionado} ---")
+        detalhar = DETALHAR_RECEITAS if detalhar_receitas is None else detalhar_receitas
+        valores = montar_grafo_mes(detalhar).executar({**fontes, "mes": mes_selecionado})
+        df_resultado_final = valores["resultado"]
+        etapa.saida(df_resultado_final)
+
+    return df_resultado_final
+
+
+@instrumentar("exportar_resultado")
+def exportar_resultado(df_resultado_final: pd.DataFrame, nome_arquivo: str, formato: Optional[str] = None) -> Optional[str]:
+    """
+    Exporta o resultado no formato escolhido (xlsx com formatação monetária e
+    percentual, parquet ou csv), gravando-o em blocos.
+
+    Args:
+        df_resultado_final (pd.DataFrame): Resultado do pipeline.
+        nome_arquivo (str): Arquivo de destino; a extensão é trocada pela do formato.
+        formato (str, opcional): 'xlsx', 'parquet' ou 'csv'. Padrão é FORMATO_SAIDA.
+
+    Returns:
+        str ou None: Caminho do arquivo gravado, ou None se nada foi exportado.
+    """
+    exportador = obter_exportador(formato or FORMATO_SAIDA)
+    caminho = os.path.splitext(nome_arquivo)[0] + exportador.extensao
+    logger.info(f"--- Etapa 6: Gerando saída formatada ({exportador.extensao}) ---")
+    df_resultado_final = decodificar(df_resultado_final)
+    if df_resultado_final.empty:
+        logger.warning("O resultado final está vazio (ou não contém regras '100% CSN'). Nenhum arquivo será gerado.")
+        return None
+
+    try:
+        linhas = exportador.exportar(df_resultado_final, caminho)
+    except Exception as e:
+        logger.error(f"❌ Falha ao exportar para '{caminho}': {e}", exc_info=True)
+        return None
+
+    logger.info(f"✅ Pipeline executado e exportado com sucesso para '{caminho}' ({linhas} linhas).")
+    return caminho
+
+
+def executar_pipeline(
+    mes_selecionado: Optional[int] = None,
+    snapshot: Optional[SnapshotFontes] = None,
+    formato: Optional[str] = None,
+    detalhar_receitas: Optional[bool] = None,
+    copia_sob_escrita: Optional[bool] = None
+):
+    """
+    Orquestra a execução do pipeline para um mês e exporta o resultado formatado.
+
+    Args:
+        mes_selecionado (int, opcional): Mês de referência. Se omitido, é obtido
+                                         de MES_INPUT ou perguntado ao usuário.
+        snapshot (SnapshotFontes, opcional): Snapshot das fontes. Se omitido, é
+                                             aberto conforme SNAPSHOT_MODO.
+        formato (str, opcional): Formato de saída ('xlsx', 'parquet' ou 'csv').
+                                 Padrão é FORMATO_SAIDA.
+        detalhar_receitas (bool, opcional): Exporta uma coluna por natureza de
+                                            receita. Padrão é DETALHAR_RECEITAS.
+        copia_sob_escrita (bool, opcional): Executa com o copy-on-write do pandas,
+                                            sem cópias defensivas. Padrão é COPY_ON_WRITE.
+    """
+    nova_execucao()
+    with modo_copia_sob_escrita(copia_sob_escrita):
+        try:
+            logger.info("🚀 Iniciando pipeline de execução...")
+
+            # O mês é obtido antes da carga para que o filtro da FatoFechamento
+            # (janeiro até o mês de referência) seja aplicado no próprio servidor.
+            logger.info("--- Etapa 1: Obtendo mês de referência ---")
+            if mes_selecionado is None:
+                mes_selecionado = pipeline_service.obter_mes_do_usuario()
+            if mes_selecionado is None:
+                return
+
+            fontes = carregar_fontes(mes_selecionado, snapshot or abrir_snapshot())
+            if fontes is None:
+                return
+
+            exportar_resultado(processar_mes(fontes, mes_selecionado, detalhar_receitas), RESULT_FILE_NAME, formato)
+        finally:
+            obter_instrumentacao().gravar_relatorios()
+
+
+def executar_lote(
+    mes_inicio: int,
+    mes_fim: int,
+    snapshot: Optional[SnapshotFontes] = None,
+    formato: Optional[str] = None,
+    detalhar_receitas: Optional[bool] = None,
+    copia_sob_escrita: Optional[bool] = None
+) -> pd.DataFrame:
+    """
+    Processa um intervalo de meses com uma única carga das fontes.
+
+    Cada mês reaproveita os dados em memória; os resultados são reunidos em um
+    único DataFrame particionado pela coluna MES_REFERENCIA.
+
+    Args:
+        mes_inicio (int): Primeiro mês do intervalo (1 a 12).
+        mes_fim (int): Último mês do intervalo (1 a 12).
+        snapshot (SnapshotFontes, opcional): Snapshot das fontes. Se omitido, é
+                                             aberto conforme SNAPSHOT_MODO.
+        formato (str, opcional): Formato de saída ('xlsx', 'parquet' ou 'csv').
+                                 Padrão é FORMATO_SAIDA.
+        detalhar_receitas (bool, opcional): Exporta uma coluna por natureza de
+                                            receita. Padrão é DETALHAR_RECEITAS.
+        copia_sob_escrita (bool, opcional): Executa com o copy-on-write do pandas,
+                                            sem cópias defensivas. Padrão é COPY_ON_WRITE.
+
+    Returns:
+        pd.DataFrame: Resultados de todos os meses (vazio em caso de falha).
+    """
+    nova_execucao()
+    with modo_copia_sob_escrita(copia_sob_escrita):
+        try:
+            logger.info(f"🚀 Iniciando pipeline em lote para os meses {mes_inicio} a {mes_fim}...")
+
+            fontes = carregar_fontes(mes_fim, snapshot or abrir_snapshot())
+            if fontes is None:
+                return pd.DataFrame()
+
+            resultados_por_mes = []
+            for mes in range(mes_inicio, mes_fim + 1):
+                df_mes = processar_mes(fontes, mes, detalhar_receitas)
+                if not df_mes.empty:
+                    resultados_por_mes.append(df_mes.assign(**{COLUNA_MES_REFERENCIA: mes}))
+
+            if not resultados_por_mes:
+                df_lote = pd.DataFrame()
+            else:
+                df_lote = pd.concat(resultados_por_mes, ignore_index=True)
+                # A partição fica como primeira coluna
+                df_lote = df_lote[[COLUNA_MES_REFERENCIA] + [c for c in df_lote.columns if c != COLUNA_MES_REFERENCIA]]
+
+            exportar_resultado(df_lote, RESULT_FILE_NAME_LOTE, formato)
+            return df_lote
+        finally:
+            obter_instrumentacao().gravar_relatorios()
@@ -0,0 +1,274 @@
+"""
+exportadores.py
+
+Este módulo contém os exportadores do resultado do pipeline. Todos seguem a
+mesma interface (`Exportador`): o resultado é gravado em blocos de linhas,
+de modo que o tempo cresce linearmente e a memória adicional fica limitada
+ao tamanho de um bloco, qualquer que seja o formato:
+
+    - xlsx: xlsxwriter no modo `constant_memory` (cada linha vai para o disco
+      assim que é escrita);
+    - parquet: um row group por bloco, via pyarrow;
+    - csv: blocos acrescentados ao arquivo.
+
+As regras de formatação (moeda, percentual, data e texto) são definidas uma
+única vez em REGRAS_FORMATO e aplicadas por todos os exportadores.
+"""
+
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações padrão (podem ser sobrescritas por variáveis de ambiente) ---
+FORMATO_SAIDA = os.getenv("FORMATO_SAIDA", "xlsx")
+TAMANHO_BLOCO_EXPORTACAO = int(os.getenv("TAMANHO_BLOCO_EXPORTACAO", "10000"))
+
+# Limite de linhas de uma planilha xlsx (incluindo o cabeçalho)
+LIMITE_LINHAS_EXCEL = 1_048_576
+
+# Regras de formatação por tipo de coluna:
+# - num_format/largura: formato e largura da coluna no Excel
+# - casas_decimais: arredondamento aplicado nos formatos textuais (CSV)
+REGRAS_FORMATO: Dict[str, Dict[str, Any]] = {
+    "moeda": {"num_format": "#,##0.00", "largura": 18, "casas_decimais": 2},
+    "percentual": {"num_format": "0.00%", "largura": 15, "casas_decimais": 4},
+    "data": {"num_format": "dd/mm/yyyy", "largura": 12},
+    "texto": {},
+}
+
+# Colunas de identificação, nunca formatadas como número (MES_REFERENCIA é a partição do modo em lote)
+COLUNAS_TEXTO = ('PROJETO', 'ACAO', 'CC', 'FotografiaPPA_despesas', 'TipoRegra', 'MES_REFERENCIA')
+
+
+def tipo_coluna(nome: str, dtype: Any) -> str:
+    """
+    Classifica uma coluna do resultado segundo as regras de formatação.
+
+    Args:
+        nome (str): Nome da coluna.
+        dtype: Tipo da coluna no DataFrame.
+
+    Returns:
+        str: 'percentual', 'texto', 'data' ou 'moeda' (chave de REGRAS_FORMATO).
+    """
+    if '(%)' in str(nome):
+        return "percentual"
+    if nome in COLUNAS_TEXTO:
+        return "texto"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "data"
+    if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+        return "moeda"
+    return "texto"
+
+
+def tipos_colunas(df: pd.DataFrame) -> Dict[str, str]:
+    """Retorna o tipo de formatação de cada coluna do DataFrame."""
+    return {str(coluna): tipo_coluna(coluna, dtype) for coluna, dtype in df.dtypes.items()}
+
+
+def _blocos(df: pd.DataFrame, tamanho_bloco: int) -> Iterator[pd.DataFrame]:
+    for inicio in range(0, max(len(df), 1), tamanho_bloco):
+        yield df.iloc[inicio:inicio + tamanho_bloco]
+
+
+class Exportador(ABC):
+    """
+    Classe base dos exportadores. Cada formato implementa `escrever_blocos`,
+    que recebe o resultado como uma sequência de blocos com as mesmas colunas.
+    """
+
+    extensao: str = ""
+
+    def __init__(self, tamanho_bloco: int = TAMANHO_BLOCO_EXPORTACAO):
+        """
+        Args:
+            tamanho_bloco (int): Linhas por bloco em `exportar`.
+        """
+        self.tamanho_bloco = max(1, tamanho_bloco)
+
+    @abstractmethod
+    def escrever_blocos(self, blocos: Iterable[pd.DataFrame], caminho: str) -> int:
+        """
+        Grava os blocos, na ordem recebida, em um único arquivo.
+
+        Args:
+            blocos (Iterable[pd.DataFrame]): Blocos do resultado (todos com as mesmas colunas).
+            caminho (str): Arquivo de destino.
+
+        Returns:
+            int: Número de linhas gravadas.
+        """
+        pass
+
+    def exportar(self, df: pd.DataFrame, caminho: str) -> int:
+        """
+        Grava um DataFrame, bloco a bloco.
+
+        Args:
+            df (pd.DataFrame): Resultado a exportar (colunas categóricas já decodificadas).
+            caminho (str): Arquivo de destino.
+
+        Returns:
+            int: Número de linhas gravadas.
+        """
+        return self.escrever_blocos(_blocos(df, self.tamanho_bloco), caminho)
+
+
+class ExportadorExcel(Exportador):
+    """
+    Planilha xlsx gravada linha a linha (xlsxwriter com `constant_memory`).
+    Resultados maiores que o limite de linhas do Excel continuam em novas
+    planilhas ("Resultado_2", "Resultado_3", ...), cada uma com seu cabeçalho.
+    """
+
+    extensao = ".xlsx"
+
+    def __init__(
+        self,
+        tamanho_bloco: int = TAMANHO_BLOCO_EXPORTACAO,
+        nome_planilha: str = "Resultado",
+        linhas_por_planilha: int = LIMITE_LINHAS_EXCEL,
+    ):
+        """
+        Args:
+            tamanho_bloco (int): Linhas por bloco em `exportar`.
+            nome_planilha (str): Nome da (primeira) planilha.
+            linhas_por_planilha (int): Linhas por planilha, incluindo o cabeçalho
+                                       (no máximo LIMITE_LINHAS_EXCEL).
+        """
+        super().__init__(tamanho_bloco)
+        self.nome_planilha = nome_planilha
+        self.linhas_por_planilha = min(max(2, linhas_por_planilha), LIMITE_LINHAS_EXCEL)
+
+    @staticmethod
+    def _valores_coluna(serie: pd.Series) -> List[Any]:
+        """Converte a coluna em valores Python aceitos pelo xlsxwriter (nulos viram células vazias)."""
+        return serie.astype(object).where(serie.notna(), None).tolist()
+
+    def escrever_blocos(self, blocos: Iterable[pd.DataFrame], caminho: str) -> int:
+        import xlsxwriter
+
+        linha, total, planilhas = 0, 0, 0
+        workbook = xlsxwriter.Workbook(caminho, {"constant_memory": True, "nan_inf_to_errors": True})
+        try:
+            formato_cabecalho = workbook.add_format({"bold": True, "border": 1})
+            formatos = {
+                tipo: workbook.add_format({"num_format": regra["num_format"]})
+                for tipo, regra in REGRAS_FORMATO.items() if "num_format" in regra
+            }
+
+            def nova_planilha(bloco: pd.DataFrame):
+                nome = self.nome_planilha if planilhas == 0 else f"{self.nome_planilha}_{planilhas + 1}"
+                worksheet = workbook.add_worksheet(nome)
+                # Formatos de coluna são definidos antes da primeira linha (exigência do constant_memory)
+                for indice, (coluna, tipo) in enumerate(tipos_colunas(bloco).items()):
+                    if tipo in formatos:
+                        worksheet.set_column(indice, indice, REGRAS_FORMATO[tipo]["largura"], formatos[tipo])
+                worksheet.write_row(0, 0, [str(coluna) for coluna in bloco.columns], formato_cabecalho)
+                return worksheet
+
+            for bloco in blocos:
+                if planilhas == 0:
+                    worksheet = nova_planilha(bloco)
+                    linha, planilhas = 1, 1
+
+                colunas = [self._valores_coluna(bloco[coluna]) for coluna in bloco.columns]
+                for valores in zip(*colunas):
+                    if linha >= self.linhas_por_planilha:
+                        # Planilha cheia: o xlsxwriter descartaria as próximas linhas em silêncio
+                        worksheet = nova_planilha(bloco)
+                        linha, planilhas = 1, planilhas + 1
+                    if worksheet.write_row(linha, 0, valores) == -1:
+                        raise ValueError(f"Linha {linha} fora dos limites da planilha '{worksheet.name}'.")
+                    linha += 1
+                    total += 1
+            if planilhas == 0:
+                workbook.add_worksheet(self.nome_planilha)
+        finally:
+            workbook.close()
+        if planilhas > 1:
+            logger.info(f"📄 Resultado de {total} linhas dividido em {planilhas} planilhas.")
+        return total
+
+
+class ExportadorParquet(Exportador):
+    """Arquivo Parquet com um row group por bloco; os tipos de formatação vão nos metadados."""
+
+    extensao = ".parquet"
+
+    def escrever_blocos(self, blocos: Iterable[pd.DataFrame], caminho: str) -> int:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        escritor, linhas = None, 0
+        try:
+            for bloco in blocos:
+                if escritor is None:
+                    tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+                    metadados = {**(tabela.schema.metadata or {}),
+                                 b"receitas_orc.formatos": json.dumps(tipos_colunas(bloco)).encode("utf-8")}
+                    escritor = pq.ParquetWriter(caminho, tabela.schema.with_metadata(metadados))
+                else:
+                    tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+                escritor.write_table(tabela.cast(escritor.schema))
+                linhas += len(bloco)
+        finally:
+            if escritor is not None:
+                escritor.close()
+        return linhas
+
+
+class ExportadorCsv(Exportador):
+    """
+    CSV no padrão brasileiro (separador ';', decimal ',' e UTF-8 com BOM, para
+    abrir corretamente no Excel), com moeda e percentual arredondados.
+    """
+
+    extensao = ".csv"
+
+    def escrever_blocos(self, blocos: Iterable[pd.DataFrame], caminho: str) -> int:
+        linhas, casas = 0, None
+        with open(caminho, "w", encoding="utf-8-sig", newline="") as arquivo:
+            for bloco in blocos:
+                cabecalho = casas is None
+                if cabecalho:
+                    casas = {coluna: REGRAS_FORMATO[tipo]["casas_decimais"]
+                             for coluna, tipo in tipos_colunas(bloco).items()
+                             if "casas_decimais" in REGRAS_FORMATO[tipo]}
+                bloco = bloco.round(casas) if casas else bloco
+                bloco.to_csv(arquivo, sep=";", decimal=",", index=False, header=cabecalho, date_format="%d/%m/%Y")
+                linhas += len(bloco)
+        return linhas
+
+
+EXPORTADORES = {
+    "xlsx": ExportadorExcel,
+    "parquet": ExportadorParquet,
+    "csv": ExportadorCsv,
+}
+
+
+def obter_exportador(formato: str = FORMATO_SAIDA, **kwargs: Any) -> Exportador:
+    """
+    Cria o exportador de um formato.
+
+    Args:
+        formato (str): 'xlsx', 'parquet' ou 'csv'.
+        **kwargs: Repassados ao construtor do exportador (ex: tamanho_bloco).
+
+    Returns:
+        Exportador: O exportador do formato.
+
+    Raises:
+        ValueError: Se o formato não for suportado.
+    """
+    if formato not in EXPORTADORES:
+        raise ValueError(f"Formato de saída não suportado: '{formato}'. Use um de {tuple(EXPORTADORES)}.")
+    return EXPORTADORES[formato](**kwargs)
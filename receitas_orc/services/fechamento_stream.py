@@ -0,0 +1,119 @@
+"""
+fechamento_stream.py
+
+Este módulo contém o agregador incremental da FatoFechamento. Em vez de
+carregar a tabela fato inteira em memória, os blocos lidos do servidor são
+consolidados um a um em totais por (ano, mês, CC), dos quais derivam as
+despesas do mês e as acumuladas no ano usadas pelo pipeline.
+"""
+
+import logging
+from typing import Iterable, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class AgregadorFechamento:
+    """
+    Acumula totais de despesa por ano, mês e centro de custo a partir de blocos
+    da FatoFechamento (colunas DATA, CC e VALOR).
+
+    A memória usada é proporcional a meses × centros de custo, e não ao
+    número de linhas da tabela fato.
+    """
+
+    def __init__(self, coluna_data: str = "DATA", coluna_cc: str = "CC", coluna_valor: str = "VALOR"):
+        """
+        Inicializa o agregador.
+
+        Args:
+            coluna_data (str): Coluna com a data do lançamento.
+            coluna_cc (str): Coluna com o centro de custo.
+            coluna_valor (str): Coluna com o valor a ser somado.
+        """
+        self.coluna_data = coluna_data
+        self.coluna_cc = coluna_cc
+        self.coluna_valor = coluna_valor
+        self.linhas_lidas = 0
+        self._totais = pd.Series(
+            dtype="float64",
+            index=pd.MultiIndex.from_arrays([[], [], []], names=["ANO", "MES", coluna_cc])
+        )
+
+    def adicionar(self, bloco: pd.DataFrame) -> None:
+        """
+        Consolida um bloco de linhas nos totais acumulados.
+
+        Args:
+            bloco (pd.DataFrame): Bloco com as colunas de data, CC e valor.
+        """
+        if bloco is None or bloco.empty:
+            return
+
+        self.linhas_lidas += len(bloco)
+        datas = pd.to_datetime(bloco[self.coluna_data], errors="coerce")
+        validas = datas.notna()
+
+        totais_bloco = bloco[self.coluna_valor][validas].groupby([
+            datas[validas].dt.year.rename("ANO"),
+            datas[validas].dt.month.rename("MES"),
+            bloco[self.coluna_cc][validas],
+        ]).sum()
+
+        self._totais = totais_bloco.add(self._totais, fill_value=0) if len(self._totais) else totais_bloco
+
+    def consumir(self, blocos: Iterable[pd.DataFrame]) -> "AgregadorFechamento":
+        """
+        Consolida todos os blocos de um iterável (ex: leitura em blocos do servidor).
+
+        Args:
+            blocos (Iterable[pd.DataFrame]): Blocos a serem agregados.
+
+        Returns:
+            AgregadorFechamento: O próprio agregador, para encadeamento.
+        """
+        for bloco in blocos:
+            self.adicionar(bloco)
+        logger.debug(
+            f"FatoFechamento agregada: {self.linhas_lidas} linhas lidas, "
+            f"{len(self._totais)} totais por ano/mês/CC."
+        )
+        return self
+
+    def _por_cc(self, ano: Optional[int], mes: int, acumulado: bool) -> pd.DataFrame:
+        anos = self._totais.index.get_level_values("ANO")
+        meses = self._totais.index.get_level_values("MES")
+        if ano is None:
+            ano = anos.max() if len(anos) else None
+        mascara = (anos == ano) & ((meses <= mes) if acumulado else (meses == mes))
+        selecionados = self._totais[mascara]
+        return selecionados.groupby(level=self.coluna_cc).sum().rename(self.coluna_valor).reset_index()
+
+    def mensal(self, mes: int, ano: Optional[int] = None) -> pd.DataFrame:
+        """
+        Retorna o total de despesa por CC no mês e ano informados.
+
+        Args:
+            mes (int): Mês de referência (1–12).
+            ano (int, opcional): Ano de referência. Padrão é o ano mais recente lido.
+
+        Returns:
+            pd.DataFrame: DataFrame com as colunas CC e VALOR.
+        """
+        return self._por_cc(ano, mes, acumulado=False)
+
+    def acumulado(self, mes: int, ano: Optional[int] = None) -> pd.DataFrame:
+        """
+        Retorna o total de despesa por CC acumulado de janeiro até o mês informado,
+        dentro do ano de referência.
+
+        Args:
+            mes (int): Mês de referência (1–12).
+            ano (int, opcional): Ano de referência. Padrão é o ano mais recente lido.
+
+        Returns:
+            pd.DataFrame: DataFrame com as colunas CC e VALOR.
+        """
+        return self._por_cc(ano, mes, acumulado=True)
@@ -8,13 +8,16 @@ execução centralizada de consultas, além de funções para salvar dados.
 """
 
 import logging
+import threading
 import time
 import pandas as pd
 import os
 import sqlalchemy
 
 
-from typing import Union, List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Union, List, Dict, Optional, Iterator
 from urllib.parse import quote_plus
 
 
@@ -22,33 +25,58 @@ from urllib.parse import quote_plus
 # Importações relativas para o projeto
 # O setup_mdx_environment não será mais chamado aqui diretamente no nível do módulo
 # from receitas_orc.config.mdx_setup import setup_mdx_environment
+from receitas_orc.config.config_connections import POOL_PADRAO, ENGINE_PADRAO
+from receitas_orc.data_access.bulk_writer import carregar_com_troca_atomica, publicar_incremental
 from receitas_orc.data_access.queries import CONEXOES, Consulta, consultas
 from receitas_orc.data_access.query_executor import CriadorDataFrame
+from receitas_orc.data_access.result_cache import obter_cache_padrao
+from receitas_orc.data_access.snapshot import SnapshotFontes, impressao_consulta
+from receitas_orc.services.fechamento_stream import AgregadorFechamento
+from receitas_orc.utils.instrumentacao import obter_instrumentacao
 
 # A configuração do logger (basicConfig) foi movida para main.py.
 # Aqui, apenas obtemos uma instância do logger.
 logger = logging.getLogger("logger_financa")
 
+# Número padrão de consultas executadas simultaneamente no modo paralelo.
+# As consultas atingem servidores independentes (OLAP, HubDados, FINANCA),
+# então o gargalo é a espera de rede, não a CPU local.
+MAX_CONSULTAS_PARALELAS = int(os.getenv("CONSULTAS_PARALELAS", "6"))
+
+# Número de linhas por bloco na leitura incremental da FatoFechamento.
+TAMANHO_BLOCO_FECHAMENTO = int(os.getenv("TAMANHO_BLOCO_FECHAMENTO", "50000"))
+
+# Registro global de engines SQLAlchemy, indexado pelo nome da conexão.
+_engines: Dict[str, sqlalchemy.engine.Engine] = {}
+_engines_lock = threading.Lock()
+
+# Modos aceitos por salvar_no_financa
+MODOS_ESCRITA = ("atomico", "substituir", "upsert")
+
+# Coluna que particiona por mês o resultado do modo em lote
+COLUNA_MES_REFERENCIA = "MES_REFERENCIA"
+
+# Chave de negócio padrão do resultado publicado (usada no modo "upsert");
+# apenas as colunas presentes no DataFrame são consideradas.
+CHAVES_NEGOCIO = ["PROJETO", "ACAO", "CC", COLUNA_MES_REFERENCIA]
+
 # O caminho da DLL não deve ser hardcoded aqui, será gerenciado por main.py ou uma configuração centralizada
 # dll_path = r"C:\Microsoft.AnalysisServices.AdomdClient.dll"
 # setup_mdx_environment(dll_path) # Esta chamada é removida daqui
 
-def funcao_conexao(nome_conexao: str) -> Union[sqlalchemy.engine.base.Connection, str]:
+def _montar_url_conexao(info: Dict) -> str:
     """
-    Retorna uma conexão SQLAlchemy com base nas informações da conexão especificada.
-    Suporta conexões do tipo: 'sql', 'azure_sql' e 'mdx'.
+    Monta a URL SQLAlchemy (mssql+pyodbc) para uma conexão do tipo 'sql' ou 'azure_sql'.
 
     Args:
-        nome_conexao (str): O nome da conexão conforme definido em CONEXOES.
+        info (dict): Configuração da conexão, conforme definida em CONEXOES.
 
     Returns:
-        sqlalchemy.engine.base.Connection ou str: Objeto de conexão ou string de conexão para MDX.
+        str: URL de conexão no formato aceito por sqlalchemy.create_engine.
 
     Raises:
         ValueError: Se o tipo de conexão não for suportado.
     """
-    info = CONEXOES[nome_conexao]
-
     if info["tipo"] == "sql":
         servidor = info["servidor"]
         banco = info["banco"]
@@ -63,9 +91,6 @@ def funcao_conexao(nome_conexao: str) -> Union[sqlalchemy.engine.base.Connection
             f"{trusted_str}"
         )
 
-        string_conexao = f"mssql+pyodbc:///?odbc_connect={quote_plus(odbc_str)}"
-        return sqlalchemy.create_engine(string_conexao).connect()
-
     elif info["tipo"] == "azure_sql":
         servidor = info["servidor"]
         banco = info.get("banco", "")
@@ -84,8 +109,74 @@ def funcao_conexao(nome_conexao: str) -> Union[sqlalchemy.engine.base.Connection
         if usuario and senha:
             odbc_str += f"UID={usuario};PWD={senha};"
 
-        string_conexao = f"mssql+pyodbc:///?odbc_connect={quote_plus(odbc_str)}"
-        return sqlalchemy.create_engine(string_conexao).connect()
+    else:
+        raise ValueError("Tipo de conexão não suportado.")
+
+    return f"mssql+pyodbc:///?odbc_connect={quote_plus(odbc_str)}"
+
+
+def obter_engine(nome_conexao: str) -> sqlalchemy.engine.Engine:
+    """
+    Retorna a engine SQLAlchemy da conexão, criando-a apenas na primeira chamada.
+
+    As engines ficam em um registro global do processo, indexado pelo nome da
+    conexão, de modo que extrações e gravações repetidas reaproveitam o mesmo
+    pool em vez de refazer a engine e o handshake ODBC a cada chamada.
+
+    Args:
+        nome_conexao (str): O nome da conexão conforme definido em CONEXOES.
+
+    Returns:
+        sqlalchemy.engine.Engine: A engine (com pool) associada à conexão.
+
+    Raises:
+        ValueError: Se o tipo de conexão não for suportado (ex: 'mdx').
+    """
+    with _engines_lock:
+        engine = _engines.get(nome_conexao)
+        if engine is None:
+            info = CONEXOES[nome_conexao]
+            parametros_pool = {**POOL_PADRAO, **info.get("pool", {})}
+
+            engine = sqlalchemy.create_engine(_montar_url_conexao(info), **ENGINE_PADRAO, **parametros_pool)
+            _engines[nome_conexao] = engine
+            logger.debug(f"Engine criada para '{nome_conexao}' com pool {parametros_pool}")
+        return engine
+
+
+def descartar_engines() -> None:
+    """
+    Fecha todas as conexões dos pools e esvazia o registro de engines.
+    Útil ao final de processos longos ou quando as configurações mudam.
+    """
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+def funcao_conexao(nome_conexao: str) -> Union[sqlalchemy.engine.base.Connection, str]:
+    """
+    Retorna uma conexão SQLAlchemy com base nas informações da conexão especificada.
+    Suporta conexões do tipo: 'sql', 'azure_sql' e 'mdx'.
+
+    A conexão é obtida do pool da engine registrada para `nome_conexao`; quem
+    a recebe é responsável por fechá-la (devolvendo-a ao pool). Prefira
+    `conexao_pool`, que faz isso automaticamente.
+
+    Args:
+        nome_conexao (str): O nome da conexão conforme definido em CONEXOES.
+
+    Returns:
+        sqlalchemy.engine.base.Connection ou str: Objeto de conexão ou string de conexão para MDX.
+
+    Raises:
+        ValueError: Se o tipo de conexão não for suportado.
+    """
+    info = CONEXOES[nome_conexao]
+
+    if info["tipo"] in ("sql", "azure_sql"):
+        return obter_engine(nome_conexao).connect()
 
     elif info["tipo"] == "mdx":
         return info["str_conexao"]
@@ -94,50 +185,101 @@ def funcao_conexao(nome_conexao: str) -> Union[sqlalchemy.engine.base.Connection
         raise ValueError("Tipo de conexão não suportado.")
 
 
-def selecionar_consulta_por_nome(titulo: Union[str, List[str]]) -> Dict[str, pd.DataFrame]:
+@contextmanager
+def conexao_pool(nome_conexao: str) -> Iterator[sqlalchemy.engine.base.Connection]:
     """
-    Executa uma ou mais consultas pelo nome lógico definido no dicionário `consultas`.
-    Aceita:
-        - String com nomes separados por vírgula
-        - Lista de strings
+    Context manager que entrega uma conexão do pool e garante sua devolução.
+
+    Exemplo:
+        with conexao_pool("SPSVSQL39_FINANCA") as conexao:
+            df.to_sql("tabela", conexao)
 
     Args:
-        titulo (str ou list): Nome(s) da(s) consulta(s) a ser(em) executada(s).
+        nome_conexao (str): O nome da conexão conforme definido em CONEXOES.
 
-    Returns:
-        Dict[str, DataFrame]: Dicionário com as chaves originais (nomes das consultas)
-                              e os DataFrames resultantes.
+    Yields:
+        sqlalchemy.engine.base.Connection: Conexão ativa obtida do pool.
     """
-    if isinstance(titulo, str):
-        nomes = [t.strip() for t in titulo.split(",")]
-    elif isinstance(titulo, list):
-        nomes = [t.strip() for t in titulo]
-    else:
-        raise ValueError("O parâmetro 'titulo' deve ser uma string ou uma lista de strings.")
+    conexao = funcao_conexao(nome_conexao)
+    try:
+        yield conexao
+    finally:
+        conexao.close()
+
 
-    resultados = {}
+def _resolver_consulta(nome: str) -> Consulta:
+    """
+    Localiza a definição de consulta pelo nome lógico, tolerando variações
+    de caixa (original, minúsculas ou maiúsculas).
 
-    for nome in nomes:
-        nome_original = nome.strip()
+    Args:
+        nome (str): Nome lógico da consulta.
 
-        inicio = time.perf_counter()
-        logger.info(f"⛔️ Iniciando execução da consulta: '{nome_original}'")
+    Returns:
+        Consulta: A definição de consulta encontrada.
+
+    Raises:
+        ValueError: Se a consulta não estiver definida em `consultas`.
+    """
+    if nome in consultas:
+        return consultas[nome]
+    if nome.lower() in consultas:
+        return consultas[nome.lower()]
+    if nome.upper() in consultas:
+        return consultas[nome.upper()]
+    raise ValueError(f"Consulta '{nome}' não reconhecida.")
+
+
+def _executar_consulta(
+    nome_original: str,
+    modo_cache: Optional[str] = None,
+    parametros: Optional[Dict[str, Any]] = None,
+    snapshot: Optional[SnapshotFontes] = None
+) -> pd.DataFrame:
+    """
+    Executa uma única consulta pelo nome lógico, registrando no log o tempo
+    gasto, a quantidade de linhas/colunas e a memória do resultado.
 
+    Args:
+        nome_original (str): Nome lógico da consulta.
+        modo_cache (str, optional): 'usar', 'atualizar' ou 'ignorar'. Default é None (sem cache).
+        parametros (dict, optional): Parâmetros do template da consulta (ex: ano, mes_fim).
+        snapshot (SnapshotFontes, optional): Snapshot das fontes. No modo 'gravar', o
+                                             resultado é gravado nele; no modo 'reproduzir',
+                                             é lido dele, sem executar a consulta.
+
+    Returns:
+        pd.DataFrame: O resultado da consulta, ou um DataFrame vazio em caso de erro.
+    """
+    inicio = time.perf_counter()
+    logger.info(f"⛔️ Iniciando execução da consulta: '{nome_original}'")
+
+    # Cada consulta é uma etapa da instrumentação, rotulada pelo nome
+    with obter_instrumentacao().etapa("consulta", consulta=nome_original) as etapa:
         try:
-            if nome_original in consultas:
-                consulta = consultas[nome_original]
-            elif nome_original.lower() in consultas:
-                consulta = consultas[nome_original.lower()]
-            elif nome_original.upper() in consultas:
-                consulta = consultas[nome_original.upper()]
-            else:
-                raise ValueError(f"Consulta '{nome_original}' não reconhecida.")
+            consulta = _resolver_consulta(nome_original)
 
-            logger.debug(f"Conexão usada: {consulta.conexao} | Tipo: {consulta.tipo}")
+            logger.debug(f"Conexão usada: {consulta.conexao} | Tipo: {consulta.tipo} | Parâmetros: {parametros or {}}")
+            texto_consulta = consulta.renderizar(**(parametros or {}))
+            impressao = impressao_consulta(consulta.conexao, consulta.tipo, texto_consulta)
 
-            df = CriadorDataFrame(
-                funcao_conexao, consulta.conexao, consulta.sql, consulta.tipo
-            ).executar()
+            if snapshot is not None and snapshot.reproduzindo:
+                # Reprodução: nenhuma conexão (CLR, ODBC ou rede) é aberta
+                df = snapshot.ler(nome_original, impressao)
+            else:
+                if modo_cache is None:
+                    criador = CriadorDataFrame(funcao_conexao, consulta.conexao, texto_consulta, consulta.tipo)
+                else:
+                    criador = CriadorDataFrame(
+                        funcao_conexao, consulta.conexao, texto_consulta, consulta.tipo,
+                        cache=obter_cache_padrao(),
+                        ttl_cache=consulta.ttl_cache,
+                        modo_cache=modo_cache
+                    )
+
+                df = criador.executar()
+                if snapshot is not None:
+                    snapshot.gravar(nome_original, impressao, df, parametros)
 
             fim = time.perf_counter()
             tempo = fim - inicio
@@ -150,41 +292,191 @@ def selecionar_consulta_por_nome(titulo: Union[str, List[str]]) -> Dict[str, pd.
             # Substituído print() por logger.info()
             logger.info(f"Resultado da consulta '{nome_original}':\n{df.head()}")
 
-            resultados[nome_original] = df
+            etapa.saida(df)
+            return df
 
         except Exception as e:
             logger.error(f"❌ Erro na consulta '{nome_original}': {str(e)}")
-            
-            resultados[nome_original] = pd.DataFrame()
 
+            return pd.DataFrame()
+
+
+def selecionar_consulta_por_nome(
+    titulo: Union[str, List[str]],
+    paralelo: bool = False,
+    max_workers: Optional[int] = None,
+    modo_cache: Optional[str] = None,
+    parametros: Optional[Dict[str, Any]] = None,
+    parametros_por_consulta: Optional[Dict[str, Dict[str, Any]]] = None,
+    snapshot: Optional[SnapshotFontes] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Executa uma ou mais consultas pelo nome lógico definido no dicionário `consultas`.
+    Aceita:
+        - String com nomes separados por vírgula
+        - Lista de strings
+
+    No modo paralelo, as consultas são disparadas simultaneamente em um pool de
+    threads. Como cada consulta passa a maior parte do tempo aguardando o servidor
+    (OLAP, HubDados, FINANCA), o tempo total fica próximo ao da consulta mais lenta.
+
+    Args:
+        titulo (str ou list): Nome(s) da(s) consulta(s) a ser(em) executada(s).
+        paralelo (bool, optional): Se True, executa as consultas concorrentemente.
+                                   Default é False (execução sequencial).
+        max_workers (int, optional): Número máximo de consultas simultâneas no modo
+                                     paralelo. Default é MAX_CONSULTAS_PARALELAS
+                                     (variável de ambiente CONSULTAS_PARALELAS).
+        modo_cache (str, optional): Uso do cache em disco de resultados: 'usar',
+                                    'atualizar' (força a reexecução e regrava) ou
+                                    'ignorar'. Default é None (sem cache).
+        parametros (dict, optional): Parâmetros de template comuns a todas as consultas
+                                     (ex: {"ano": 2025}). Ver PARAMETROS_CONSULTA.
+        parametros_por_consulta (dict, optional): Parâmetros específicos por nome de
+                                                  consulta, que sobrescrevem os comuns.
+        snapshot (SnapshotFontes, optional): Snapshot das fontes, para gravar os resultados
+                                             (modo 'gravar') ou reproduzi-los sem acessar
+                                             os servidores (modo 'reproduzir').
+
+    Returns:
+        Dict[str, DataFrame]: Dicionário com as chaves originais (nomes das consultas)
+                              e os DataFrames resultantes, na ordem solicitada.
+    """
+    if isinstance(titulo, str):
+        nomes = [t.strip() for t in titulo.split(",")]
+    elif isinstance(titulo, list):
+        nomes = [t.strip() for t in titulo]
+    else:
+        raise ValueError("O parâmetro 'titulo' deve ser uma string ou uma lista de strings.")
+
+    parametros_por_consulta = parametros_por_consulta or {}
+    parametros_de = {
+        nome: {**(parametros or {}), **parametros_por_consulta.get(nome, {})}
+        for nome in nomes
+    }
+
+    if not paralelo or len(nomes) <= 1:
+        return {nome: _executar_consulta(nome, modo_cache, parametros_de[nome], snapshot) for nome in nomes}
+
+    workers = max_workers or MAX_CONSULTAS_PARALELAS
+    workers = max(1, min(workers, len(nomes)))
+    logger.info(f"🔀 Executando {len(nomes)} consultas em paralelo ({workers} workers)...")
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="consulta") as executor:
+        futuros = {nome: executor.submit(_executar_consulta, nome, modo_cache, parametros_de[nome], snapshot) for nome in nomes}
+        # Preserva a ordem solicitada, independentemente da ordem de término
+        resultados = {nome: futuro.result() for nome, futuro in futuros.items()}
+
+    logger.info(f"✅ {len(nomes)} consultas paralelas finalizadas em {time.perf_counter() - inicio:.2f} segundos.")
     return resultados
 
 
-def salvar_no_financa(df: pd.DataFrame, table_name: str):
+def carregar_fechamento_agregado(
+    nome: str = "FatoFechamento",
+    tamanho_bloco: Optional[int] = None,
+    parametros: Optional[Dict[str, Any]] = None,
+    snapshot: Optional[SnapshotFontes] = None
+) -> AgregadorFechamento:
+    """
+    Lê a consulta de fechamento em blocos e a consolida em totais por
+    ano, mês e CC, sem manter a tabela fato completa em memória.
+
+    Args:
+        nome (str): Nome lógico da consulta de fechamento. Default é "FatoFechamento".
+        tamanho_bloco (int, optional): Linhas por bloco. Default é TAMANHO_BLOCO_FECHAMENTO
+                                       (variável de ambiente TAMANHO_BLOCO_FECHAMENTO).
+        parametros (dict, optional): Parâmetros do template da consulta (ex: ano, mes_fim).
+        snapshot (SnapshotFontes, optional): Snapshot das fontes. Os blocos são gravados
+                                             nele à medida que são lidos ('gravar') ou
+                                             lidos dele em vez do servidor ('reproduzir').
+
+    Returns:
+        AgregadorFechamento: Agregador com os totais de despesa por ano/mês/CC.
+    """
+    tamanho_bloco = tamanho_bloco or TAMANHO_BLOCO_FECHAMENTO
+    consulta = _resolver_consulta(nome)
+
+    inicio = time.perf_counter()
+    logger.info(f"⛔️ Iniciando leitura em blocos da consulta '{nome}' ({tamanho_bloco} linhas por bloco)")
+
+    texto_consulta = consulta.renderizar(**(parametros or {}))
+    impressao = impressao_consulta(consulta.conexao, consulta.tipo, texto_consulta)
+    if snapshot is not None and snapshot.reproduzindo:
+        blocos = snapshot.ler_blocos(nome, tamanho_bloco, impressao)
+    else:
+        criador = CriadorDataFrame(funcao_conexao, consulta.conexao, texto_consulta, consulta.tipo)
+        blocos = criador.executar_em_blocos(tamanho_bloco)
+        if snapshot is not None:
+            blocos = snapshot.gravar_blocos(nome, impressao, blocos, parametros)
+
+    with obter_instrumentacao().etapa("consulta_em_blocos", consulta=nome) as etapa:
+        agregador = AgregadorFechamento().consumir(blocos)
+        etapa.valores["linhas_saida"] = agregador.linhas_lidas
+
+    tempo = time.perf_counter() - inicio
+    logger.info(f"✅ Consulta '{nome}' agregada em {tempo:.2f} segundos.")
+    logger.info(f"📊 Linhas lidas: {agregador.linhas_lidas}")
+    return agregador
+
+
+def salvar_no_financa(
+    df: pd.DataFrame,
+    table_name: str,
+    modo: str = "atomico",
+    tamanho_bloco: Optional[int] = None,
+    tipos_colunas: Optional[Dict[str, Any]] = None,
+    chaves: Optional[List[str]] = None
+):
     """
     Salva um DataFrame no SQL Server 'SPSVSQL39', banco 'FINANCA'.
 
+    Modos disponíveis:
+        - "atomico" (padrão): carga em massa em uma tabela de staging, trocada
+          pela tabela de destino em uma única transação.
+        - "substituir": DROP/CREATE direto na tabela de destino via to_sql.
+        - "upsert": envia apenas as linhas inseridas, alteradas ou removidas desde
+          a última publicação, detectadas por um hash de conteúdo por linha.
+
     Args:
         df (pd.DataFrame): O DataFrame a ser salvo.
         table_name (str): O nome da tabela no banco de dados.
+        modo (str, optional): Modo de gravação. Default é "atomico".
+        tamanho_bloco (int, optional): Linhas por lote de INSERT. Default é TAMANHO_BLOCO_ESCRITA.
+        tipos_colunas (dict, optional): Tipos SQLAlchemy explícitos por coluna.
+        chaves (list, optional): Chave de negócio do modo "upsert". Default são as
+                                 colunas de CHAVES_NEGOCIO presentes no DataFrame.
     """
     if df.empty:
         logger.warning(f"⚠️ DataFrame está vazio. Nada será salvo na tabela '{table_name}'.")
         return
 
+    if modo not in MODOS_ESCRITA:
+        raise ValueError(f"Modo de escrita '{modo}' inválido. Use um de {MODOS_ESCRITA}.")
+
     try:
-        logger.info(f"📀 Iniciando salvamento na tabela '{table_name}'...")
+        logger.info(f"📀 Iniciando salvamento na tabela '{table_name}' (modo '{modo}')...")
         inicio = time.perf_counter()
 
-        # A função funcao_conexao já é local a este módulo
-        engine = funcao_conexao("SPSVSQL39_FINANCA") # Usando o nome completo para clareza
-        df.to_sql(name=table_name, con=engine, if_exists="replace", index=False)
+        # A conexão vem do pool da engine registrada e é devolvida ao final
+        with conexao_pool("SPSVSQL39_FINANCA") as conexao:
+            if modo == "atomico":
+                carregar_com_troca_atomica(conexao, df, table_name, tamanho_bloco, tipos_colunas)
+            elif modo == "upsert":
+                chaves = chaves or [c for c in CHAVES_NEGOCIO if c in df.columns]
+                contagens = publicar_incremental(conexao, df, table_name, chaves, tamanho_bloco, tipos_colunas)
+                logger.info(f"🔁 Publicação incremental em '{table_name}': {contagens}")
+            else:
+                df.to_sql(
+                    name=table_name, con=conexao, if_exists="replace", index=False,
+                    chunksize=tamanho_bloco, dtype=tipos_colunas
+                )
+                conexao.commit()
 
         fim = time.perf_counter()
         tempo = fim - inicio
 
-        logger.info(f"✅ Salvamento concluído na tabela '{table_name}' em {tempo:.2f} segundos.")
+        logger.info(f"✅ Salvamento concluído na tabela '{table_name}' em {tempo:.2f} segundos ({len(df)} linhas).")
     except Exception as e:
         logger.error(f"❌ Erro ao salvar no SQL: {str(e)}")
         
-
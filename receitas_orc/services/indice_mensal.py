@@ -0,0 +1,134 @@
+"""
+indice_mensal.py
+
+Este módulo contém a chave de mês pré-calculada da coluna FotografiaPPA.
+A legenda do membro PPA (ex: '31/Jan') é interpretada uma única vez por
+valor distinto, gerando as colunas inteiras MES_PPA e DATA_FOTOGRAFIA, e o
+IndiceMensal ordena as linhas por mês para que cada filtro seja um simples
+fatiamento, em vez de uma busca textual sobre todas as linhas.
+"""
+
+import logging
+import re
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from receitas_orc.utils.copia_sob_escrita import copia_defensiva
+
+logger = logging.getLogger(__name__)
+
+MESES_ABREVIADOS = {
+    'jan': 1, 'fev': 2, 'mar': 3, 'abr': 4, 'mai': 5, 'jun': 6,
+    'jul': 7, 'ago': 8, 'set': 9, 'out': 10, 'nov': 11, 'dez': 12
+}
+COLUNA_MES = 'MES_PPA'
+COLUNA_DATA_FOTOGRAFIA = 'DATA_FOTOGRAFIA'
+
+# 'dd/Mmm' com ano opcional ('dd/Mmm/aaaa'); o dia é opcional para legendas só com '/Mmm'
+_PADRAO_FOTOGRAFIA = re.compile(
+    r"(?:(\d{1,2}))?/(" + "|".join(MESES_ABREVIADOS) + r")(?:/(\d{4}))?",
+    re.IGNORECASE
+)
+
+
+def interpretar_fotografia(legenda, ano_padrao: Optional[int] = None) -> tuple:
+    """
+    Interpreta uma legenda de fotografia PPA.
+
+    Args:
+        legenda: Legenda do membro (ex: '31/Jan' ou '31/Jan/2025').
+        ano_padrao (int, opcional): Ano usado na data quando a legenda não traz o ano.
+
+    Returns:
+        tuple: (mês, data da fotografia). O mês é 0 e a data é NaT quando a
+               legenda não contém um mês reconhecível.
+    """
+    correspondencia = _PADRAO_FOTOGRAFIA.search(str(legenda)) if pd.notna(legenda) else None
+    if correspondencia is None:
+        return 0, pd.NaT
+
+    dia, mes_str, ano = correspondencia.groups()
+    mes = MESES_ABREVIADOS[mes_str.lower()]
+    ano = int(ano) if ano else ano_padrao
+    if dia is None or ano is None:
+        return mes, pd.NaT
+    try:
+        return mes, pd.Timestamp(year=ano, month=mes, day=int(dia))
+    except ValueError:
+        return mes, pd.NaT
+
+
+def adicionar_chave_mes(
+    df: pd.DataFrame,
+    coluna_fotografia: str = 'FotografiaPPA',
+    ano_padrao: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Acrescenta as colunas MES_PPA (int8, 0 quando não reconhecido) e
+    DATA_FOTOGRAFIA, interpretando cada legenda distinta uma única vez.
+
+    Args:
+        df (pd.DataFrame): DataFrame com a coluna de fotografia PPA.
+        coluna_fotografia (str): Nome da coluna com a legenda.
+        ano_padrao (int, opcional): Ano usado na data quando a legenda não traz o ano.
+
+    Returns:
+        pd.DataFrame: Novo DataFrame com as colunas de chave de mês.
+    """
+    if df is None or coluna_fotografia not in df.columns:
+        return df
+
+    codigos, legendas = pd.factorize(df[coluna_fotografia])
+    interpretadas = [interpretar_fotografia(legenda, ano_padrao) for legenda in legendas]
+
+    # A última posição atende o código -1 (legendas nulas)
+    meses = np.array([mes for mes, _ in interpretadas] + [0], dtype=np.int8)
+    datas = pd.DatetimeIndex([data for _, data in interpretadas] + [pd.NaT])
+
+    logger.debug(f"Chave de mês calculada para {len(legendas)} legendas distintas em {len(df)} linhas.")
+    return df.assign(**{
+        COLUNA_MES: meses[codigos],
+        COLUNA_DATA_FOTOGRAFIA: datas[codigos],
+    })
+
+
+class IndiceMensal:
+    """
+    DataFrame ordenado (de forma estável) pela chave de mês, com os limites
+    de cada mês pré-calculados. `fatia(mes)` custa O(k), onde k é o número
+    de linhas do mês, e preserva a ordem original das linhas.
+    """
+
+    def __init__(self, df: pd.DataFrame, coluna_mes: str = COLUNA_MES):
+        """
+        Constrói o índice.
+
+        Args:
+            df (pd.DataFrame): DataFrame com a coluna de chave de mês.
+            coluna_mes (str): Nome da coluna de mês (inteira, 1 a 12).
+        """
+        meses = df[coluna_mes].to_numpy()
+        ordem = np.argsort(meses, kind='stable')
+        self.df = df.take(ordem)
+        meses_ordenados = meses[ordem]
+        self._limites = np.searchsorted(meses_ordenados, np.arange(14), side='left')
+
+    def fatia(self, mes: int) -> pd.DataFrame:
+        """
+        Retorna as linhas de um mês.
+
+        Args:
+            mes (int): Mês desejado (1 a 12).
+
+        Returns:
+            pd.DataFrame: Cópia das linhas do mês (rasa, com copy-on-write), com o índice original.
+        """
+        if not 1 <= mes <= 12:
+            return copia_defensiva(self.df.iloc[0:0])
+        return copia_defensiva(self.df.iloc[self._limites[mes]:self._limites[mes + 1]])
+
+    def meses(self) -> List[int]:
+        """Retorna os meses com pelo menos uma linha."""
+        return [mes for mes in range(1, 13) if self._limites[mes + 1] > self._limites[mes]]
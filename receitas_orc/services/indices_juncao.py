@@ -0,0 +1,168 @@
+"""
+indices_juncao.py
+
+Este módulo contém os índices de junção usados na preparação da base de
+apropriação. Em vez de refazer um merge (hash das chaves dos dois lados) e
+um `set_index(...).map(...)` a cada mês, as dimensões são indexadas uma vez
+por execução:
+
+    - (PROJETO, ACAO) -> linhas de df_cc (CC, UNIDADE...);
+    - CC -> posição inteira, para somar a despesa executada com np.bincount;
+    - PROJETO -> totais de receita do projeto no mês.
+
+Cada junção passa a ser uma busca no índice (hash) seguida de um `take`
+por posições inteiras, com custo linear no número de linhas.
+"""
+
+import logging
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def _chaves(df: pd.DataFrame, colunas: Sequence[str]) -> pd.Index:
+    """Índice (simples ou MultiIndex) com as chaves de cada linha do DataFrame."""
+    if len(colunas) == 1:
+        return pd.Index(df[colunas[0]])
+    return pd.MultiIndex.from_arrays([df[coluna] for coluna in colunas])
+
+
+def tomar_com_nulos(serie: pd.Series, posicoes: np.ndarray) -> pd.Series:
+    """`serie.take(posicoes)` em que a posição -1 gera um valor nulo (como no merge 'left')."""
+    valores = serie.array if isinstance(serie.dtype, pd.api.extensions.ExtensionDtype) else serie.to_numpy()
+    # Sem posições ausentes o tipo é preservado (inteiros não viram float)
+    valores = pd.api.extensions.take(valores, posicoes, allow_fill=bool((posicoes < 0).any()))
+    return pd.Series(valores, name=serie.name)
+
+
+class IndiceJuncao:
+    """
+    Índice de um DataFrame (lado direito de uma junção) pelas colunas-chave.
+
+    As linhas são agrupadas por chave (ordenação estável), de modo que as
+    linhas de cada chave são um intervalo contíguo, na ordem original. Chaves
+    nulas não casam com nenhuma linha.
+    """
+
+    def __init__(self, df: pd.DataFrame, chaves: Sequence[str]):
+        """
+        Constrói o índice.
+
+        Args:
+            df (pd.DataFrame): DataFrame indexado (ex: df_cc).
+            chaves (Sequence[str]): Colunas-chave (ex: ['PROJETO', 'ACAO']).
+        """
+        self.df = df.reset_index(drop=True)
+        self.chaves = list(chaves)
+        codigos, self.valores = _chaves(self.df, self.chaves).factorize()
+        self._ordem = np.argsort(codigos, kind='stable')
+        # Linhas da chave k: self._ordem[self._inicio[k]:self._inicio[k + 1]]
+        self._inicio = np.searchsorted(codigos[self._ordem], np.arange(len(self.valores) + 1), side='left')
+
+    def localizar(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Retorna, para cada linha de `df`, a posição da sua chave no índice (-1 se ausente).
+
+        Args:
+            df (pd.DataFrame): DataFrame com as colunas-chave.
+
+        Returns:
+            np.ndarray: Posições das chaves.
+        """
+        return self.valores.get_indexer(_chaves(df, self.chaves))
+
+    def juntar_esquerda(self, df_esquerda: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Equivalente a `pd.merge(df_esquerda, self.df, on=chaves, how='left')`:
+        cada linha da esquerda é repetida uma vez por linha correspondente
+        (ou mantida uma vez, com nulos, se não houver correspondência).
+
+        Args:
+            df_esquerda (pd.DataFrame): Lado esquerdo da junção.
+
+        Returns:
+            Tuple[pd.DataFrame, np.ndarray]: O resultado (com índice 0..n-1) e, para
+            cada linha do resultado, a posição da linha de origem na esquerda.
+        """
+        posicoes = self.localizar(df_esquerda)
+        encontradas = posicoes >= 0
+        chave = np.where(encontradas, posicoes, 0)
+        inicio = self._inicio[chave]
+        quantidade = np.where(encontradas, self._inicio[chave + 1] - inicio, 0)
+        repeticoes = np.maximum(quantidade, 1)
+
+        linhas_esquerda = np.repeat(np.arange(len(df_esquerda)), repeticoes)
+        # Deslocamento de cada linha do resultado dentro do grupo da sua chave
+        deslocamento = np.arange(len(linhas_esquerda)) - np.repeat(np.cumsum(repeticoes) - repeticoes, repeticoes)
+        alvo = np.repeat(inicio, repeticoes) + deslocamento
+        casadas = np.repeat(encontradas, repeticoes)
+        linhas_direita = np.full(len(linhas_esquerda), -1, dtype=np.intp)
+        linhas_direita[casadas] = self._ordem[alvo[casadas]]
+
+        esquerda = df_esquerda.take(linhas_esquerda).reset_index(drop=True)
+        direita = {
+            coluna: tomar_com_nulos(self.df[coluna], linhas_direita)
+            for coluna in self.df.columns if coluna not in self.chaves
+        }
+        return pd.concat([esquerda, pd.DataFrame(direita)], axis=1), linhas_esquerda
+
+
+class IndicesJuncao:
+    """
+    Índices das dimensões de uma execução, construídos uma vez a partir de
+    df_cc e reutilizados por todos os meses processados.
+    """
+
+    def __init__(self, df_cc: pd.DataFrame):
+        """
+        Args:
+            df_cc (pd.DataFrame): Cadastro de centros de custo (PROJETO, ACAO, CC, UNIDADE...).
+        """
+        self.cc_por_projeto_acao = IndiceJuncao(df_cc, ['PROJETO', 'ACAO'])
+        self.cc = pd.Index(pd.unique(df_cc['CC'].dropna().astype(object)))
+        # Posições por código, para colunas CC categóricas (uma tabela por dtype)
+        self._posicoes_por_dtype: Dict[pd.CategoricalDtype, np.ndarray] = {}
+        logger.debug(
+            f"Índices de junção: {len(self.cc_por_projeto_acao.valores)} pares PROJETO/ACAO, {len(self.cc)} CCs."
+        )
+
+    def posicoes_cc(self, ccs: pd.Series) -> np.ndarray:
+        """
+        Retorna a posição de cada CC no índice de CCs (-1 se ausente ou nulo).
+        Para CCs categóricos, a busca é feita uma vez por categoria.
+
+        Args:
+            ccs (pd.Series): Coluna de CC (categórica ou não).
+
+        Returns:
+            np.ndarray: Posições inteiras.
+        """
+        if isinstance(ccs.dtype, pd.CategoricalDtype):
+            if ccs.dtype not in self._posicoes_por_dtype:
+                # A última posição (-1) atende o código -1 das chaves nulas
+                por_codigo = self.cc.get_indexer(ccs.dtype.categories.astype(object))
+                self._posicoes_por_dtype[ccs.dtype] = np.append(por_codigo, -1)
+            return self._posicoes_por_dtype[ccs.dtype][ccs.cat.codes.to_numpy()]
+        return self.cc.get_indexer(ccs.astype(object))
+
+    def somar_por_cc(self, df: pd.DataFrame, coluna_valor: str = 'VALOR') -> np.ndarray:
+        """
+        Soma os valores por CC do índice (CCs fora do cadastro são ignorados).
+
+        Args:
+            df (pd.DataFrame): DataFrame com as colunas CC e `coluna_valor` (ex: fechamento do mês).
+            coluna_valor (str): Coluna somada.
+
+        Returns:
+            np.ndarray: Total por posição de CC (zero para CCs sem lançamentos).
+        """
+        if df is None or df.empty or 'CC' not in df.columns:
+            return np.zeros(len(self.cc))
+        posicoes = self.posicoes_cc(df['CC'])
+        validas = posicoes >= 0
+        valores = df[coluna_valor].to_numpy(dtype=np.float64, na_value=0.0)
+        return np.bincount(posicoes[validas], weights=valores[validas], minlength=len(self.cc))
+
@@ -0,0 +1,106 @@
+"""
+kernels_projeto.py
+
+Este módulo contém os kernels NumPy da preparação da base de apropriação.
+Todos trabalham sobre o código inteiro do projeto de cada linha (pd.factorize,
+calculado uma única vez; -1 para projeto nulo):
+
+    - somas por projeto de várias colunas em uma única chamada de np.bincount
+      (soma segmentada, sem ordenar as linhas);
+    - difusão dos totais de volta às linhas pelo próprio array de códigos;
+    - linha-alvo de cada projeto e máscara aplicada a um bloco 2-D de colunas
+      em uma única operação.
+"""
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def somar_por_projeto(codigos: np.ndarray, n_projetos: int, valores: np.ndarray) -> np.ndarray:
+    """
+    Soma segmentada por projeto de uma ou mais colunas.
+
+    Linhas com código -1 são ignoradas e valores nulos contam como zero.
+
+    Args:
+        codigos (np.ndarray): Código do projeto de cada linha.
+        n_projetos (int): Número de projetos (códigos válidos são 0..n_projetos-1).
+        valores (np.ndarray): Valores por linha, 1-D (uma coluna) ou 2-D (linhas x colunas).
+
+    Returns:
+        np.ndarray: Totais de forma (n_projetos, colunas).
+    """
+    valores = np.nan_to_num(np.asarray(valores, dtype=np.float64))
+    if valores.ndim == 1:
+        valores = valores[:, np.newaxis]
+    n_colunas = valores.shape[1]
+    validas = codigos >= 0
+    # Um único bincount: a célula (projeto, coluna) vira o índice projeto * colunas + coluna
+    posicoes = (codigos[validas, np.newaxis] * n_colunas + np.arange(n_colunas)).ravel()
+    totais = np.bincount(posicoes, weights=valores[validas].ravel(), minlength=n_projetos * n_colunas)
+    return totais.reshape(n_projetos, n_colunas)
+
+
+def difundir(por_projeto: np.ndarray, codigos: np.ndarray) -> np.ndarray:
+    """
+    Leva os valores de cada projeto às suas linhas.
+
+    Args:
+        por_projeto (np.ndarray): Valores por projeto, 1-D ou 2-D (projetos x colunas).
+        codigos (np.ndarray): Código do projeto de cada linha.
+
+    Returns:
+        np.ndarray: Valores por linha (NaN nas linhas de projeto nulo).
+    """
+    # A última posição (NaN) atende o código -1 dos projetos nulos
+    nulo = np.full((1,) + por_projeto.shape[1:], np.nan)
+    return np.concatenate([np.asarray(por_projeto, dtype=np.float64), nulo])[codigos]
+
+
+def primeira_linha_por_projeto(codigos: np.ndarray) -> np.ndarray:
+    """
+    Marca a primeira linha de cada projeto (os nulos contam como um projeto),
+    como `~df.duplicated(subset=['PROJETO'])`.
+    """
+    primeiras = np.zeros(len(codigos), dtype=bool)
+    primeiras[np.unique(codigos, return_index=True)[1]] = True
+    return primeiras
+
+
+def linhas_alvo(codigos: np.ndarray, projetos: Sequence, especiais: dict, unidades: pd.Series) -> np.ndarray:
+    """
+    Linha-alvo de cada projeto: a primeira linha ou, para os projetos com
+    regra especial, as linhas da unidade indicada.
+
+    Args:
+        codigos (np.ndarray): Código do projeto de cada linha.
+        projetos (Sequence): Projetos distintos (valor de cada código).
+        especiais (dict): Projeto -> unidade que recebe os valores do projeto.
+        unidades (pd.Series): Coluna UNIDADE.
+
+    Returns:
+        np.ndarray: Máscara booleana das linhas-alvo.
+    """
+    alvo = primeira_linha_por_projeto(codigos)
+    nomes = np.asarray(projetos, dtype=object)
+    for projeto, unidade in especiais.items():
+        # Comparação por projeto distinto, não por linha; o código -1 cai na última posição (False)
+        do_projeto = np.append(nomes == projeto, False)[codigos]
+        alvo = np.where(do_projeto, (unidades == unidade).to_numpy(dtype=bool, na_value=False), alvo)
+    return alvo
+
+
+def mascarar(valores: np.ndarray, alvo: np.ndarray) -> np.ndarray:
+    """
+    Zera, em todas as colunas de uma vez, os valores fora das linhas-alvo.
+
+    Args:
+        valores (np.ndarray): Bloco 2-D (linhas x colunas).
+        alvo (np.ndarray): Máscara booleana das linhas mantidas.
+
+    Returns:
+        np.ndarray: O bloco mascarado.
+    """
+    return np.where(alvo[:, np.newaxis], valores, 0)
@@ -12,11 +12,18 @@ import numpy as np
 import pandas as pd
 
 # Supondo que as classes de estratégia estejam neste caminho
+from receitas_orc.services.indice_mensal import COLUNA_MES, IndiceMensal
+from receitas_orc.services.indices_juncao import IndiceJuncao, IndicesJuncao, tomar_com_nulos
+from receitas_orc.services.kernels_projeto import difundir, linhas_alvo, mascarar, somar_por_projeto
+from receitas_orc.services.receitas_natureza import NATUREZAS_MATERIALIZADAS, resumir_receitas, totais_por_projeto
 from receitas_orc.strategies.base_strategy import BaseApropriacaoStrategy
 from receitas_orc.strategies.csn_strategy import CSNStrategy
 from receitas_orc.strategies.csnTotal_strategy import CSNtotalStrategy
 from receitas_orc.strategies.convenio_strategy import ConvenioStrategy
 from receitas_orc.strategies.padrao_strategy import PadraoStrategy
+from receitas_orc.utils.artefatos_debug import registrar_artefato
+from receitas_orc.utils.copia_sob_escrita import copia_defensiva
+from receitas_orc.utils.instrumentacao import instrumentar
 
 # Configuração do Logger
 logger = logging.getLogger(__name__)
@@ -32,6 +39,11 @@ STRATEGY_MAP: Dict[str, BaseApropriacaoStrategy] = {
 }
 DEFAULT_STRATEGY: BaseApropriacaoStrategy = PadraoStrategy()
 
+# Projetos cujos totais ficam na linha da unidade indicada (e não na primeira linha do projeto)
+UNIDADE_ALVO_POR_PROJETO: Dict[str, str] = {
+    'Suporte a Negócios - Remuneração de Recursos Humanos Relacionado a Negócios': 'SP - Atendimento ao Cliente',
+}
+
 FINAL_COLUMN_ORDER: List[str] = [
     'PROJETO', 'ACAO', 'CC', 'FotografiaPPA', 'TipoRegra', 'Despesa_Orcada',
     'Total_Receita_Orcada', 'Despesa_Realizada_Mes', 'Total_Apropriado_Mes',
@@ -63,18 +75,30 @@ def filtrar_por_mes_string(df: pd.DataFrame, mes_input: int, nome_df: str, colun
         return pd.DataFrame(columns=df.columns)
     
     logger.info(f"Filtrando '{nome_df}' pela coluna '{coluna_data}' para o mês: {mes_str}")
-    filtro = df[coluna_data].astype(str).str.contains(f"/{mes_str}", case=False, na=False)
-    df_filtrado = df[filtro].copy()
+    if COLUNA_MES in df.columns:
+        # Chave de mês já calculada na carga: comparação inteira, sem busca textual
+        filtro = df[COLUNA_MES] == mes_input
+    else:
+        filtro = df[coluna_data].astype(str).str.contains(f"/{mes_str}", case=False, na=False)
+    df_filtrado = copia_defensiva(df[filtro])
     if df_filtrado.empty:
         logger.warning(f"Nenhum dado encontrado para o mês '{mes_str}' em '{nome_df}'.")
     return df_filtrado
 
+def filtrar_por_mes_indexado(indice: IndiceMensal, mes_input: int, nome_df: str) -> pd.DataFrame:
+    """Retorna as linhas de um mês a partir de um IndiceMensal (fatiamento O(k))."""
+    logger.info(f"Filtrando '{nome_df}' pelo índice mensal para o mês: {mes_input}")
+    df_filtrado = indice.fatia(mes_input)
+    if df_filtrado.empty:
+        logger.warning(f"Nenhum dado encontrado para o mês '{mes_input}' em '{nome_df}'.")
+    return df_filtrado
+
 def filtrar_por_mes_datetime(df: pd.DataFrame, mes_input: int, nome_df: str, coluna_data: str) -> pd.DataFrame:
     """Filtra um DataFrame convertendo a coluna de data para datetime."""
     logger.info(f"Filtrando '{nome_df}' pela coluna '{coluna_data}' para o mês: {mes_input}")
-    df_temp = df.copy()
+    df_temp = copia_defensiva(df)
     df_temp[coluna_data] = pd.to_datetime(df_temp[coluna_data], errors='coerce')
-    df_temp.dropna(subset=[coluna_data], inplace=True)
+    df_temp = df_temp.dropna(subset=[coluna_data])
     
     filtro = df_temp[coluna_data].dt.month == mes_input
     df_filtrado = df_temp[filtro]
@@ -84,6 +108,7 @@ def filtrar_por_mes_datetime(df: pd.DataFrame, mes_input: int, nome_df: str, col
 
 # --- Funções Auxiliares da Orquestração ---
 
+@instrumentar("preparar_dados_base")
 def _preparar_dados_base(
     df_receitas_classificadas: pd.DataFrame,
     df_despesas_classificadas: pd.DataFrame,
@@ -91,96 +116,100 @@ def _preparar_dados_base(
     df_fechamento_do_mes: pd.DataFrame,
     df_exec_receitasAnual_do_mes: pd.DataFrame,
     df_plan_receitasDespesas_SME: pd.DataFrame,
-    df_fechamento_anual: pd.DataFrame
+    df_fechamento_anual: pd.DataFrame,
+    indices_juncao: Optional[IndicesJuncao] = None,
+    receitas_longas: Optional[pd.DataFrame] = None
 ) -> tuple[pd.DataFrame, list[str]]:
-    """Prepara, agrega e une todos os DataFrames de entrada em uma base única para análise."""
+    """
+    Prepara, agrega e une todos os DataFrames de entrada em uma base única para análise.
+
+    As junções com df_cc (por PROJETO/ACAO e por CC) usam `indices_juncao`,
+    construído uma vez por execução; se omitido, é construído a partir de df_cc.
+    As receitas do mês chegam em formato longo (`receitas_longas`, ver
+    receitas_natureza.resumir_receitas); se omitidas, são resumidas aqui.
+    """
     logger.info("--- Etapa 1: Preparando dados comuns para todas as estratégias ---")
 
-    # CORREÇÃO: Usar o DataFrame de receitas ('df_receitas_classificadas') para o pivot.
-    # Ele contém os detalhes necessários por 'DESCNVL4'.
-    logger.info("1. Pivotando receitas para obter totais por fonte...")
-    df_receitas_pivot = pd.pivot_table(
-        df_receitas_classificadas,
-        values='VALOR_RECEITA_AJUSTADO', 
-        index='PROJETO',
-        columns='DESCNVL4', 
-        aggfunc='sum', 
-        fill_value=0
-    )
-    colunas_para_somar = df_receitas_pivot.columns.drop('Total_Receita_Orcada', errors='ignore') # 'errors=ignore' evita erro se a coluna não existir
-    
-    df_receitas_pivot['Soma_Total'] = df_receitas_pivot[colunas_para_somar].sum(axis=1)
-    print(df_receitas_pivot.info)
-    ##df_receitas_pivot.to_excel('resultado_final_v1.xlsx', sheet_name='Resultado', index=False)
-    
-    print(df_exec_receitasAnual_do_mes.info())
-    df_exec_receitasAnual_do_mes.to_excel('exec_receitasAnual_do_mes.xlsx', sheet_name='Resultado', index=False)
+    # As receitas ficam em formato longo (PROJETO, DESCNVL4); só as naturezas lidas
+    # pelas estratégias e pela máscara, mais a Soma_Total, viram colunas por projeto.
+    logger.info("1. Resumindo receitas por projeto e natureza...")
+    if receitas_longas is None:
+        receitas_longas = resumir_receitas(df_receitas_classificadas)
+    df_receitas_projeto = totais_por_projeto(receitas_longas)
 
+    # Artefatos de depuração: gravados em segundo plano apenas se DEBUG_ARTEFATOS=1
+    registrar_artefato('receitas_por_natureza', receitas_longas)
+    registrar_artefato('exec_receitasAnual_do_mes', df_exec_receitasAnual_do_mes)
     df_filtrado_sme = df_plan_receitasDespesas_SME[df_plan_receitasDespesas_SME['PROJETO'].isin(['ALI Rural','SP Agente Local de Inovação (ALI) - Produtividade'])]
-
-    print(df_filtrado_sme.info())
-
-    df_filtrado_sme.to_excel('plan_receitasDespesas_SME.xlsx', sheet_name='Resultado', index=False)
-
+    registrar_artefato('plan_receitasDespesas_SME', df_filtrado_sme)
 
     logger.info("2. Agregando despesas...")
-    df_despesas_agg = df_despesas_classificadas.groupby(['PROJETO', 'ACAO', 'TipoRegra']).agg(
+    df_despesas_agg = df_despesas_classificadas.groupby(['PROJETO', 'ACAO', 'TipoRegra'], observed=True).agg(
         VALOR_DESPESA_AJUSTADO=('VALOR_DESPESA_AJUSTADO', 'sum'),
         FotografiaPPA=('FotografiaPPA', 'first')
     ).reset_index()
 
-    df_despesas_agg['TOTAL_DESPESA_PROJETO'] = df_despesas_agg.groupby('PROJETO')['VALOR_DESPESA_AJUSTADO'].transform('sum')
-
-    df_base = pd.merge(df_despesas_agg, df_cc, on=['PROJETO', 'ACAO'], how='left')
-    df_final = pd.merge(df_base, df_receitas_pivot.reset_index(), on='PROJETO', how='left')
-
-    df_final['Coeficiente_DespesaReceita'] = df_final['Soma_Total']/df_final['TOTAL_DESPESA_PROJETO']
-
-    print(df_fechamento_do_mes.info())
-    print(df_fechamento_anual.info())    
-
-    df_despesas_mensais  = df_fechamento_do_mes.groupby('CC').agg(
-        VALOR_DESPESA_AJUSTADO=('VALOR', 'sum')
-    ).reset_index()
-
-    df_despesas_anual  = df_fechamento_anual.groupby('CC').agg(
-        VALOR_DESPESA_AJUSTADO=('VALOR', 'sum')
-    ).reset_index()
+    # Códigos de PROJETO calculados uma única vez: todas as somas por projeto
+    # (despesa orçada e executada) são kernels sobre eles, sem groupby
+    codigos_projeto, projetos = pd.factorize(df_despesas_agg['PROJETO'])
+    despesa_por_projeto = somar_por_projeto(
+        codigos_projeto, len(projetos), df_despesas_agg['VALOR_DESPESA_AJUSTADO'].to_numpy(dtype=np.float64)
+    )[:, 0]
+    df_despesas_agg['TOTAL_DESPESA_PROJETO'] = difundir(despesa_por_projeto, codigos_projeto)
+
+    if indices_juncao is None:
+        indices_juncao = IndicesJuncao(df_cc)
+    colunas_despesa = set(df_despesas_agg.columns)
+    colunas_cc = set(indices_juncao.cc_por_projeto_acao.df.columns) - {'PROJETO', 'ACAO'}
+    colunas_receita = set(df_receitas_projeto.columns) - {'PROJETO'}
+    if not (colunas_despesa & colunas_cc) and not ((colunas_despesa | colunas_cc) & colunas_receita):
+        # (PROJETO, ACAO) -> CC pelo índice pré-construído; PROJETO -> totais de receita do projeto
+        df_final, linhas_agregado = indices_juncao.cc_por_projeto_acao.juntar_esquerda(df_despesas_agg)
+        codigos_final = codigos_projeto[linhas_agregado]
+        receita_por_projeto = IndiceJuncao(df_receitas_projeto, ['PROJETO']).localizar(
+            pd.DataFrame({'PROJETO': projetos})
+        )
+        linhas_receita = np.where(codigos_final >= 0, receita_por_projeto[codigos_final], -1)
+        df_final = pd.concat([df_final, pd.DataFrame({
+            coluna: tomar_com_nulos(df_receitas_projeto[coluna], linhas_receita)
+            for coluna in df_receitas_projeto.columns if coluna != 'PROJETO'
+        })], axis=1)
+    else:
+        # Colunas homônimas entre as fontes: o merge aplica sufixos (_x, _y)
+        df_base = pd.merge(df_despesas_agg, df_cc, on=['PROJETO', 'ACAO'], how='left')
+        df_final = pd.merge(df_base, df_receitas_projeto, on='PROJETO', how='left')
+        codigos_final, projetos = pd.factorize(df_final['PROJETO'])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df_final['Coeficiente_DespesaReceita'] = (
+            df_final['Soma_Total'].to_numpy(dtype=np.float64) / df_final['TOTAL_DESPESA_PROJETO'].to_numpy(dtype=np.float64)
+        )
 
-    df_final['TOTAL_DESPESA_EXECUTADO_MES'] = df_final['CC'].map(df_despesas_mensais.set_index('CC')['VALOR_DESPESA_AJUSTADO']).fillna(0)
-    df_final['TOTAL_DESPESA_EXECUTADO_ANO'] = df_final['CC'].map(df_despesas_anual.set_index('CC')['VALOR_DESPESA_AJUSTADO']).fillna(0)
+    registrar_artefato('fechamento_do_mes', df_fechamento_do_mes)
+    registrar_artefato('fechamento_anual', df_fechamento_anual)
 
-    df_final['TOTAL_DESPESA_EXECUTADO_MES_PROJETO'] = df_final.groupby('PROJETO')['TOTAL_DESPESA_EXECUTADO_MES'].transform('sum')
+    # Despesa executada por CC: soma direta nas posições do índice de CCs
+    posicoes_cc = indices_juncao.posicoes_cc(df_final['CC'])
+    executado = np.empty((len(df_final), 2))
+    for coluna, df_fechamento in enumerate((df_fechamento_do_mes, df_fechamento_anual)):
+        # A última posição (zero) atende os CCs ausentes do índice (posição -1)
+        executado[:, coluna] = np.append(indices_juncao.somar_por_cc(df_fechamento, 'VALOR'), 0.0)[posicoes_cc]
+    df_final['TOTAL_DESPESA_EXECUTADO_MES'] = executado[:, 0]
+    df_final['TOTAL_DESPESA_EXECUTADO_ANO'] = executado[:, 1]
 
-    df_final['TOTAL_DESPESA_EXECUTADO_ANO_PROJETO'] =df_final.groupby('PROJETO')['TOTAL_DESPESA_EXECUTADO_ANO'].transform('sum')
-    
-        
+    # Totais executados do projeto (mês e ano) em uma única soma segmentada
+    executado_projeto = difundir(somar_por_projeto(codigos_final, len(projetos), executado), codigos_final)
+    df_final['TOTAL_DESPESA_EXECUTADO_MES_PROJETO'] = executado_projeto[:, 0]
+    df_final['TOTAL_DESPESA_EXECUTADO_ANO_PROJETO'] = executado_projeto[:, 1]
 
     logger.info("3. Juntando DataFrames base...")
 
-    colunas_de_receita_a_mascarar = ['CSN Programas e Projetos Nacionais']+['Convênios, Subvenções e Auxílios']+['Empresas Beneficiadas']+['Soma_Total']+['TOTAL_DESPESA_PROJETO']+['TOTAL_DESPESA_EXECUTADO_MES_PROJETO']+['TOTAL_DESPESA_EXECUTADO_ANO_PROJETO']
-    is_first_in_project = ~df_final.duplicated(subset=['PROJETO'], keep='first')
-
-    #Definir a Regra Especial: identificar a linha específica para o projeto especial.
-    is_special_project_target_row = (df_final['PROJETO'] == 'Suporte a Negócios - Remuneração de Recursos Humanos Relacionado a Negócios') & \
-                                (df_final['UNIDADE'] == 'SP - Atendimento ao Cliente')
-    
-    #criando condicional final que combina as duas regras
-    final_target_mask = np.where(
-    df_final['PROJETO'] == 'Suporte a Negócios - Remuneração de Recursos Humanos Relacionado a Negócios', # Se for o projeto especial...
-    is_special_project_target_row,                                        # ... use a máscara da regra especial.
-    is_first_in_project                                                   # ... senão, use a máscara da regra geral.
-)
-
-    for col in colunas_de_receita_a_mascarar:
-    # Verifica se a coluna existe em df_final para evitar erros
-        if col in df_final.columns:
-            df_final[col] = np.where(
-                final_target_mask ,  # Condição: a linha é o alvo?
-                df_final[col],        # Sim: mantém o valor original
-                0                     # Não: substitui por 0
-        )
-
+    # Os valores do projeto ficam só na sua linha-alvo (zero nas demais), em uma
+    # única operação sobre o bloco de colunas
+    colunas_de_receita_a_mascarar = list(NATUREZAS_MATERIALIZADAS)+['Soma_Total']+['TOTAL_DESPESA_PROJETO']+['TOTAL_DESPESA_EXECUTADO_MES_PROJETO']+['TOTAL_DESPESA_EXECUTADO_ANO_PROJETO']
+    colunas_mascaradas = [col for col in colunas_de_receita_a_mascarar if col in df_final.columns]
+    alvo = linhas_alvo(codigos_final, projetos, UNIDADE_ALVO_POR_PROJETO, df_final['UNIDADE'])
+    df_final[colunas_mascaradas] = mascarar(df_final[colunas_mascaradas].to_numpy(dtype=np.float64), alvo)
 
     return df_final
 
@@ -190,42 +219,64 @@ def _get_strategy(tipo_regra: str) -> BaseApropriacaoStrategy:
     logger.debug(f"Para TipoRegra '{tipo_regra}', estratégia selecionada: {strategy.__class__.__name__}")
     return strategy
 
+@instrumentar("executar_estrategias")
 def _executar_estrategias(df_preparado: pd.DataFrame) -> pd.DataFrame:
-    """Aplica a estratégia de apropriação correta para cada grupo de projeto."""
+    """
+    Aplica a estratégia de apropriação correta para cada grupo de projeto.
+
+    Em vez de filtrar e copiar um subconjunto por TipoRegra, o TipoRegra é
+    convertido uma única vez em um array de códigos de estratégia. Cada
+    estratégia avalia suas expressões sobre o DataFrame inteiro e os valores são
+    gravados, por máscara, em colunas de saída pré-alocadas. O resultado mantém
+    a mesma ordem de linhas e colunas da abordagem por subconjuntos + concat.
+    """
     logger.info("--- Etapa 2: Mapeando e executando a estratégia correta para cada projeto ---")
     if df_preparado.empty:
         logger.warning("DataFrame preparado está vazio. Pulando execução das estratégias.")
         return pd.DataFrame()
-        
-    resultados = []
 
-    # 1. Itere sobre cada 'TipoRegra' única presente no DataFrame.
-    for tipo_regra in df_preparado['TipoRegra'].unique():
-    
-    # 2. Obtenha a estratégia correspondente para esta regra.
-        strategy = _get_strategy(tipo_regra)
-    
-    # 3. Crie um sub-DataFrame contendo todas as linhas (de múltiplos projetos) que usam esta regra.
-        df_subset_por_regra = df_preparado[df_preparado['TipoRegra'] == tipo_regra]
-    
-    # 4. Aplique a estratégia a este sub-DataFrame de uma só vez.
-    #    
-        resultado_subset = strategy.apropriar(df_subset_por_regra.copy())
-    
-    # 5. Adicione o resultado processado à lista.
-        resultados.append(resultado_subset)
-
-    # O restante do código, que concatena os resultados, permanece o mesmo.
-    # df_com_resultados = pd.concat(resultados, ignore_index=True)
-        
-    if not resultados:
-        logger.warning("Nenhum resultado gerado após a aplicação das estratégias.")
-        return pd.DataFrame()
+    # 1. Códigos de TipoRegra na ordem de primeira aparição (mesma ordem de .unique())
+    codigos_regra, tipos_regra = pd.factorize(df_preparado['TipoRegra'])
 
-    df_com_resultados = pd.concat(resultados, ignore_index=True)
+    # 2. Mapeia cada TipoRegra para o índice da sua estratégia (instâncias distintas)
+    estrategias: List[BaseApropriacaoStrategy] = []
+    indice_por_estrategia: Dict[int, int] = {}
+    indice_por_regra = np.empty(len(tipos_regra), dtype=np.intp)
+    for posicao, tipo_regra in enumerate(tipos_regra):
+        strategy = _get_strategy(tipo_regra)
+        if id(strategy) not in indice_por_estrategia:
+            indice_por_estrategia[id(strategy)] = len(estrategias)
+            estrategias.append(strategy)
+        indice_por_regra[posicao] = indice_por_estrategia[id(strategy)]
+
+    # Linhas sem TipoRegra (nulo) não pertencem a nenhuma regra e ficam de fora
+    validas = codigos_regra >= 0
+    codigos_estrategia = np.full(len(df_preparado), -1, dtype=np.intp)
+    codigos_estrategia[validas] = indice_por_regra[codigos_regra[validas]]
+
+    # 3. Avalia todas as estratégias, gravando por máscara nas saídas pré-alocadas
+    n_linhas = len(df_preparado)
+    saidas: Dict[str, np.ndarray] = {}
+    for indice, strategy in enumerate(estrategias):
+        mascara = codigos_estrategia == indice
+        for coluna, valores in strategy.colunas_saida(df_preparado).items():
+            destino = saidas.get(coluna)
+            if destino is None:
+                destino = saidas[coluna] = np.full(n_linhas, np.nan)
+            valores = np.broadcast_to(np.asarray(valores, dtype=np.float64), (n_linhas,))
+            np.copyto(destino, valores, where=mascara)
+
+    # 4. Agrupa as linhas por TipoRegra, na ordem de primeira aparição
+    ordem = np.argsort(codigos_regra, kind='stable')[np.count_nonzero(~validas):]
+    df_com_resultados = df_preparado.take(ordem).reset_index(drop=True)
+    for coluna, valores in saidas.items():
+        df_com_resultados[coluna] = valores[ordem]
+
+    registrar_artefato('resultado_estrategias', df_com_resultados)
     logger.info("Etapa 2 concluída: Estratégias aplicadas.")
     return df_com_resultados
 
+@instrumentar("finalizar_e_formatar")
 def _finalizar_e_formatar_dataframe(df_processado: pd.DataFrame) -> pd.DataFrame:
     """Realiza cálculos finais, limpeza visual e formatação do DataFrame de saída."""
     if df_processado.empty:
@@ -236,6 +287,7 @@ def _finalizar_e_formatar_dataframe(df_processado: pd.DataFrame) -> pd.DataFrame
 
 
 # --- Função Principal de Orquestração ---
+@instrumentar("aplicar_estrategias_de_apropriacao")
 def aplicar_estrategias_de_apropriacao(
     df_receitas_classificadas: pd.DataFrame,
     df_despesas_classificadas: pd.DataFrame,
@@ -243,7 +295,9 @@ def aplicar_estrategias_de_apropriacao(
     df_fechamento_do_mes: pd.DataFrame,
     df_exec_receitasAnual_do_mes: pd.DataFrame,
     df_plan_receitasDespesas_SME: pd.DataFrame,
-    df_fechamento_anual: pd.DataFrame
+    df_fechamento_anual: pd.DataFrame,
+    indices_juncao: Optional[IndicesJuncao] = None,
+    receitas_longas: Optional[pd.DataFrame] = None
 ) -> pd.DataFrame:
     """Orquestra o pipeline completo de apropriação de despesas."""
     logger.info("Iniciando a orquestração da apropriação com padrão Strategy...")
@@ -256,7 +310,9 @@ def aplicar_estrategias_de_apropriacao(
         df_fechamento_do_mes,
         df_exec_receitasAnual_do_mes,
         df_plan_receitasDespesas_SME,
-        df_fechamento_anual
+        df_fechamento_anual,
+        indices_juncao,
+        receitas_longas
     )
     
     # 2. Executar estratégias
@@ -0,0 +1,121 @@
+"""
+receitas_natureza.py
+
+Este módulo contém a representação longa das receitas orçadas por natureza
+(DESCNVL4). Em vez de um pivot denso (uma coluna por natureza, quase sempre
+zero) replicado em todas as ações de cada projeto, as receitas do mês ficam
+em formato longo, uma linha por (PROJETO, natureza), e somente as naturezas
+lidas pelas estratégias e pela máscara de apropriação (NATUREZAS_MATERIALIZADAS)
+mais a Soma_Total são levadas à base de apropriação. As demais naturezas só
+viram colunas na exportação, quando o detalhamento é solicitado.
+"""
+
+import logging
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from receitas_orc.services.indices_juncao import IndiceJuncao, tomar_com_nulos
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações padrão (podem ser sobrescritas por variáveis de ambiente) ---
+# Acrescenta ao resultado exportado uma coluna por natureza de receita
+DETALHAR_RECEITAS = os.getenv("DETALHAR_RECEITAS", "0") == "1"
+
+COLUNA_NATUREZA = 'DESCNVL4'
+COLUNA_VALOR = 'VALOR_RECEITA_AJUSTADO'
+# Naturezas levadas à base de apropriação (mascaradas fora da linha-alvo de cada projeto)
+NATUREZAS_MATERIALIZADAS = (
+    'CSN Programas e Projetos Nacionais',
+    'Convênios, Subvenções e Auxílios',
+    'Empresas Beneficiadas',
+)
+# Natureza que já é um total e não entra na Soma_Total
+NATUREZA_TOTAL = 'Total_Receita_Orcada'
+
+
+def resumir_receitas(df_receitas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Soma as receitas do mês por projeto e natureza, em formato longo.
+
+    Args:
+        df_receitas (pd.DataFrame): Receitas orçadas do mês (PROJETO, DESCNVL4, VALOR_RECEITA_AJUSTADO).
+
+    Returns:
+        pd.DataFrame: Colunas PROJETO, DESCNVL4 e VALOR_RECEITA_AJUSTADO, uma linha por
+                      combinação existente, ordenadas por projeto e natureza.
+    """
+    return df_receitas.groupby(['PROJETO', COLUNA_NATUREZA], observed=True)[COLUNA_VALOR].sum().reset_index()
+
+
+def _naturezas_presentes(receitas_longas: pd.DataFrame, naturezas: Optional[Iterable[str]]) -> list:
+    """Naturezas presentes no mês, ordenadas como a coluna DESCNVL4 (categorias, se categórica)."""
+    presentes = [str(n) for n in receitas_longas[COLUNA_NATUREZA].drop_duplicates().sort_values()]
+    if naturezas is None:
+        return presentes
+    naturezas = set(naturezas)
+    return [natureza for natureza in presentes if natureza in naturezas]
+
+
+def totais_por_projeto(
+    receitas_longas: pd.DataFrame,
+    naturezas: Optional[Iterable[str]] = NATUREZAS_MATERIALIZADAS,
+    incluir_soma_total: bool = True
+) -> pd.DataFrame:
+    """
+    Materializa, por projeto, uma coluna para cada natureza pedida (zero quando
+    o projeto não tem receita naquela natureza) e, opcionalmente, a Soma_Total
+    de todas as naturezas exceto Total_Receita_Orcada.
+
+    Naturezas ausentes do mês não geram coluna.
+
+    Args:
+        receitas_longas (pd.DataFrame): Resultado de `resumir_receitas`.
+        naturezas (Iterable[str], opcional): Naturezas materializadas; None para todas.
+        incluir_soma_total (bool): Se True, acrescenta a coluna Soma_Total.
+
+    Returns:
+        pd.DataFrame: Uma linha por projeto (coluna PROJETO) com os totais pedidos.
+    """
+    codigos, projetos = pd.factorize(receitas_longas['PROJETO'], sort=True)
+    natureza = receitas_longas[COLUNA_NATUREZA]
+    valores = receitas_longas[COLUNA_VALOR].to_numpy(dtype=np.float64, na_value=0.0)
+
+    def _somar(mascara) -> np.ndarray:
+        return np.bincount(codigos, weights=np.where(mascara, valores, 0.0), minlength=len(projetos))
+
+    totais = {'PROJETO': projetos}
+    for nome in _naturezas_presentes(receitas_longas, naturezas):
+        totais[nome] = _somar((natureza == nome).to_numpy())
+    if incluir_soma_total:
+        totais['Soma_Total'] = _somar((natureza != NATUREZA_TOTAL).to_numpy())
+    return pd.DataFrame(totais)
+
+
+def detalhar_receitas(df_resultado: pd.DataFrame, receitas_longas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Alarga o resultado com uma coluna por natureza de receita ainda não
+    materializada (valor do projeto repetido em todas as suas linhas; nulo
+    para projetos sem receita orçada no mês).
+
+    Args:
+        df_resultado (pd.DataFrame): Resultado do mês (com a coluna PROJETO).
+        receitas_longas (pd.DataFrame): Resultado de `resumir_receitas` para o mesmo mês.
+
+    Returns:
+        pd.DataFrame: O resultado com as colunas de natureza acrescentadas ao final.
+    """
+    if df_resultado.empty or receitas_longas is None or receitas_longas.empty:
+        return df_resultado
+    extras = [natureza for natureza in _naturezas_presentes(receitas_longas, None) if natureza not in df_resultado.columns]
+    if not extras:
+        return df_resultado
+
+    por_projeto = totais_por_projeto(receitas_longas, extras, incluir_soma_total=False)
+    linhas = IndiceJuncao(por_projeto, ['PROJETO']).localizar(df_resultado[['PROJETO']])
+    colunas = {natureza: tomar_com_nulos(por_projeto[natureza], linhas).to_numpy() for natureza in extras}
+    logger.debug(f"Resultado detalhado com {len(extras)} naturezas de receita.")
+    return df_resultado.assign(**colunas)
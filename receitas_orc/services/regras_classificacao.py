@@ -0,0 +1,169 @@
+"""
+regras_classificacao.py
+
+Este módulo contém o motor de regras usado para classificar projetos
+(coluna TipoRegra) a partir do arquivo config/regras_classificacao.csv.
+
+O arquivo tem as colunas PROJETO, TipoRegra e Correspondencia, onde
+Correspondencia pode ser:
+    - exato: o nome do projeto (normalizado) deve ser igual ao da regra;
+    - prefixo: o nome do projeto (normalizado) deve começar pelo da regra;
+    - regex: a expressão deve casar com o nome do projeto inteiro, já
+      normalizado (minúsculas, sem acentos, vírgulas ou pontos).
+
+Precedência: exato > prefixo mais longo > primeira regex, na ordem do arquivo.
+Cada regex é compilada isoladamente, de modo que grupos numerados e
+referências como \\1 valem dentro da própria regra.
+As regras são compiladas uma única vez e recarregadas apenas quando a data
+de modificação do arquivo muda.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Pattern, Tuple
+
+import numpy as np
+import pandas as pd
+
+from receitas_orc.services.dataframe_processing import normalizar_serie, normalizar_texto
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_REGRAS = os.path.join(os.path.dirname(__file__), '..', 'config', 'regras_classificacao.csv')
+TIPOS_CORRESPONDENCIA = ("exato", "prefixo", "regex")
+REGRA_PADRAO = "Outra Regra"
+
+_FIM = object()  # Marca, em um nó da trie, que um prefixo termina ali
+
+
+class MotorRegras:
+    """
+    Conjunto compilado de regras de classificação: um dicionário para as regras
+    exatas, uma trie para os prefixos e a lista ordenada das regex compiladas.
+    """
+
+    def __init__(self, regras_df: pd.DataFrame):
+        """
+        Compila as regras.
+
+        Args:
+            regras_df (pd.DataFrame): Regras com as colunas PROJETO, TipoRegra e,
+                                      opcionalmente, Correspondencia (padrão 'exato').
+
+        Raises:
+            ValueError: Se algum tipo de correspondência for desconhecido ou uma regex for inválida.
+        """
+        self.exatas: Dict[str, str] = {}
+        self.trie: dict = {}
+        self.regexes: List[Tuple[Pattern, str]] = []
+
+        if "Correspondencia" in regras_df.columns:
+            correspondencias = regras_df["Correspondencia"].fillna("exato").str.strip().str.lower()
+        else:
+            correspondencias = pd.Series("exato", index=regras_df.index)
+
+        for projeto, tipo_regra, correspondencia in zip(regras_df["PROJETO"], regras_df["TipoRegra"], correspondencias):
+            if correspondencia not in TIPOS_CORRESPONDENCIA:
+                raise ValueError(f"Correspondência '{correspondencia}' inválida para a regra '{projeto}'.")
+
+            if correspondencia == "exato":
+                self.exatas.setdefault(normalizar_texto(projeto), tipo_regra)
+            elif correspondencia == "prefixo":
+                no = self.trie
+                for caractere in normalizar_texto(projeto):
+                    no = no.setdefault(caractere, {})
+                no.setdefault(_FIM, tipo_regra)
+            else:
+                try:
+                    padrao = re.compile(projeto)
+                except re.error as erro:
+                    raise ValueError(f"Regex inválida na regra '{projeto}': {erro}") from erro
+                self.regexes.append((padrao, tipo_regra))
+
+    def _buscar_prefixo(self, chave: str) -> Optional[str]:
+        no = self.trie
+        encontrado = no.get(_FIM)
+        for caractere in chave:
+            no = no.get(caractere)
+            if no is None:
+                break
+            encontrado = no.get(_FIM, encontrado)
+        return encontrado
+
+    def classificar_chave(self, chave: str) -> Optional[str]:
+        """
+        Classifica um nome de projeto já normalizado.
+
+        Args:
+            chave (str): Nome do projeto normalizado.
+
+        Returns:
+            str ou None: O TipoRegra da regra aplicável, ou None se nenhuma casar.
+        """
+        tipo_regra = self.exatas.get(chave)
+        if tipo_regra is not None:
+            return tipo_regra
+
+        tipo_regra = self._buscar_prefixo(chave)
+        if tipo_regra is not None:
+            return tipo_regra
+
+        for padrao, tipo in self.regexes:
+            if padrao.fullmatch(chave) is not None:
+                return tipo
+        return None
+
+    def classificar(self, projetos: pd.Series) -> pd.Series:
+        """
+        Classifica uma coluna de projetos em uma única passada vetorizada: os
+        nomes são normalizados com `normalizar_serie`, cada nome normalizado
+        distinto é avaliado uma vez e o resultado é propagado pelos códigos do
+        pd.factorize. Projetos nulos recebem REGRA_PADRAO.
+
+        Args:
+            projetos (pd.Series): Coluna PROJETO.
+
+        Returns:
+            pd.Series: TipoRegra de cada linha (REGRA_PADRAO quando nenhuma regra casa).
+        """
+        codigos, chaves = pd.factorize(normalizar_serie(projetos))
+        tipos = np.array([self.classificar_chave(chave) or REGRA_PADRAO for chave in chaves], dtype=object)[codigos]
+        tipos[projetos.isna().to_numpy()] = REGRA_PADRAO
+        return pd.Series(tipos, index=projetos.index, name="TipoRegra")
+
+
+_motores: Dict[str, Tuple[int, MotorRegras]] = {}
+_lock = threading.Lock()
+
+
+def obter_motor_regras(caminho: str = CAMINHO_REGRAS) -> MotorRegras:
+    """
+    Retorna o motor de regras compilado para o arquivo, recompilando-o apenas
+    quando a data de modificação do arquivo muda.
+
+    Args:
+        caminho (str): Caminho do CSV de regras. Default é CAMINHO_REGRAS.
+
+    Returns:
+        MotorRegras: O motor compilado.
+
+    Raises:
+        FileNotFoundError: Se o arquivo de regras não existir.
+    """
+    caminho = os.path.abspath(caminho)
+    mtime = os.stat(caminho).st_mtime_ns
+
+    with _lock:
+        em_cache = _motores.get(caminho)
+        if em_cache is None or em_cache[0] != mtime:
+            motor = MotorRegras(pd.read_csv(caminho))
+            em_cache = (mtime, motor)
+            _motores[caminho] = em_cache
+            logger.debug(
+                f"Regras de classificação compiladas: {len(motor.exatas)} exatas, "
+                f"{len(motor.regexes)} regex."
+            )
+
+    return em_cache[1]
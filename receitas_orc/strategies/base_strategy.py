@@ -1,21 +1,40 @@
 from abc import ABC, abstractmethod
+from typing import Any, Dict
+
 import pandas as pd
 
 class BaseApropriacaoStrategy(ABC):
     """
     Classe base abstrata para todas as estratégias de apropriação.
     Define o contrato que todas as estratégias concretas devem seguir.
+
+    Cada estratégia declara suas colunas de saída como expressões vetorizadas
+    sobre o DataFrame compartilhado (`colunas_saida`). O pipeline avalia todas
+    as estratégias em uma única passada e grava cada resultado apenas nas
+    linhas cujo TipoRegra usa aquela estratégia.
     """
     @abstractmethod
+    def colunas_saida(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Declara as colunas calculadas pela estratégia.
+
+        Args:
+            df (pd.DataFrame): DataFrame preparado (pode conter linhas de outras estratégias).
+
+        Returns:
+            Dict[str, Any]: Nome da coluna -> valores (Series/array do tamanho de `df` ou escalar).
+        """
+        pass
+
     def apropriar(self, df_projeto: pd.DataFrame) -> pd.DataFrame:
         """
         Aplica a lógica de apropriação específica para um único projeto.
 
         Args:
             df_projeto (pd.DataFrame): DataFrame contendo todas as linhas (ações) de um único projeto.
-            colunas_receita (list): Lista com os nomes das colunas de receita (ex: ['Recursos_Propios']).
 
         Returns:
-            pd.DataFrame: O DataFrame do projeto com as novas colunas de apropriação calculadas.
+            pd.DataFrame: Um novo DataFrame com as colunas de apropriação calculadas
+                          (o DataFrame recebido não é alterado).
         """
-        pass
+        return df_projeto.assign(**self.colunas_saida(df_projeto))
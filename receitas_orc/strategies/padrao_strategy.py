@@ -1,4 +1,6 @@
 import pandas as pd
+from typing import Any, Dict
+
 from .base_strategy import BaseApropriacaoStrategy
 
 class PadraoStrategy(BaseApropriacaoStrategy):
@@ -6,6 +8,6 @@ class PadraoStrategy(BaseApropriacaoStrategy):
     Estratégia para Convênios.
     REGRA: Apropria 80% da despesa realizada, toda na fonte 'Receita_de_Convenios'.
     """
-    def apropriar(self, df_projeto: pd.DataFrame) -> pd.DataFrame:
-        pass
-        return df_projeto
+    def colunas_saida(self, df: pd.DataFrame) -> Dict[str, Any]:
+        # Regra ainda não implementada: as linhas seguem sem colunas de apropriação
+        return {}
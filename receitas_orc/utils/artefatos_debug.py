@@ -0,0 +1,154 @@
+"""
+artefatos_debug.py
+
+Este módulo implementa a gravação opcional de artefatos de depuração
+(DataFrames intermediários do pipeline). Desativada por padrão, quando
+habilitada (DEBUG_ARTEFATOS=1) entrega cada DataFrame nomeado a uma thread
+de fundo que o grava em Parquet, sem que o cálculo espere pela escrita.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import re
+import threading
+from typing import Optional
+
+import pandas as pd
+
+from receitas_orc.utils.copia_sob_escrita import copia_defensiva
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações padrão (podem ser sobrescritas por variáveis de ambiente) ---
+ARTEFATOS_HABILITADOS = os.getenv("DEBUG_ARTEFATOS", "0") == "1"
+ARTEFATOS_DIR = os.getenv("DEBUG_ARTEFATOS_DIR", "artefatos_debug")
+# Artefatos pendentes aceitos na fila; além disso, novos artefatos são descartados
+ARTEFATOS_FILA_MAXIMA = int(os.getenv("DEBUG_ARTEFATOS_FILA", "32"))
+
+EXTENSAO = ".parquet"
+
+_FIM = None  # Sinal para a thread de gravação encerrar
+
+
+class ColetorArtefatos:
+    """
+    Recebe DataFrames nomeados e os grava em segundo plano.
+
+    `registrar` nunca bloqueia: quando o coletor está desativado não faz nada e,
+    quando a fila está cheia, o artefato é descartado com um aviso.
+    """
+
+    def __init__(
+        self,
+        diretorio: str = ARTEFATOS_DIR,
+        habilitado: bool = ARTEFATOS_HABILITADOS,
+        fila_maxima: int = ARTEFATOS_FILA_MAXIMA
+    ):
+        """
+        Inicializa o coletor.
+
+        Args:
+            diretorio (str): Diretório onde os artefatos serão gravados.
+            habilitado (bool): Se False, `registrar` é uma operação vazia.
+            fila_maxima (int): Número máximo de artefatos aguardando gravação.
+        """
+        self.diretorio = diretorio
+        self.habilitado = habilitado
+        self._fila: "queue.Queue" = queue.Queue(maxsize=fila_maxima)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _iniciar(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                os.makedirs(self.diretorio, exist_ok=True)
+                self._thread = threading.Thread(target=self._gravar_pendentes, name="artefatos-debug", daemon=True)
+                self._thread.start()
+                atexit.register(self.encerrar)
+
+    def registrar(self, nome: str, df: pd.DataFrame) -> None:
+        """
+        Agenda a gravação de um DataFrame intermediário.
+
+        Args:
+            nome (str): Nome do artefato (vira o nome do arquivo).
+            df (pd.DataFrame): DataFrame a gravar. Uma cópia é enfileirada, para que
+                               alterações posteriores não afetem o artefato.
+        """
+        if not self.habilitado or df is None:
+            return
+
+        self._iniciar()
+        try:
+            self._fila.put_nowait((nome, copia_defensiva(df)))
+        except queue.Full:
+            logger.warning(f"⚠️ Fila de artefatos de depuração cheia. Artefato '{nome}' descartado.")
+
+    def _caminho(self, nome: str) -> str:
+        nome_arquivo = re.sub(r"[^\w\-]+", "_", nome)
+        return os.path.join(self.diretorio, nome_arquivo + EXTENSAO)
+
+    def _gravar_pendentes(self) -> None:
+        while True:
+            item = self._fila.get()
+            try:
+                if item is _FIM:
+                    return
+                nome, df = item
+                caminho = self._caminho(nome)
+                try:
+                    # Colunas de texto com tipos mistos são convertidas apenas na cópia gravada
+                    df.to_parquet(caminho, index=False)
+                except (TypeError, ValueError, ImportError):
+                    df.astype({c: str for c in df.columns[df.dtypes == object]}).to_parquet(caminho, index=False)
+                logger.debug(f"Artefato de depuração '{nome}' gravado em {caminho}.")
+            except Exception as e:
+                logger.warning(f"⚠️ Falha ao gravar artefato de depuração: {e}")
+            finally:
+                self._fila.task_done()
+
+    def aguardar(self) -> None:
+        """Bloqueia até que todos os artefatos já registrados tenham sido gravados."""
+        if self._thread is not None:
+            self._fila.join()
+
+    def encerrar(self) -> None:
+        """Grava os artefatos pendentes e encerra a thread de fundo."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._fila.put(_FIM)
+            thread.join()
+
+
+_coletor_padrao: Optional[ColetorArtefatos] = None
+_lock_padrao = threading.Lock()
+
+
+def obter_coletor_padrao() -> ColetorArtefatos:
+    """
+    Retorna o coletor de artefatos compartilhado pelo processo, criando-o na primeira chamada.
+
+    Returns:
+        ColetorArtefatos: O coletor configurado pelas variáveis de ambiente.
+    """
+    global _coletor_padrao
+    with _lock_padrao:
+        if _coletor_padrao is None:
+            _coletor_padrao = ColetorArtefatos()
+            if _coletor_padrao.habilitado:
+                logger.info(f"Artefatos de depuração habilitados em '{_coletor_padrao.diretorio}'.")
+        return _coletor_padrao
+
+
+def registrar_artefato(nome: str, df: pd.DataFrame) -> None:
+    """
+    Registra um DataFrame intermediário no coletor padrão (sem efeito se desativado).
+
+    Args:
+        nome (str): Nome do artefato.
+        df (pd.DataFrame): DataFrame a gravar.
+    """
+    obter_coletor_padrao().registrar(nome, df)
@@ -0,0 +1,68 @@
+"""
+copia_sob_escrita.py
+
+Este módulo controla o modo copy-on-write do pandas durante a execução do
+pipeline. Com o modo ativo (COPY_ON_WRITE=1), filtros, fatias, `rename` e
+`assign` devolvem objetos novos que compartilham os dados de origem; a cópia
+só acontece se um deles for alterado. As etapas deixam de fazer cópias
+defensivas completas (`copia_defensiva` passa a ser uma cópia rasa) e a
+memória de pico fica próxima do tamanho das fontes.
+"""
+
+import logging
+import os
+from contextlib import contextmanager
+from typing import Iterator, Optional, TypeVar
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações padrão (podem ser sobrescritas por variáveis de ambiente) ---
+COPY_ON_WRITE = os.getenv("COPY_ON_WRITE", "0") == "1"
+
+Objeto = TypeVar("Objeto", pd.DataFrame, pd.Series)
+
+
+def copia_sob_escrita_ativa() -> bool:
+    """Indica se o pandas está no modo copy-on-write (o modo 'warn' não conta)."""
+    return pd.get_option("mode.copy_on_write") is True
+
+
+def copia_defensiva(obj: Objeto) -> Objeto:
+    """
+    Cópia de um DataFrame (ou Series) que será alterado sem afetar a origem.
+
+    Com copy-on-write a cópia é rasa: os dados só são copiados, coluna a
+    coluna, se forem alterados. Sem ele, é uma cópia completa.
+
+    Args:
+        obj (pd.DataFrame | pd.Series): Objeto a copiar.
+
+    Returns:
+        pd.DataFrame | pd.Series: A cópia.
+    """
+    return obj.copy(deep=not copia_sob_escrita_ativa())
+
+
+@contextmanager
+def modo_copia_sob_escrita(ativo: Optional[bool] = None) -> Iterator[bool]:
+    """
+    Executa o bloco com o copy-on-write do pandas ativado.
+
+    A opção do pandas é global ao processo: vale também para as etapas que
+    o agendador executa em outras threads durante o bloco.
+
+    Args:
+        ativo (bool, opcional): Ativa o modo. Padrão é COPY_ON_WRITE.
+
+    Yields:
+        bool: Se o modo está ativo no bloco.
+    """
+    ativo = COPY_ON_WRITE if ativo is None else ativo
+    if not ativo:
+        yield copia_sob_escrita_ativa()
+        return
+    logger.debug("♻️ Executando com copy-on-write do pandas.")
+    with pd.option_context("mode.copy_on_write", True):
+        yield True
@@ -0,0 +1,289 @@
+"""
+instrumentacao.py
+
+Este módulo implementa a instrumentação por etapa do pipeline. Cada etapa
+nomeada (context manager `etapa` ou decorador `instrumentar`) registra o
+tempo de parede, o tempo de CPU, as linhas e o tamanho em bytes dos
+DataFrames de entrada e saída e, opcionalmente (INSTRUMENTACAO_MEMORIA=1),
+o pico de memória alocada via tracemalloc. Ao final da execução, o
+relatório pode ser gravado em JSON e no formato texto do Prometheus.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# --- Configurações padrão (podem ser sobrescritas por variáveis de ambiente) ---
+INSTRUMENTACAO_MEMORIA = os.getenv("INSTRUMENTACAO_MEMORIA", "0") == "1"
+# Diretório dos relatórios; vazio desativa a gravação (as medições continuam em memória)
+INSTRUMENTACAO_DIR = os.getenv("INSTRUMENTACAO_DIR", "")
+
+PREFIXO_METRICAS = "receitas_orc_etapa"
+# Métrica do Prometheus -> (campo do registro, descrição)
+METRICAS = {
+    "duracao_segundos": ("tempo_s", "Tempo de parede da etapa."),
+    "cpu_segundos": ("cpu_s", "Tempo de CPU do processo durante a etapa."),
+    "pico_memoria_bytes": ("pico_memoria_bytes", "Pico de memória alocada durante a etapa (tracemalloc)."),
+    "linhas_entrada": ("linhas_entrada", "Linhas dos DataFrames de entrada."),
+    "linhas_saida": ("linhas_saida", "Linhas dos DataFrames de saída."),
+    "bytes_entrada": ("bytes_entrada", "Tamanho em bytes dos DataFrames de entrada."),
+    "bytes_saida": ("bytes_saida", "Tamanho em bytes dos DataFrames de saída."),
+}
+
+
+def _tamanho(objetos: tuple, memoria_profunda: bool) -> tuple:
+    """Soma linhas e bytes dos DataFrames (inclusive dentro de tuplas/listas)."""
+    linhas, tamanho_bytes = 0, 0
+    for objeto in objetos:
+        if isinstance(objeto, (tuple, list)):
+            sub_linhas, sub_bytes = _tamanho(tuple(objeto), memoria_profunda)
+            linhas, tamanho_bytes = linhas + sub_linhas, tamanho_bytes + sub_bytes
+        elif isinstance(objeto, pd.DataFrame):
+            linhas += len(objeto)
+            tamanho_bytes += int(objeto.memory_usage(index=True, deep=memoria_profunda).sum())
+    return linhas, tamanho_bytes
+
+
+class RegistroEtapa:
+    """Medições de uma execução de etapa."""
+
+    def __init__(self, nome: str, pai: Optional[str], rotulos: Dict[str, Any]):
+        self.nome = nome
+        self.pai = pai
+        self.rotulos = rotulos
+        self.valores: Dict[str, Any] = {
+            "linhas_entrada": 0, "bytes_entrada": 0, "linhas_saida": 0, "bytes_saida": 0
+        }
+        self._memoria_profunda = False
+
+    def entrada(self, *dfs: Any) -> None:
+        """Registra os DataFrames de entrada da etapa."""
+        self.valores["linhas_entrada"], self.valores["bytes_entrada"] = _tamanho(dfs, self._memoria_profunda)
+
+    def saida(self, *dfs: Any) -> None:
+        """Registra os DataFrames de saída da etapa."""
+        self.valores["linhas_saida"], self.valores["bytes_saida"] = _tamanho(dfs, self._memoria_profunda)
+
+    def como_dict(self) -> Dict[str, Any]:
+        return {"etapa": self.nome, "pai": self.pai, "rotulos": self.rotulos, **self.valores}
+
+
+class Instrumentacao:
+    """
+    Coletor das medições de uma execução do pipeline.
+
+    As etapas podem ser aninhadas; cada thread tem sua própria pilha de etapas,
+    e os rótulos (ex: mes=3) da etapa pai são herdados pelas filhas.
+    """
+
+    def __init__(self, medir_memoria: bool = INSTRUMENTACAO_MEMORIA):
+        """
+        Args:
+            medir_memoria (bool): Se True, mede o pico de memória com tracemalloc
+                                  e o tamanho profundo (deep) dos DataFrames.
+        """
+        self.medir_memoria = medir_memoria
+        self.id_execucao = uuid.uuid4().hex[:12]
+        self.inicio = datetime.now()
+        self.registros: List[RegistroEtapa] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._tracemalloc_proprio = False
+
+    def _pilha(self) -> List[Any]:
+        if not hasattr(self._local, "pilha"):
+            self._local.pilha = []
+        return self._local.pilha
+
+    def etapa_atual(self) -> Optional[RegistroEtapa]:
+        """Retorna a etapa em andamento na thread atual, se houver."""
+        pilha = self._pilha()
+        return pilha[-1][0] if pilha else None
+
+    @contextmanager
+    def etapa(self, nome: str, pai_externo: Optional[RegistroEtapa] = None, **rotulos: Any) -> Iterator[RegistroEtapa]:
+        """
+        Mede o bloco como uma etapa.
+
+        Args:
+            nome (str): Nome da etapa.
+            pai_externo (RegistroEtapa, opcional): Etapa pai de outra thread (ex: a que
+                                                   despachou o trabalho para um pool),
+                                                   usada quando a pilha desta thread está vazia.
+            **rotulos: Rótulos adicionais (ex: mes=3, consulta='cc').
+
+        Yields:
+            RegistroEtapa: Registro no qual a entrada e a saída podem ser informadas.
+        """
+        pilha = self._pilha()
+        pai = pilha[-1] if pilha else None
+        registro_pai = pai[0] if pai else pai_externo
+        registro = RegistroEtapa(
+            nome, registro_pai.nome if registro_pai else None,
+            {**(registro_pai.rotulos if registro_pai else {}), **rotulos}
+        )
+        registro._memoria_profunda = self.medir_memoria
+
+        # Cada item da pilha guarda [registro, memória no início, maior pico visto nas filhas]
+        item = [registro, 0, 0]
+        if self.medir_memoria:
+            with self._lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._tracemalloc_proprio = True
+            atual, pico = tracemalloc.get_traced_memory()
+            if pai is not None:
+                pai[2] = max(pai[2], pico)
+            tracemalloc.reset_peak()
+            item[1] = atual
+        pilha.append(item)
+
+        inicio_parede, inicio_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield registro
+        finally:
+            registro.valores["tempo_s"] = round(time.perf_counter() - inicio_parede, 6)
+            registro.valores["cpu_s"] = round(time.process_time() - inicio_cpu, 6)
+            pilha.pop()
+            if self.medir_memoria and tracemalloc.is_tracing():
+                pico = max(tracemalloc.get_traced_memory()[1], item[2])
+                registro.valores["pico_memoria_bytes"] = max(pico - item[1], 0)
+                if pai is not None:
+                    pai[2] = max(pai[2], pico)
+            with self._lock:
+                self.registros.append(registro)
+            logger.debug(f"⏱️ Etapa '{nome}' {registro.rotulos or ''}: {registro.valores['tempo_s']:.3f}s")
+
+    def relatorio(self) -> Dict[str, Any]:
+        """Retorna o relatório da execução (na ordem em que as etapas terminaram)."""
+        with self._lock:
+            etapas = [registro.como_dict() for registro in self.registros]
+        return {
+            "id_execucao": self.id_execucao,
+            "inicio": self.inicio.isoformat(timespec="seconds"),
+            "medir_memoria": self.medir_memoria,
+            "etapas": etapas,
+        }
+
+    def gravar_json(self, caminho: str) -> None:
+        """Grava o relatório da execução em JSON."""
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.relatorio(), f, ensure_ascii=False, indent=2, default=str)
+
+    def gravar_prometheus(self, caminho: str) -> None:
+        """Grava as medições no formato texto de exposição do Prometheus (node_exporter textfile)."""
+        linhas = []
+        etapas = self.relatorio()["etapas"]
+        for metrica, (campo, descricao) in METRICAS.items():
+            amostras = [etapa for etapa in etapas if campo in etapa]
+            if not amostras:
+                continue
+            nome_metrica = f"{PREFIXO_METRICAS}_{metrica}"
+            linhas.append(f"# HELP {nome_metrica} {descricao}")
+            linhas.append(f"# TYPE {nome_metrica} gauge")
+            for etapa in amostras:
+                rotulos = {"execucao": self.id_execucao, "etapa": etapa["etapa"], "pai": etapa["pai"] or "", **etapa["rotulos"]}
+                texto_rotulos = ",".join(f'{chave}="{_escapar_rotulo(valor)}"' for chave, valor in rotulos.items())
+                linhas.append(f"{nome_metrica}{{{texto_rotulos}}} {etapa[campo]}")
+
+        # Grava em arquivo temporário e renomeia, para o coletor nunca ler um arquivo parcial
+        temporario = f"{caminho}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            f.write("\n".join(linhas) + "\n")
+        os.replace(temporario, caminho)
+
+    def gravar_relatorios(self, diretorio: str = INSTRUMENTACAO_DIR) -> Optional[str]:
+        """
+        Grava o relatório JSON e o arquivo do Prometheus no diretório.
+
+        Args:
+            diretorio (str): Diretório de destino. Vazio desativa a gravação.
+
+        Returns:
+            str ou None: Caminho do relatório JSON, se gravado.
+        """
+        if not diretorio:
+            return None
+        os.makedirs(diretorio, exist_ok=True)
+        caminho_json = os.path.join(diretorio, f"instrumentacao_{self.id_execucao}.json")
+        self.gravar_json(caminho_json)
+        self.gravar_prometheus(os.path.join(diretorio, "receitas_orc.prom"))
+        logger.info(f"📈 Relatórios de instrumentação gravados em '{diretorio}'.")
+        return caminho_json
+
+    def encerrar(self) -> None:
+        """Para o tracemalloc, se foi iniciado por esta instrumentação."""
+        with self._lock:
+            if self._tracemalloc_proprio and tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self._tracemalloc_proprio = False
+
+
+def _escapar_rotulo(valor: Any) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+_instrumentacao_padrao: Optional[Instrumentacao] = None
+_lock_padrao = threading.Lock()
+
+
+def obter_instrumentacao() -> Instrumentacao:
+    """Retorna a instrumentação da execução atual, criando-a na primeira chamada."""
+    global _instrumentacao_padrao
+    with _lock_padrao:
+        if _instrumentacao_padrao is None:
+            _instrumentacao_padrao = Instrumentacao()
+        return _instrumentacao_padrao
+
+
+def nova_execucao(medir_memoria: bool = INSTRUMENTACAO_MEMORIA) -> Instrumentacao:
+    """
+    Inicia uma nova execução, descartando as medições da anterior.
+
+    Args:
+        medir_memoria (bool): Se True, mede o pico de memória de cada etapa.
+
+    Returns:
+        Instrumentacao: A nova instrumentação padrão.
+    """
+    global _instrumentacao_padrao
+    with _lock_padrao:
+        if _instrumentacao_padrao is not None:
+            _instrumentacao_padrao.encerrar()
+        _instrumentacao_padrao = Instrumentacao(medir_memoria)
+        return _instrumentacao_padrao
+
+
+def instrumentar(nome: Optional[str] = None) -> Callable:
+    """
+    Decorador que mede a função como uma etapa da instrumentação padrão.
+    Os DataFrames recebidos como argumentos posicionais são a entrada e o
+    retorno (DataFrame ou tupla com DataFrames) é a saída.
+
+    Args:
+        nome (str, opcional): Nome da etapa. Padrão é o nome da função.
+    """
+    def decorador(funcao: Callable) -> Callable:
+        nome_etapa = nome or funcao.__name__
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with obter_instrumentacao().etapa(nome_etapa) as registro:
+                registro.entrada(*args, *kwargs.values())
+                resultado = funcao(*args, **kwargs)
+                registro.saida(resultado)
+                return resultado
+        return envoltorio
+    return decorador
@@ -2,9 +2,24 @@
 sql_utils.py
 
 Este módulo contém funções utilitárias para manipulação de arquivos SQL,
-principalmente para carregar o conteúdo de arquivos .sql em strings.
+principalmente para carregar o conteúdo de arquivos .sql em strings e
+compilá-los como templates parametrizados.
 """
 
+import hashlib
+import os
+import threading
+from functools import lru_cache
+from string import Template
+from typing import Dict, Tuple
+
+# Cache de arquivos lidos: caminho -> (mtime_ns, hash do conteúdo)
+_arquivos_lidos: Dict[str, Tuple[int, str]] = {}
+# Conteúdo por hash, para que arquivos idênticos compartilhem o mesmo template
+_conteudos: Dict[str, str] = {}
+_lock = threading.Lock()
+
+
 def carregar_sql(caminho: str) -> str:
     """
     Carrega o conteúdo de um arquivo SQL do caminho especificado.
@@ -18,3 +33,35 @@ def carregar_sql(caminho: str) -> str:
     with open(caminho, encoding="utf-8") as f:
         return f.read()
 
+
+@lru_cache(maxsize=None)
+def _compilar_template(hash_conteudo: str) -> Template:
+    return Template(_conteudos[hash_conteudo])
+
+
+def carregar_template_sql(caminho: str) -> Template:
+    """
+    Carrega um arquivo SQL/MDX como `string.Template`, com placeholders no
+    formato ${nome}.
+
+    O arquivo só é relido do disco quando sua data de modificação muda, e o
+    template compilado é reaproveitado pelo hash do conteúdo.
+
+    Args:
+        caminho (str): O caminho completo para o arquivo SQL/MDX.
+
+    Returns:
+        Template: O template compilado.
+    """
+    mtime = os.stat(caminho).st_mtime_ns
+
+    with _lock:
+        em_cache = _arquivos_lidos.get(caminho)
+        if em_cache is None or em_cache[0] != mtime:
+            conteudo = carregar_sql(caminho)
+            hash_conteudo = hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+            _conteudos[hash_conteudo] = conteudo
+            em_cache = (mtime, hash_conteudo)
+            _arquivos_lidos[caminho] = em_cache
+
+    return _compilar_template(em_cache[1])
@@ -0,0 +1,113 @@
+import threading
+
+import pytest
+
+from receitas_orc.services import execucao_pipeline
+from receitas_orc.services.agendador_etapas import GrafoEtapas
+from receitas_orc.utils.instrumentacao import nova_execucao
+
+
+def _grafo_diamante() -> GrafoEtapas:
+    grafo = GrafoEtapas("teste")
+    grafo.adicionar("dobrar", lambda x: x * 2, ["x"], ["dobro"])
+    grafo.adicionar("triplicar", lambda x: x * 3, ["x"], ["triplo"])
+    grafo.adicionar("somar", lambda a, b: a + b, ["dobro", "triplo"], ["soma"])
+    grafo.adicionar("dividir", lambda soma: (soma // 2, soma % 2), ["soma"], ["quociente", "resto"])
+    return grafo
+
+
+def test_grafo_executa_respeitando_dependencias():
+    valores = _grafo_diamante().executar({"x": 5}, max_workers=4)
+
+    assert valores["soma"] == 25
+    assert (valores["quociente"], valores["resto"]) == (12, 1)
+
+
+def test_grafo_expoe_estrutura_para_inspecao():
+    grafo = _grafo_diamante()
+
+    assert grafo.valores_iniciais() == ["x"]
+    assert grafo.dependencias()["somar"] == ["dobrar", "triplicar"]
+    assert grafo.niveis() == [["dobrar", "triplicar"], ["somar"], ["dividir"]]
+    dot = grafo.para_dot()
+    assert dot.startswith('digraph "teste"')
+    assert '"dobrar" -> "somar" [label="dobro"];' in dot
+
+
+def test_etapas_independentes_rodam_ao_mesmo_tempo():
+    # Cada etapa só termina quando a outra também começou: em série, a barreira estouraria o tempo
+    barreira = threading.Barrier(2, timeout=5)
+    grafo = GrafoEtapas()
+    grafo.adicionar("a", lambda: barreira.wait() is not None, [], ["a"])
+    grafo.adicionar("b", lambda: barreira.wait() is not None, [], ["b"])
+
+    assert grafo.executar({}, max_workers=2) == {"a": True, "b": True}
+
+
+def test_grafo_rejeita_ciclos_e_saidas_duplicadas():
+    grafo = GrafoEtapas()
+    grafo.adicionar("a", lambda y: y, ["y"], ["x"])
+    with pytest.raises(ValueError):
+        grafo.adicionar("b", lambda x: x, ["x"], ["y"])
+    with pytest.raises(ValueError):
+        grafo.adicionar("c", lambda: 1, [], ["x"])
+    with pytest.raises(ValueError):
+        grafo.adicionar("a", lambda: 1, [], ["z"])
+    assert list(grafo.etapas) == ["a"]
+
+
+def test_grafo_exige_valores_iniciais_e_propaga_erros():
+    with pytest.raises(ValueError):
+        _grafo_diamante().executar({})
+
+    def falhar(x):
+        raise RuntimeError("falha na etapa")
+
+    grafo = GrafoEtapas()
+    grafo.adicionar("falhar", falhar, ["x"], ["y"])
+    grafo.adicionar("depois", lambda y: y, ["y"], ["z"])
+    with pytest.raises(RuntimeError, match="falha na etapa"):
+        grafo.executar({"x": 1})
+
+
+def test_etapas_sao_filhas_da_etapa_que_executou_o_grafo():
+    instrumentacao = nova_execucao(medir_memoria=False)
+    with instrumentacao.etapa("processar", mes=4):
+        _grafo_diamante().executar({"x": 1}, max_workers=4, grupo="g")
+
+    etapas = {e["etapa"]: e for e in instrumentacao.relatorio()["etapas"]}
+    assert etapas["somar"]["pai"] == "processar"
+    assert etapas["somar"]["rotulos"] == {"mes": 4, "grupo": "g"}
+
+
+def test_medicao_de_memoria_executa_uma_etapa_por_vez():
+    nova_execucao(medir_memoria=True)
+    ativas, maximo = [0], [0]
+    trava = threading.Lock()
+
+    def etapa():
+        with trava:
+            ativas[0] += 1
+            maximo[0] = max(maximo[0], ativas[0])
+        with trava:
+            ativas[0] -= 1
+
+    grafo = GrafoEtapas()
+    for nome in "abcd":
+        grafo.adicionar(nome, etapa, [], [nome])
+    try:
+        grafo.executar({}, max_workers=4)
+    finally:
+        nova_execucao(medir_memoria=False)
+    assert maximo[0] == 1
+
+
+def test_grafos_do_pipeline_sao_consistentes():
+    fontes = execucao_pipeline.montar_grafo_fontes()
+    mes = execucao_pipeline.montar_grafo_mes()
+
+    produzidas = {saida for etapa in fontes.etapas.values() for saida in etapa.saidas} | {"agregador_fechamento"}
+    assert set(execucao_pipeline.FONTES) <= produzidas
+    assert set(mes.valores_iniciais()) <= set(execucao_pipeline.FONTES) | {"mes"}
+    assert {"renomear_orcadas", "renomear_acoes", "renomear_exec_receitas"} <= set(fontes.niveis()[0])
+    assert {"filtrar_despesas", "filtrar_receitas", "filtrar_exec_receitas", "separar_fechamento"} == set(mes.niveis()[0])
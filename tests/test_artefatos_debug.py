@@ -0,0 +1,56 @@
+import os
+import threading
+from unittest.mock import patch
+
+import pandas as pd
+
+from receitas_orc.utils.artefatos_debug import ColetorArtefatos
+
+
+def test_desabilitado_nao_grava_nem_inicia_thread(tmp_path):
+    coletor = ColetorArtefatos(diretorio=str(tmp_path / "artefatos"), habilitado=False)
+
+    coletor.registrar("teste", pd.DataFrame({"A": [1]}))
+
+    assert coletor._thread is None
+    assert not os.path.exists(tmp_path / "artefatos")
+
+
+def test_grava_em_parquet_uma_copia_do_dataframe(tmp_path):
+    coletor = ColetorArtefatos(diretorio=str(tmp_path), habilitado=True)
+    df = pd.DataFrame({"PROJETO": ["A", "B"], "VALOR": [1.0, 2.0]})
+
+    coletor.registrar("resultado/estrategias", df)
+    df.loc[0, "VALOR"] = 99.0  # Alteração posterior não afeta o artefato
+    coletor.encerrar()
+
+    gravado = pd.read_parquet(tmp_path / "resultado_estrategias.parquet")
+    assert gravado["VALOR"].tolist() == [1.0, 2.0]
+
+
+def test_colunas_de_tipo_misto_sao_gravadas_como_texto(tmp_path):
+    coletor = ColetorArtefatos(diretorio=str(tmp_path), habilitado=True)
+
+    coletor.registrar("misto", pd.DataFrame({"X": ["a", 1, None]}))
+    coletor.encerrar()
+
+    assert pd.read_parquet(tmp_path / "misto.parquet")["X"].tolist() == ["a", "1", "None"]
+
+
+def test_registrar_nao_bloqueia_com_fila_cheia(tmp_path):
+    coletor = ColetorArtefatos(diretorio=str(tmp_path), habilitado=True, fila_maxima=1)
+    liberar = threading.Event()
+    gravar_original = pd.DataFrame.to_parquet
+
+    def gravar_lento(self, *args, **kwargs):
+        liberar.wait(5)
+        return gravar_original(self, *args, **kwargs)
+
+    with patch.object(pd.DataFrame, "to_parquet", gravar_lento):
+        for i in range(5):
+            coletor.registrar(f"a{i}", pd.DataFrame({"A": [i]}))
+        liberar.set()
+        coletor.encerrar()
+
+    # Um artefato em gravação, um na fila; os demais foram descartados sem bloquear
+    assert 1 <= len(list(tmp_path.glob("*.parquet"))) <= 2
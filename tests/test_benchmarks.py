@@ -0,0 +1,47 @@
+import json
+import tracemalloc
+
+import pandas as pd
+
+from receitas_orc.benchmarks.dados_sinteticos import gerar_fontes_sinteticas
+from receitas_orc.benchmarks.executar_benchmark import executar_benchmark, main
+
+ETAPAS = [
+    "gerar_dados", "renomear_colunas", "classificar_projetos", "codificar_dimensoes", "indexar_meses",
+    "filtrar_mes", "indexar_juncoes", "preparar_dados_base", "executar_estrategias", "exportar_resultado",
+]
+
+
+def test_dados_sinteticos_sao_deterministicos_e_escalam():
+    fontes_a = gerar_fontes_sinteticas(escala=0.05, semente=7)
+    fontes_b = gerar_fontes_sinteticas(escala=0.05, semente=7)
+    fontes_maiores = gerar_fontes_sinteticas(escala=0.2, semente=7)
+
+    assert set(fontes_a) == {"RECEITAS_ORCADAS_2025", "RECEITAS_EXEC_2025", "RECEITAS_DESPESAS_PERCENT", "acoes", "cc", "FatoFechamento"}
+    for nome, df in fontes_a.items():
+        pd.testing.assert_frame_equal(df, fontes_b[nome])
+        assert len(fontes_maiores[nome]) > len(df)
+
+
+def test_benchmark_mede_todas_as_etapas(tmp_path):
+    resultado = executar_benchmark(escala=0.05, mes=3, diretorio_saida=str(tmp_path), medir_memoria=True)
+
+    assert [e["etapa"] for e in resultado["etapas"]] == ETAPAS
+    for etapa in resultado["etapas"]:
+        assert etapa["tempo_s"] >= 0 and etapa["cpu_s"] >= 0
+        assert etapa["pico_memoria_bytes"] > 0
+    assert not tracemalloc.is_tracing()
+    estrategias = next(e for e in resultado["etapas"] if e["etapa"] == "executar_estrategias")
+    assert estrategias["linhas_saida"] > 0
+    assert (tmp_path / "benchmark_escala_0.05.xlsx").exists()
+
+
+def test_linha_de_comando_grava_relatorio_json(tmp_path):
+    saida = tmp_path / "benchmark.json"
+
+    main(["--escalas", "0.02", "--repeticoes", "2", "--sem-memoria", "--saida", str(saida)])
+
+    relatorio = json.loads(saida.read_text(encoding="utf-8"))
+    assert relatorio["versao_formato"] == 3
+    assert [e["repeticao"] for e in relatorio["execucoes"]] == [1, 2]
+    assert "pico_memoria_bytes" not in relatorio["execucoes"][0]["etapas"][0]
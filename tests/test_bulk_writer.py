@@ -0,0 +1,111 @@
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock, patch
+
+from receitas_orc.benchmarks.dados_sinteticos import gerar_fontes_sinteticas
+from receitas_orc.data_access.bulk_writer import (
+    COLUNA_HASH, calcular_delta, calcular_hash_linhas, citar_identificador, publicar_incremental
+)
+from receitas_orc.services import execucao_pipeline
+
+CHAVES = ["PROJETO", "ACAO", "CC"]
+
+
+def _resultado():
+    return pd.DataFrame({
+        "PROJETO": ["P1", "P1", "P2", "P3"],
+        "ACAO": ["A1", "A2", "A1", "A1"],
+        "CC": ["001", "002", None, "004"],
+        "CSN_APROPRIAR_ANUAL": [10.0, 20.0, 30.0, 40.0],
+    })
+
+
+def test_hash_linhas_e_estavel_e_ignora_chaves():
+    df = _resultado()
+    hash_1 = calcular_hash_linhas(df, CHAVES)
+    hash_2 = calcular_hash_linhas(df.copy(), CHAVES)
+
+    pd.testing.assert_series_equal(hash_1, hash_2)
+    assert hash_1.dtype == "int64"
+    assert hash_1.iloc[0] != hash_1.iloc[1]
+
+
+def test_calcular_delta_identifica_insercoes_alteracoes_e_remocoes():
+    publicado = _resultado()
+    publicado[COLUNA_HASH] = calcular_hash_linhas(publicado, CHAVES)
+
+    novo = _resultado()
+    novo.loc[1, "CSN_APROPRIAR_ANUAL"] = 25.0            # alterada
+    novo = novo[novo["PROJETO"] != "P3"]                   # P3 removida
+    novo = pd.concat([novo, pd.DataFrame({                 # P4 inserida
+        "PROJETO": ["P4"], "ACAO": ["A9"], "CC": ["009"], "CSN_APROPRIAR_ANUAL": [1.0]
+    })], ignore_index=True)
+    novo[COLUNA_HASH] = calcular_hash_linhas(novo, CHAVES)
+
+    enviar, remover, contagens = calcular_delta(novo, publicado[CHAVES + [COLUNA_HASH]], CHAVES)
+
+    assert contagens == {"inseridas": 1, "alteradas": 1, "removidas": 1}
+    assert sorted(enviar["PROJETO"] + enviar["ACAO"]) == ["P1A2", "P4A9"]
+    assert remover["PROJETO"].tolist() == ["P3"]
+
+
+def test_publicar_incremental_envia_apenas_delta():
+    novo = _resultado()
+    novo.loc[0, "CSN_APROPRIAR_ANUAL"] = 11.0
+    publicado = _resultado()
+    publicado[COLUNA_HASH] = calcular_hash_linhas(publicado, CHAVES)
+
+    inspetor = MagicMock()
+    inspetor.has_table.return_value = True
+    inspetor.get_columns.return_value = [{"name": c} for c in list(novo.columns) + [COLUNA_HASH]]
+    conexao = MagicMock()
+
+    with patch("sqlalchemy.inspect", return_value=inspetor), \
+         patch("pandas.read_sql_query", return_value=publicado[CHAVES + [COLUNA_HASH]]), \
+         patch("pandas.DataFrame.to_sql", autospec=True) as mock_to_sql:
+        contagens = publicar_incremental(conexao, novo, "resultado", CHAVES)
+
+    assert contagens == {"inseridas": 0, "alteradas": 1, "removidas": 0}
+    df_delta = mock_to_sql.call_args_list[0].args[0]
+    assert mock_to_sql.call_args_list[0].kwargs["name"] == "resultado__delta"
+    assert df_delta["PROJETO"].tolist() == ["P1"]
+
+    comandos = " ".join(c.args[0] for c in conexao.exec_driver_sql.call_args_list)
+    assert "MERGE [dbo].[resultado]" in comandos
+    assert "DELETE [t] FROM [dbo].[resultado]" in comandos
+
+
+def _resultado_do_pipeline(mes=6):
+    fontes = gerar_fontes_sinteticas(escala=0.1, semente=3)
+    with patch.object(execucao_pipeline, "FECHAMENTO_EM_BLOCOS", False), \
+         patch.object(execucao_pipeline, "selecionar_consulta_por_nome", return_value=fontes):
+        return execucao_pipeline.processar_mes(execucao_pipeline.carregar_fontes(mes), mes)
+
+
+def test_citar_identificador_escapa_colchetes_e_rejeita_vazios_e_longos():
+    assert citar_identificador("Convênios, Subvenções e Auxílios") == "[Convênios, Subvenções e Auxílios]"
+    assert citar_identificador("Receita (%) [bruta]") == "[Receita (%) [bruta]]]"
+    for nome in ("", "x" * 129):
+        with pytest.raises(ValueError):
+            citar_identificador(nome)
+
+
+def test_publicar_incremental_aceita_o_resultado_do_pipeline():
+    novo = _resultado_do_pipeline()
+    publicado = novo.copy()
+    publicado[COLUNA_HASH] = calcular_hash_linhas(publicado, CHAVES)
+    novo.loc[novo.index[0], "CSN_APROPRIAR_ANUAL"] += 1.0
+
+    inspetor = MagicMock()
+    inspetor.has_table.return_value = True
+    inspetor.get_columns.return_value = [{"name": c} for c in list(novo.columns) + [COLUNA_HASH]]
+    conexao = MagicMock()
+
+    with patch("sqlalchemy.inspect", return_value=inspetor), \
+         patch("pandas.read_sql_query", return_value=publicado[CHAVES + [COLUNA_HASH]]), \
+         patch("pandas.DataFrame.to_sql", autospec=True):
+        contagens = publicar_incremental(conexao, novo, "resultado", CHAVES)
+
+    assert contagens == {"inseridas": 0, "alteradas": 1, "removidas": 0}
+    comandos = " ".join(c.args[0] for c in conexao.exec_driver_sql.call_args_list)
+    assert "[t].[CSN Programas e Projetos Nacionais] = [s].[CSN Programas e Projetos Nacionais]" in comandos
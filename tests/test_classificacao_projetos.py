@@ -0,0 +1,31 @@
+import pandas as pd
+
+from receitas_orc.services.dataframe_processing import (
+    classificar_projetos_em_dataframe, normalizar_serie, normalizar_texto
+)
+
+
+def test_normalizar_serie_equivale_ao_escalar():
+    serie = pd.Series(["Crie - Políticas Públicas", None, "  ALI  Rural ", "Crie - Políticas Públicas", "a,b.c"])
+    esperado = pd.Series([normalizar_texto(v) for v in serie])
+
+    pd.testing.assert_series_equal(normalizar_serie(serie), esperado)
+    assert normalizar_texto("  ALI  Rural ") == "ali rural"
+
+
+def test_classificacao_tolera_variacao_de_legenda():
+    df = pd.DataFrame({
+        "PROJETO": [
+            "ALI RURAL",
+            "Sustentabilidade Eficiência Empresarial e Soluções Tecnológicas",
+            "Conexoes Corporativas Sebrae-SP Raizen",
+            "Projeto Sem Regra",
+        ],
+        "VALOR": [1, 2, 3, 4],
+    })
+
+    resultado = classificar_projetos_em_dataframe(df)
+
+    assert resultado["TipoRegra"].tolist() == ["100% CSN", "100% CSN", "CCTF", "Outra Regra"]
+    assert resultado["PROJETO"].tolist() == df["PROJETO"].tolist()
+    assert list(resultado.columns) == ["PROJETO", "VALOR", "TipoRegra"]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from unittest.mock import MagicMock
+
+from receitas_orc.data_access.columnar_fetch import ler_cursor_em_colunas
+
+
+def _cursor_falso(linhas, nomes, tamanho_bloco):
+    cursor = MagicMock()
+    descricao = []
+    for nome in nomes:
+        coluna = MagicMock()
+        coluna.name = nome
+        descricao.append(coluna)
+    cursor.description = descricao
+    blocos = [linhas[i:i + tamanho_bloco] for i in range(0, len(linhas), tamanho_bloco)]
+    cursor.fetchmany.side_effect = blocos + [[]]
+    return cursor
+
+
+def test_leitura_colunar_equivale_ao_fetchall():
+    linhas = [
+        (None, "PPA 2025 - 31/Jan", "Projeto A", None),
+        (None, "PPA 2025 - 31/Jan", "Projeto B", 150.5),
+        (None, "PPA 2025 - 28/Fev", "Projeto A", 99),
+        ("x", "PPA 2025 - 28/Fev", None, 10.0),
+        (None, "PPA 2025 - 31/Mar", "Projeto C", None),
+    ]
+    nomes = ["extra", "FotografiaPPA", "PROJETO", "VALOR"]
+
+    resultado = ler_cursor_em_colunas(_cursor_falso(linhas, nomes, tamanho_bloco=2), tamanho_bloco=2)
+    esperado = pd.DataFrame(linhas, columns=nomes)
+
+    assert resultado["VALOR"].dtype == np.float64
+    pd.testing.assert_frame_equal(resultado, esperado, check_dtype=False)
+
+
+def test_leitura_colunar_compartilha_textos_repetidos():
+    linhas = [("Projeto " + "X" * 50, float(i)) for i in range(100)]
+    resultado = ler_cursor_em_colunas(_cursor_falso(linhas, ["PROJETO", "VALOR"], 7), tamanho_bloco=7)
+
+    objetos_distintos = {id(v) for v in resultado["PROJETO"]}
+    assert len(objetos_distintos) == 1
+    assert resultado["VALOR"].sum() == sum(range(100))
+
+
+def test_leitura_colunar_resultado_vazio():
+    resultado = ler_cursor_em_colunas(_cursor_falso([], ["A", "B"], 10), tamanho_bloco=10)
+    assert list(resultado.columns) == ["A", "B"]
+    assert resultado.empty
+
+
+def test_leitura_colunar_coluna_numerica_que_recebe_texto():
+    linhas = [(1.0,), (2.0,), ("n/d",), (None,)]
+    resultado = ler_cursor_em_colunas(_cursor_falso(linhas, ["VALOR"], 2), tamanho_bloco=2)
+    assert resultado["VALOR"].tolist() == [1.0, 2.0, "n/d", None]
@@ -0,0 +1,113 @@
+import tracemalloc
+from unittest.mock import patch
+
+import pandas as pd
+
+from receitas_orc.benchmarks.dados_sinteticos import gerar_fontes_sinteticas
+from receitas_orc.services import execucao_pipeline
+from receitas_orc.strategies.base_strategy import BaseApropriacaoStrategy
+from receitas_orc.utils import instrumentacao
+from receitas_orc.utils.copia_sob_escrita import copia_defensiva, copia_sob_escrita_ativa, modo_copia_sob_escrita
+
+# Pico de memória do lote com copy-on-write, em múltiplos do tamanho das fontes
+# (medido em ~0,38x na escala 0,5; sem copy-on-write, ~0,50x a 0,54x)
+MULTIPLO_MAXIMO_DA_ENTRADA = 0.45
+# Fração máxima do pico sem copy-on-write (medida em ~0,75)
+FRACAO_MAXIMA_DO_PICO_SEM_COPY_ON_WRITE = 0.9
+# Pico da carga das fontes com copy-on-write (medido em ~0,27x; com uma cópia
+# defensiva da FatoFechamento, ~0,31x; sem copy-on-write, ~0,54x)
+MULTIPLO_MAXIMO_DA_ENTRADA_NA_CARGA = 0.29
+
+
+class _EstrategiaTeste(BaseApropriacaoStrategy):
+    def colunas_saida(self, df_projeto):
+        return {'RECEITA_APROPRIADA': df_projeto['VALOR'] * 2}
+
+
+def _ambiente_sintetico(fontes):
+    return patch.multiple(
+        execucao_pipeline, FECHAMENTO_EM_BLOCOS=False,
+        selecionar_consulta_por_nome=lambda *args, **kwargs: fontes, exportar_resultado=lambda *args, **kwargs: None
+    )
+
+
+def _executar_lote_sintetico(fontes, copia_sob_escrita):
+    with _ambiente_sintetico(fontes):
+        tracemalloc.start()
+        try:
+            df_lote = execucao_pipeline.executar_lote(1, 12, copia_sob_escrita=copia_sob_escrita)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return df_lote, pico
+
+
+def test_copia_defensiva_e_rasa_sob_copy_on_write_sem_afetar_a_origem():
+    df = pd.DataFrame({'VALOR': [1.0, 2.0]})
+
+    with modo_copia_sob_escrita(True):
+        assert copia_sob_escrita_ativa()
+        copia = copia_defensiva(df)
+        copia.loc[0, 'VALOR'] = 99.0
+    assert df['VALOR'].tolist() == [1.0, 2.0]
+
+    copia = copia_defensiva(df)
+    assert not copia_sob_escrita_ativa()
+    copia.loc[0, 'VALOR'] = 99.0
+    assert df['VALOR'].tolist() == [1.0, 2.0]
+
+
+def test_modo_desativado_nao_altera_a_opcao_do_pandas():
+    with modo_copia_sob_escrita(False) as ativo:
+        assert ativo is False
+        assert not copia_sob_escrita_ativa()
+
+
+def test_apropriar_nao_altera_o_dataframe_de_entrada():
+    df = pd.DataFrame({'VALOR': [1.0, 2.0]})
+
+    resultado = _EstrategiaTeste().apropriar(df)
+
+    assert list(df.columns) == ['VALOR']
+    assert resultado['RECEITA_APROPRIADA'].tolist() == [2.0, 4.0]
+
+
+def test_pico_de_memoria_do_lote_fica_abaixo_de_multiplo_da_entrada():
+    fontes = gerar_fontes_sinteticas(escala=0.5, semente=3)
+    tamanho_entrada = sum(df.memory_usage(deep=True).sum() for df in fontes.values())
+
+    # A execução com copy-on-write vem primeiro e paga os custos de aquecimento
+    df_lote, pico = _executar_lote_sintetico(fontes, copia_sob_escrita=True)
+    esperado, pico_sem_copia_sob_escrita = _executar_lote_sintetico(fontes, copia_sob_escrita=False)
+
+    assert not df_lote.empty
+    assert pico < MULTIPLO_MAXIMO_DA_ENTRADA * tamanho_entrada, (
+        f"Pico de {pico / 1024 ** 2:.1f} MB para {tamanho_entrada / 1024 ** 2:.1f} MB de entrada"
+    )
+    # Uma cópia defensiva reintroduzida aproxima os dois picos
+    assert pico < FRACAO_MAXIMA_DO_PICO_SEM_COPY_ON_WRITE * pico_sem_copia_sob_escrita, (
+        f"Pico de {pico / 1024 ** 2:.1f} MB com copy-on-write e "
+        f"{pico_sem_copia_sob_escrita / 1024 ** 2:.1f} MB sem"
+    )
+    # O modo não altera o resultado
+    pd.testing.assert_frame_equal(df_lote, esperado)
+
+
+def test_pico_de_memoria_da_carga_das_fontes_fica_abaixo_de_multiplo_da_entrada():
+    fontes = gerar_fontes_sinteticas(escala=0.5, semente=3)
+    tamanho_entrada = sum(df.memory_usage(deep=True).sum() for df in fontes.values())
+
+    # Pico por etapa medido pela instrumentação do pipeline
+    with _ambiente_sintetico(fontes), \
+         patch.object(execucao_pipeline, "nova_execucao", lambda: instrumentacao.nova_execucao(medir_memoria=True)):
+        try:
+            execucao_pipeline.executar_lote(1, 1, copia_sob_escrita=True)
+            etapas = instrumentacao.obter_instrumentacao().relatorio()["etapas"]
+        finally:
+            # As próximas execuções voltam a não medir memória
+            instrumentacao.nova_execucao(medir_memoria=False)
+    pico = next(etapa["pico_memoria_bytes"] for etapa in etapas if etapa["etapa"] == "carregar_fontes")
+
+    assert pico < MULTIPLO_MAXIMO_DA_ENTRADA_NA_CARGA * tamanho_entrada, (
+        f"Pico de {pico / 1024 ** 2:.1f} MB para {tamanho_entrada / 1024 ** 2:.1f} MB de entrada"
+    )
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from receitas_orc.services.dicionarios_categoricos import DicionariosCategoricos, decodificar
+
+
+def test_mesmo_texto_recebe_o_mesmo_codigo_em_todos_os_dataframes():
+    df_a = pd.DataFrame({"PROJETO": ["X", "Y"], "VALOR": [1, 2]})
+    df_b = pd.DataFrame({"PROJETO": ["Z", "X", None], "CC": ["C1", "C2", "C1"]})
+    dicionarios = DicionariosCategoricos()
+
+    dicionarios.registrar(df_a, df_b, None)
+    a, b = dicionarios.codificar(df_a), dicionarios.codificar(df_b)
+
+    assert a["PROJETO"].dtype == b["PROJETO"].dtype
+    assert a["PROJETO"].cat.codes.tolist() == [0, 1]
+    assert b["PROJETO"].cat.codes.tolist() == [2, 0, -1]
+    assert a["VALOR"].dtype == np.int64
+    assert dicionarios.tamanho()["CC"] == 2
+
+
+def test_merge_entre_dataframes_codificados_preserva_o_dtype():
+    dicionarios = DicionariosCategoricos()
+    df_a = pd.DataFrame({"PROJETO": ["X", "Y"], "ACAO": ["A1", "A2"]})
+    df_b = pd.DataFrame({"PROJETO": ["Y", "X"], "ACAO": ["A2", "A1"], "CC": ["C2", "C1"]})
+    dicionarios.registrar(df_a, df_b)
+
+    resultado = dicionarios.codificar(df_a).merge(dicionarios.codificar(df_b), on=["PROJETO", "ACAO"])
+
+    assert isinstance(resultado["PROJETO"].dtype, pd.CategoricalDtype)
+    assert decodificar(resultado)["CC"].tolist() == ["C1", "C2"]
+
+
+def test_decodificar_sem_categoricas_devolve_o_mesmo_dataframe():
+    df = pd.DataFrame({"A": [1]})
+    assert decodificar(df) is df
@@ -0,0 +1,117 @@
+import json
+import tracemalloc
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from receitas_orc.services import execucao_pipeline
+from receitas_orc.services.exportadores import (
+    ExportadorCsv, ExportadorExcel, ExportadorParquet, obter_exportador, tipo_coluna, tipos_colunas
+)
+
+
+def _resultado(linhas: int = 5) -> pd.DataFrame:
+    return pd.DataFrame({
+        "PROJETO": [f"Projeto {i}" for i in range(linhas)],
+        "CC": [f"CC{i}" for i in range(linhas)],
+        "CSN_APROPRIAR_ANUAL": np.linspace(0, 1000, linhas) + 0.123456,
+        "Receita (%)": np.full(linhas, 0.123456),
+        "MES_REFERENCIA": np.arange(linhas) % 12 + 1,
+        "VALOR_NULO": [np.nan] * linhas,
+    })
+
+
+def test_regras_de_formatacao():
+    assert tipo_coluna("Receita (%)", np.dtype(float)) == "percentual"
+    assert tipo_coluna("PROJETO", np.dtype(object)) == "texto"
+    assert tipo_coluna("MES_REFERENCIA", np.dtype(int)) == "texto"
+    assert tipo_coluna("DATA", np.dtype("datetime64[ns]")) == "data"
+    assert tipo_coluna("CSN_APROPRIAR_ANUAL", np.dtype(float)) == "moeda"
+    assert tipo_coluna("UNIDADE", np.dtype(object)) == "texto"
+    assert tipo_coluna(execucao_pipeline.COLUNA_MES_REFERENCIA, np.dtype(int)) == "texto"
+
+
+def test_excel_grava_todas_as_linhas_com_formatos_de_coluna(tmp_path):
+    caminho = str(tmp_path / "resultado.xlsx")
+
+    linhas = ExportadorExcel(tamanho_bloco=2).exportar(_resultado(5), caminho)
+
+    assert linhas == 5
+    with zipfile.ZipFile(caminho) as arquivo:
+        planilha = arquivo.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        estilos = arquivo.read("xl/styles.xml").decode("utf-8")
+    assert planilha.count("<row ") == 6  # cabeçalho + 5 linhas
+    assert "Projeto 4" in planilha
+    assert planilha.count("<col ") == 3  # moeda, percentual e a coluna nula (moeda)
+    assert "#,##0.00" in estilos and "0.00%" in estilos
+
+
+def test_excel_continua_em_nova_planilha_ao_atingir_o_limite_de_linhas(tmp_path):
+    caminho = str(tmp_path / "resultado.xlsx")
+
+    # 3 linhas por planilha: cabeçalho + 2 linhas do resultado
+    linhas = ExportadorExcel(tamanho_bloco=4, linhas_por_planilha=3).exportar(_resultado(5), caminho)
+
+    assert linhas == 5
+    with zipfile.ZipFile(caminho) as arquivo:
+        planilhas = [arquivo.read(f"xl/worksheets/sheet{i}.xml").decode("utf-8") for i in (1, 2, 3)]
+        livro = arquivo.read("xl/workbook.xml").decode("utf-8")
+    assert [planilha.count("<row ") for planilha in planilhas] == [3, 3, 2]
+    assert all("CSN_APROPRIAR_ANUAL" in planilha for planilha in planilhas)
+    assert "Projeto 4" in planilhas[2]
+    assert 'name="Resultado_2"' in livro and 'name="Resultado_3"' in livro
+
+
+def test_parquet_preserva_dados_e_grava_formatos(tmp_path):
+    caminho = str(tmp_path / "resultado.parquet")
+    df = _resultado(7)
+
+    assert ExportadorParquet(tamanho_bloco=3).exportar(df, caminho) == 7
+
+    pd.testing.assert_frame_equal(pd.read_parquet(caminho), df)
+    arquivo = pq.ParquetFile(caminho)
+    assert arquivo.num_row_groups == 3
+    formatos = json.loads(arquivo.schema_arrow.metadata[b"receitas_orc.formatos"])
+    assert formatos == tipos_colunas(df)
+
+
+def test_csv_grava_cabecalho_uma_vez_e_arredonda(tmp_path):
+    caminho = str(tmp_path / "resultado.csv")
+
+    assert ExportadorCsv(tamanho_bloco=2).exportar(_resultado(5), caminho) == 5
+
+    lido = pd.read_csv(caminho, sep=";", decimal=",", encoding="utf-8-sig")
+    assert list(lido.columns) == list(_resultado().columns)
+    assert len(lido) == 5
+    assert lido["CSN_APROPRIAR_ANUAL"].iloc[0] == 0.12
+    assert lido["Receita (%)"].iloc[0] == 0.1235
+
+
+@pytest.mark.parametrize("formato", ["xlsx", "parquet", "csv"])
+def test_exportar_resultado_troca_a_extensao(tmp_path, formato):
+    destino = str(tmp_path / "resultado_pipeline.xlsx")
+
+    caminho = execucao_pipeline.exportar_resultado(_resultado(3), destino, formato)
+
+    assert caminho == str(tmp_path / f"resultado_pipeline.{formato}")
+    assert execucao_pipeline.exportar_resultado(pd.DataFrame(), destino, formato) is None
+
+
+def test_formato_invalido():
+    with pytest.raises(ValueError):
+        obter_exportador("ods")
+
+
+def test_memoria_do_excel_nao_cresce_com_o_resultado(tmp_path):
+    def pico(linhas: int) -> int:
+        df = _resultado(linhas)
+        tracemalloc.start()
+        ExportadorExcel(tamanho_bloco=500).exportar(df, str(tmp_path / f"r{linhas}.xlsx"))
+        maximo = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return maximo
+
+    assert pico(20000) < 2 * pico(5000)
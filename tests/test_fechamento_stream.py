@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from receitas_orc.services.fechamento_stream import AgregadorFechamento
+
+
+def _fato_fechamento(n_linhas: int = 600) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({
+        "DATA": pd.to_datetime("2025-01-01") + pd.to_timedelta(rng.integers(0, 365, n_linhas), unit="D"),
+        "CC": rng.choice(["000001.000001.001", "000001.000002.002", "000002.000001.003"], n_linhas),
+        "VALOR": rng.normal(1000, 250, n_linhas).round(2),
+    })
+
+
+def test_agregador_em_blocos_equivale_ao_filtro_completo():
+    df = _fato_fechamento()
+    blocos = (df.iloc[i:i + 97] for i in range(0, len(df), 97))
+    agregador = AgregadorFechamento().consumir(blocos)
+
+    for mes in (1, 6, 12):
+        esperado_mes = df[df["DATA"].dt.month == mes].groupby("CC")["VALOR"].sum()
+        esperado_ano = df[df["DATA"].dt.month <= mes].groupby("CC")["VALOR"].sum()
+
+        obtido_mes = agregador.mensal(mes).set_index("CC")["VALOR"]
+        obtido_ano = agregador.acumulado(mes).set_index("CC")["VALOR"]
+
+        pd.testing.assert_series_equal(obtido_mes, esperado_mes, check_names=False)
+        pd.testing.assert_series_equal(obtido_ano, esperado_ano, check_names=False)
+
+    assert agregador.linhas_lidas == len(df)
+
+
+def test_agregador_ignora_datas_invalidas_e_sem_dados():
+    agregador = AgregadorFechamento()
+    assert agregador.mensal(1).empty
+
+    agregador.adicionar(pd.DataFrame({"DATA": ["2025-03-10", None], "CC": ["A", "A"], "VALOR": [10.0, 99.0]}))
+
+    assert agregador.mensal(3)["VALOR"].tolist() == [10.0]
+    assert agregador.mensal(4).empty
+
+
+def test_agregador_separa_os_anos_de_uma_leitura_com_varios_anos():
+    df_2024 = _fato_fechamento().assign(DATA=lambda df: df["DATA"] - pd.DateOffset(years=1))
+    df_2025 = _fato_fechamento(400)
+    df = pd.concat([df_2024, df_2025], ignore_index=True).sample(frac=1, random_state=3)
+    blocos = (df.iloc[i:i + 113] for i in range(0, len(df), 113))
+    agregador = AgregadorFechamento().consumir(blocos)
+
+    for ano, df_ano in ((2024, df_2024), (2025, df_2025)):
+        for mes in (1, 6, 12):
+            esperado_mes = df_ano[df_ano["DATA"].dt.month == mes].groupby("CC")["VALOR"].sum()
+            esperado_ano = df_ano[df_ano["DATA"].dt.month <= mes].groupby("CC")["VALOR"].sum()
+
+            obtido_mes = agregador.mensal(mes, ano).set_index("CC")["VALOR"]
+            obtido_ano = agregador.acumulado(mes, ano).set_index("CC")["VALOR"]
+
+            pd.testing.assert_series_equal(obtido_mes, esperado_mes, check_names=False)
+            pd.testing.assert_series_equal(obtido_ano, esperado_ano, check_names=False)
+
+    # Sem ano, vale o mais recente da leitura
+    pd.testing.assert_frame_equal(agregador.acumulado(6), agregador.acumulado(6, 2025))
+    assert agregador.mensal(1, 2023).empty
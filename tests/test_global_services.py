@@ -4,6 +4,13 @@ from unittest.mock import patch, MagicMock
 from receitas_orc.services import global_services
 
 
+@pytest.fixture(autouse=True)
+def limpar_registro_engines():
+    global_services.descartar_engines()
+    yield
+    global_services.descartar_engines()
+
+
 # ----------------------------- Testes de selecionar_consulta_por_nome ----------------------------- #
 
 @patch.dict("receitas_orc.services.global_services.CONEXOES", {
@@ -104,3 +111,146 @@ def test_funcao_conexao_azure_sql(mock_create_engine):
 def test_funcao_conexao_tipo_invalido():
     with pytest.raises(ValueError):
         global_services.funcao_conexao("CONEX_INVALIDA")
+
+
+# ----------------------------- Testes do modo paralelo ----------------------------- #
+
+@patch("receitas_orc.services.global_services.CriadorDataFrame")
+def test_selecionar_consulta_por_nome_paralelo_preserva_ordem(mock_criador_df):
+    def criar_executor(funcao, conexao, consulta, tipo):
+        instancia = MagicMock()
+        instancia.executar.return_value = pd.DataFrame({"conexao": [conexao]})
+        return instancia
+
+    mock_criador_df.side_effect = criar_executor
+
+    nomes = ["FatoFechamento", "cc", "acoes"]
+    resultado = global_services.selecionar_consulta_por_nome(nomes, paralelo=True, max_workers=3)
+
+    assert list(resultado.keys()) == nomes
+    assert resultado["cc"]["conexao"].iloc[0] == "SPSVSQL39_HubDados"
+    assert resultado["FatoFechamento"]["conexao"].iloc[0] == "SPSVSQL39_FINANCA"
+
+
+@patch("receitas_orc.services.global_services.CriadorDataFrame")
+def test_selecionar_consulta_por_nome_paralelo_sobrepoe_consultas(mock_criador_df):
+    import threading
+    import time
+
+    barreira = threading.Barrier(3, timeout=5)
+
+    def executar_lento():
+        # Só libera quando as três consultas estiverem em andamento ao mesmo tempo
+        barreira.wait()
+        time.sleep(0.05)
+        return pd.DataFrame({"col": [1]})
+
+    mock_criador_df.return_value.executar.side_effect = executar_lento
+
+    resultado = global_services.selecionar_consulta_por_nome("cc, acoes, FatoFechamento", paralelo=True)
+
+    assert all(not df.empty for df in resultado.values())
+
+
+# ----------------------------- Testes do registro de engines ----------------------------- #
+
+@patch.dict("receitas_orc.services.global_services.CONEXOES", {
+    "SPSVSQL39": {
+        "tipo": "sql",
+        "servidor": "localhost",
+        "banco": "testdb",
+        "driver": "{ODBC Driver 17 for SQL Server}",
+        "trusted_connection": True,
+        "pool": {"pool_size": 2}
+    }
+})
+@patch("sqlalchemy.create_engine")
+def test_obter_engine_reaproveita_engine_e_aplica_pool(mock_create_engine):
+    engine_1 = global_services.obter_engine("SPSVSQL39")
+    engine_2 = global_services.obter_engine("SPSVSQL39")
+
+    assert engine_1 is engine_2
+    mock_create_engine.assert_called_once()
+    _, kwargs = mock_create_engine.call_args
+    assert kwargs["pool_size"] == 2
+    assert kwargs["pool_pre_ping"] is True
+    assert kwargs["pool_recycle"] == global_services.POOL_PADRAO["pool_recycle"]
+
+
+@patch("receitas_orc.services.global_services.funcao_conexao")
+def test_conexao_pool_devolve_conexao_mesmo_com_erro(mock_funcao_conexao):
+    mock_conn = MagicMock()
+    mock_funcao_conexao.return_value = mock_conn
+
+    with pytest.raises(RuntimeError):
+        with global_services.conexao_pool("SPSVSQL39_FINANCA") as conexao:
+            assert conexao is mock_conn
+            raise RuntimeError("falha")
+
+    mock_conn.close.assert_called_once()
+
+
+@patch("receitas_orc.services.global_services.CriadorDataFrame")
+def test_selecionar_consulta_por_nome_repassa_parametros(mock_criador_df):
+    mock_criador_df.return_value.executar.return_value = pd.DataFrame({"col": [1]})
+
+    global_services.selecionar_consulta_por_nome(
+        "FatoFechamento, acoes",
+        parametros={"ano": 2024},
+        parametros_por_consulta={"FatoFechamento": {"mes_fim": 2}}
+    )
+
+    textos = {c.args[1]: c.args[2] for c in mock_criador_df.call_args_list}
+    assert "DATA >= '20240101' AND DATA < '20240301'" in textos["SPSVSQL39_FINANCA"]
+    assert "&[202412]" in textos["OLAP_SME"]
+
+
+# ----------------------------- Testes da carga em massa ----------------------------- #
+
+@patch("receitas_orc.services.global_services.funcao_conexao")
+@patch("pandas.DataFrame.to_sql")
+def test_salvar_no_financa_atomico_usa_staging_e_troca(mock_to_sql, mock_funcao_conexao):
+    mock_conn = MagicMock()
+    mock_funcao_conexao.return_value = mock_conn
+    df = pd.DataFrame({"PROJETO": ["A", "BB"], "VALOR": [1.5, 2.0], "QTD": [1, 2]})
+
+    global_services.salvar_no_financa(df, "resultado_apropriacao", tamanho_bloco=500)
+
+    kwargs = mock_to_sql.call_args.kwargs
+    assert kwargs["name"] == "resultado_apropriacao__staging"
+    assert kwargs["chunksize"] == 500
+    assert kwargs["dtype"]["PROJETO"].length == 2
+
+    comandos = " ".join(c.args[0] for c in mock_conn.exec_driver_sql.call_args_list)
+    assert "sp_rename N'dbo.resultado_apropriacao', N'resultado_apropriacao__antiga'" in comandos
+    assert "sp_rename N'dbo.resultado_apropriacao__staging', N'resultado_apropriacao'" in comandos
+    mock_conn.begin.assert_called_once()
+    mock_conn.close.assert_called_once()
+
+
+@patch("receitas_orc.services.global_services.funcao_conexao")
+@patch("pandas.DataFrame.to_sql")
+def test_salvar_no_financa_rejeita_nome_de_tabela_invalido(mock_to_sql, mock_funcao_conexao):
+    mock_funcao_conexao.return_value = MagicMock()
+    global_services.salvar_no_financa(pd.DataFrame({"col": [1]}), "tabela; DROP TABLE x")
+    mock_to_sql.assert_not_called()
+
+
+@patch("receitas_orc.services.global_services.funcao_conexao")
+@patch("receitas_orc.services.global_services.publicar_incremental", return_value={})
+def test_salvar_no_financa_upsert_usa_a_particao_do_lote_como_chave(mock_publicar, mock_funcao_conexao):
+    from receitas_orc.benchmarks.dados_sinteticos import gerar_fontes_sinteticas
+    from receitas_orc.services import execucao_pipeline
+
+    mock_funcao_conexao.return_value = MagicMock()
+    fontes = gerar_fontes_sinteticas(escala=0.1, semente=3)
+    with patch.object(execucao_pipeline, "FECHAMENTO_EM_BLOCOS", False), \
+         patch.object(execucao_pipeline, "selecionar_consulta_por_nome", return_value=fontes), \
+         patch.object(execucao_pipeline, "exportar_resultado"):
+        df_lote = execucao_pipeline.executar_lote(1, 3)
+
+    global_services.salvar_no_financa(df_lote, "resultado_apropriacao", modo="upsert")
+
+    chaves = mock_publicar.call_args.args[3]
+    assert chaves == ["PROJETO", "ACAO", "CC", execucao_pipeline.COLUNA_MES_REFERENCIA]
+    assert not df_lote.duplicated(subset=chaves).any()
@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from receitas_orc.services.indice_mensal import IndiceMensal, adicionar_chave_mes, interpretar_fotografia
+from receitas_orc.services.pipeline_service import filtrar_por_mes_indexado, filtrar_por_mes_string
+
+
+@pytest.fixture
+def df_ppa():
+    return pd.DataFrame({
+        'FotografiaPPA': ['31/Jan', '28/Fev', '31/jan', None, '31/Mar/2024', 'Sem data', '28/Fev'],
+        'VALOR': [1, 2, 3, 4, 5, 6, 7],
+    }, index=[10, 11, 12, 13, 14, 15, 16])
+
+
+@pytest.mark.parametrize("legenda, esperado", [
+    ('31/Jan', (1, pd.Timestamp(2025, 1, 31))),
+    ('PPA 30/SET', (9, pd.Timestamp(2025, 9, 30))),
+    ('31/Mar/2024', (3, pd.Timestamp(2024, 3, 31))),
+    ('/Dez', (12, pd.NaT)),
+    ('30/Fev', (2, pd.NaT)),
+    ('Sem data', (0, pd.NaT)),
+    (None, (0, pd.NaT)),
+])
+def test_interpretar_fotografia(legenda, esperado):
+    mes, data = interpretar_fotografia(legenda, ano_padrao=2025)
+    assert mes == esperado[0]
+    assert (pd.isna(data) and pd.isna(esperado[1])) or data == esperado[1]
+
+
+def test_legendas_distintas_sao_interpretadas_uma_vez(df_ppa):
+    with patch("receitas_orc.services.indice_mensal.interpretar_fotografia",
+               wraps=interpretar_fotografia) as interpretar:
+        df = adicionar_chave_mes(df_ppa, ano_padrao=2025)
+
+    assert interpretar.call_count == 5  # 31/Jan, 28/Fev, 31/jan, 31/Mar/2024, Sem data
+    assert df['MES_PPA'].tolist() == [1, 2, 1, 0, 3, 0, 2]
+    assert df['DATA_FOTOGRAFIA'].iloc[1] == pd.Timestamp(2025, 2, 28)
+
+
+@pytest.mark.parametrize("mes", range(1, 13))
+def test_indice_equivale_ao_filtro_textual(df_ppa, mes):
+    indice = IndiceMensal(adicionar_chave_mes(df_ppa, ano_padrao=2025))
+
+    esperado = filtrar_por_mes_string(df_ppa, mes, "PPA", "FotografiaPPA")
+    resultado = filtrar_por_mes_indexado(indice, mes, "PPA")
+
+    pd.testing.assert_frame_equal(resultado[df_ppa.columns], esperado)
+
+
+@pytest.mark.parametrize("mes", [0, 13])
+def test_mes_invalido_retorna_vazio(df_ppa, mes):
+    indice = IndiceMensal(adicionar_chave_mes(df_ppa))
+
+    resultado = filtrar_por_mes_indexado(indice, mes, "PPA")
+
+    assert resultado.empty
+    assert list(resultado.columns[:2]) == list(df_ppa.columns)
+
+
+def test_filtro_textual_usa_chave_pre_calculada(df_ppa):
+    df = adicionar_chave_mes(df_ppa, ano_padrao=2025)
+    df['FotografiaPPA'] = None  # A legenda não é mais consultada
+
+    assert filtrar_por_mes_string(df, 2, "PPA", "FotografiaPPA")['VALOR'].tolist() == [2, 7]
+
+
+def test_meses_presentes(df_ppa):
+    indice = IndiceMensal(adicionar_chave_mes(df_ppa))
+    assert indice.meses() == [1, 2, 3]
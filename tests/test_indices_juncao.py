@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from receitas_orc.benchmarks.dados_sinteticos import gerar_fontes_sinteticas
+from receitas_orc.services.dataframe_processing import classificar_projetos_em_dataframe, renomear_colunas_padrao
+from receitas_orc.services.dicionarios_categoricos import DicionariosCategoricos
+from receitas_orc.services.indice_mensal import IndiceMensal, adicionar_chave_mes
+from receitas_orc.services.indices_juncao import IndiceJuncao, IndicesJuncao
+from receitas_orc.services.pipeline_service import _preparar_dados_base, filtrar_por_mes_indexado
+from receitas_orc.services.receitas_natureza import NATUREZAS_MATERIALIZADAS
+
+PROJETO_ESPECIAL = 'Suporte a Negócios - Remuneração de Recursos Humanos Relacionado a Negócios'
+
+
+def _preparar_por_merge(df_receitas, df_despesas, df_cc, df_fechamento_mes, df_fechamento_anual):
+    """Abordagem anterior: merges e groupby refeitos a cada mês."""
+    pivot = pd.pivot_table(df_receitas, values='VALOR_RECEITA_AJUSTADO', index='PROJETO', columns='DESCNVL4',
+                           aggfunc='sum', fill_value=0, observed=True)
+    pivot['Soma_Total'] = pivot[pivot.columns.drop('Total_Receita_Orcada', errors='ignore')].sum(axis=1)
+    agg = df_despesas.groupby(['PROJETO', 'ACAO', 'TipoRegra'], observed=True).agg(
+        VALOR_DESPESA_AJUSTADO=('VALOR_DESPESA_AJUSTADO', 'sum'), FotografiaPPA=('FotografiaPPA', 'first')
+    ).reset_index()
+    agg['TOTAL_DESPESA_PROJETO'] = agg.groupby('PROJETO', observed=True)['VALOR_DESPESA_AJUSTADO'].transform('sum')
+    df = pd.merge(pd.merge(agg, df_cc, on=['PROJETO', 'ACAO'], how='left'), pivot.reset_index(), on='PROJETO', how='left')
+    df['Coeficiente_DespesaReceita'] = df['Soma_Total'] / df['TOTAL_DESPESA_PROJETO']
+    for sufixo, fechamento in (('MES', df_fechamento_mes), ('ANO', df_fechamento_anual)):
+        por_cc = fechamento.groupby('CC', observed=True)['VALOR'].sum()
+        por_cc.index = por_cc.index.astype(object)
+        df[f'TOTAL_DESPESA_EXECUTADO_{sufixo}'] = df['CC'].astype(object).map(por_cc).astype(float).fillna(0)
+    for sufixo in ('MES', 'ANO'):
+        df[f'TOTAL_DESPESA_EXECUTADO_{sufixo}_PROJETO'] = (
+            df.groupby('PROJETO', observed=True)[f'TOTAL_DESPESA_EXECUTADO_{sufixo}'].transform('sum')
+        )
+    alvo = np.where(df['PROJETO'] == PROJETO_ESPECIAL, (df['PROJETO'] == PROJETO_ESPECIAL) &
+                    (df['UNIDADE'] == 'SP - Atendimento ao Cliente'), ~df.duplicated(subset=['PROJETO']))
+    for coluna in ['CSN Programas e Projetos Nacionais', 'Convênios, Subvenções e Auxílios', 'Empresas Beneficiadas',
+                   'Soma_Total', 'TOTAL_DESPESA_PROJETO', 'TOTAL_DESPESA_EXECUTADO_MES_PROJETO',
+                   'TOTAL_DESPESA_EXECUTADO_ANO_PROJETO']:
+        if coluna in df.columns:
+            df[coluna] = np.where(alvo, df[coluna], 0)
+    return df
+
+
+def _entradas_sinteticas(codificar: bool, mes: int = 6):
+    fontes = gerar_fontes_sinteticas(escala=0.5, semente=11)
+    df_orcadas, df_acoes, df_exec, df_percent = (
+        renomear_colunas_padrao(fontes[nome])
+        for nome in ("RECEITAS_ORCADAS_2025", "acoes", "RECEITAS_EXEC_2025", "RECEITAS_DESPESAS_PERCENT")
+    )
+    df_orcadas, df_acoes = classificar_projetos_em_dataframe(df_orcadas), classificar_projetos_em_dataframe(df_acoes)
+    df_cc, df_fechamento = fontes["cc"], fontes["FatoFechamento"]
+    if codificar:
+        todas = (df_orcadas, df_acoes, df_cc, df_exec, df_percent, df_fechamento)
+        dicionarios = DicionariosCategoricos()
+        dicionarios.registrar(*todas)
+        df_orcadas, df_acoes, df_cc, df_exec, df_percent, df_fechamento = (dicionarios.codificar(df) for df in todas)
+
+    df_despesas, df_receitas, df_exec_mes = (
+        filtrar_por_mes_indexado(IndiceMensal(adicionar_chave_mes(df)), mes, "teste") for df in (df_acoes, df_orcadas, df_exec)
+    )
+    meses = df_fechamento['DATA'].dt.month.to_numpy()
+    return df_receitas, df_despesas, df_cc, df_fechamento[meses == mes], df_exec_mes, df_percent, df_fechamento[meses <= mes]
+
+
+def test_juntar_esquerda_equivale_ao_merge():
+    df_cc = pd.DataFrame({
+        'PROJETO': ['P1', 'P2', 'P1', 'P3', 'P1'],
+        'ACAO': ['A', 'A', 'A', 'B', 'B'],
+        'CC': [10, 20, 11, 30, 12],
+        'UNIDADE': pd.Categorical(['U1', 'U2', 'U1', 'U3', 'U4']),
+    })
+    df_esquerda = pd.DataFrame({
+        'PROJETO': ['P1', 'P9', 'P1', 'P3'],
+        'ACAO': ['A', 'A', 'B', 'B'],
+        'VALOR': [1.0, 2.0, 3.0, 4.0],
+    }, index=[7, 5, 3, 1])
+
+    resultado, linhas_esquerda = IndiceJuncao(df_cc, ['PROJETO', 'ACAO']).juntar_esquerda(df_esquerda)
+
+    pd.testing.assert_frame_equal(resultado, pd.merge(df_esquerda, df_cc, on=['PROJETO', 'ACAO'], how='left'))
+    np.testing.assert_array_equal(linhas_esquerda, [0, 0, 1, 2, 3])
+
+
+def test_juntar_esquerda_preserva_inteiros_quando_todas_as_chaves_casam():
+    df_cc = pd.DataFrame({'PROJETO': ['P1', 'P2'], 'CC': [10, 20]})
+    df_esquerda = pd.DataFrame({'PROJETO': ['P2', 'P1', 'P2']})
+
+    resultado, _ = IndiceJuncao(df_cc, ['PROJETO']).juntar_esquerda(df_esquerda)
+
+    pd.testing.assert_frame_equal(resultado, pd.merge(df_esquerda, df_cc, on='PROJETO', how='left'))
+    assert resultado['CC'].dtype == np.int64
+
+
+def test_somar_por_cc_ignora_ccs_fora_do_cadastro_e_aceita_categoricos():
+    indices = IndicesJuncao(pd.DataFrame({'PROJETO': ['P1', 'P1', 'P2'], 'ACAO': ['A', 'B', 'A'], 'CC': ['c1', 'c2', 'c3']}))
+    df_fechamento = pd.DataFrame({'CC': ['c3', 'c1', 'x', 'c3', None], 'VALOR': [1.0, 2.0, 4.0, 8.0, 16.0]})
+
+    esperado = [2.0, 0.0, 9.0]
+    np.testing.assert_array_equal(indices.somar_por_cc(df_fechamento), esperado)
+    df_fechamento['CC'] = df_fechamento['CC'].astype('category')
+    np.testing.assert_array_equal(indices.somar_por_cc(df_fechamento), esperado)
+    np.testing.assert_array_equal(indices.somar_por_cc(pd.DataFrame()), [0.0, 0.0, 0.0])
+
+
+@pytest.mark.parametrize("codificar", [False, True])
+def test_preparar_dados_base_equivale_aos_merges(codificar):
+    entradas = _entradas_sinteticas(codificar)
+    df_receitas, df_despesas, df_cc, df_fechamento_mes, _, _, df_fechamento_anual = entradas
+
+    esperado = _preparar_por_merge(df_receitas, df_despesas, df_cc, df_fechamento_mes, df_fechamento_anual)
+    resultado = _preparar_dados_base(*entradas, indices_juncao=IndicesJuncao(df_cc))
+
+    # As naturezas de receita não lidas pelas estratégias ficam fora da base (formato longo)
+    nao_materializadas = set(df_receitas['DESCNVL4'].unique()) - set(NATUREZAS_MATERIALIZADAS)
+    assert len(resultado) > 0 and nao_materializadas
+    pd.testing.assert_frame_equal(resultado, esperado.drop(columns=list(nao_materializadas)), check_dtype=False)
+    # Sem índices pré-construídos, o resultado é o mesmo
+    pd.testing.assert_frame_equal(_preparar_dados_base(*entradas), resultado)
@@ -0,0 +1,85 @@
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from receitas_orc.utils.instrumentacao import Instrumentacao, instrumentar, nova_execucao, obter_instrumentacao
+
+
+def test_etapa_registra_tempos_linhas_e_bytes():
+    instr = Instrumentacao(medir_memoria=False)
+    df = pd.DataFrame({"A": np.arange(100)})
+
+    with instr.etapa("filtrar", mes=3) as etapa:
+        etapa.entrada(df)
+        time.sleep(0.01)
+        etapa.saida(df.head(10), (df.head(5), None))
+
+    registro = instr.relatorio()["etapas"][0]
+    assert registro["etapa"] == "filtrar"
+    assert registro["rotulos"] == {"mes": 3}
+    assert registro["tempo_s"] >= 0.01
+    assert registro["linhas_entrada"] == 100 and registro["linhas_saida"] == 15
+    assert registro["bytes_entrada"] >= 800
+    assert "pico_memoria_bytes" not in registro
+
+
+def test_etapas_aninhadas_herdam_rotulos_e_propagam_pico_de_memoria():
+    instr = Instrumentacao(medir_memoria=True)
+    try:
+        with instr.etapa("externa", mes=5):
+            with instr.etapa("interna"):
+                grande = np.ones(2_000_000)  # ~16 MB alocados só na etapa interna
+                del grande
+    finally:
+        instr.encerrar()
+
+    interna, externa = instr.relatorio()["etapas"]
+    assert interna["pai"] == "externa" and interna["rotulos"] == {"mes": 5}
+    assert interna["pico_memoria_bytes"] >= 16_000_000
+    assert externa["pico_memoria_bytes"] >= interna["pico_memoria_bytes"]
+    assert not tracemalloc.is_tracing()
+
+
+def test_decorador_usa_a_instrumentacao_padrao():
+    @instrumentar("dobrar")
+    def dobrar(df):
+        return pd.concat([df, df])
+
+    nova_execucao(medir_memoria=False)
+    dobrar(pd.DataFrame({"A": [1, 2, 3]}))
+
+    registro = obter_instrumentacao().relatorio()["etapas"][-1]
+    assert (registro["etapa"], registro["linhas_entrada"], registro["linhas_saida"]) == ("dobrar", 3, 6)
+
+
+def test_etapa_com_erro_tambem_e_registrada():
+    instr = Instrumentacao(medir_memoria=False)
+
+    with pytest.raises(ValueError):
+        with instr.etapa("falha"):
+            raise ValueError("erro")
+
+    assert instr.relatorio()["etapas"][0]["etapa"] == "falha"
+
+
+def test_gravar_relatorios_json_e_prometheus(tmp_path):
+    instr = Instrumentacao(medir_memoria=False)
+    with instr.etapa("consulta", consulta='RECEITAS "2025"') as etapa:
+        etapa.saida(pd.DataFrame({"A": [1, 2]}))
+
+    caminho_json = instr.gravar_relatorios(str(tmp_path))
+
+    relatorio = json.loads(open(caminho_json, encoding="utf-8").read())
+    assert relatorio["id_execucao"] == instr.id_execucao
+    prometheus = (tmp_path / "receitas_orc.prom").read_text(encoding="utf-8")
+    assert "# TYPE receitas_orc_etapa_duracao_segundos gauge" in prometheus
+    assert f'receitas_orc_etapa_linhas_saida{{execucao="{instr.id_execucao}",etapa="consulta",pai="",consulta="RECEITAS \\"2025\\""}} 2' in prometheus
+    assert "pico_memoria_bytes" not in prometheus
+
+
+def test_sem_diretorio_nao_grava():
+    assert Instrumentacao(medir_memoria=False).gravar_relatorios("") is None
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from receitas_orc.services.kernels_projeto import (
+    difundir, linhas_alvo, mascarar, primeira_linha_por_projeto, somar_por_projeto
+)
+
+
+def _df():
+    return pd.DataFrame({
+        'PROJETO': ['a', 'b', None, 'a', 'b', None, 'c'],
+        'UNIDADE': ['U1', 'U2', 'U1', 'U9', 'U2', 'U3', None],
+        'X': [1.0, np.nan, 5.0, 3.0, 2.0, 1.0, 4.0],
+        'Y': [1, 2, 3, 4, 5, 6, 7],
+    })
+
+
+def test_somar_e_difundir_equivalem_ao_transform():
+    df = _df()
+    codigos, projetos = pd.factorize(df['PROJETO'])
+
+    totais = somar_por_projeto(codigos, len(projetos), df[['X', 'Y']].to_numpy(dtype=np.float64))
+    por_linha = difundir(totais, codigos)
+
+    assert totais.shape == (3, 2)
+    for coluna, nome in enumerate(['X', 'Y']):
+        np.testing.assert_array_equal(por_linha[:, coluna], df.groupby('PROJETO')[nome].transform('sum').to_numpy())
+    # Uma única coluna (1-D)
+    np.testing.assert_array_equal(somar_por_projeto(codigos, len(projetos), df['Y'].to_numpy())[:, 0], [5.0, 7.0, 7.0])
+
+
+def test_primeira_linha_equivale_ao_duplicated():
+    df = _df()
+    codigos, _ = pd.factorize(df['PROJETO'])
+
+    np.testing.assert_array_equal(primeira_linha_por_projeto(codigos), ~df.duplicated(subset=['PROJETO']).to_numpy())
+
+
+def test_linhas_alvo_com_projeto_especial_e_mascara_2d():
+    df = _df()
+    codigos, projetos = pd.factorize(df['PROJETO'])
+
+    alvo = linhas_alvo(codigos, projetos, {'a': 'U9'}, df['UNIDADE'])
+
+    np.testing.assert_array_equal(alvo, [False, True, True, True, False, False, True])
+    bloco = df[['X', 'Y']].to_numpy(dtype=np.float64)
+    mascarado = mascarar(bloco, alvo)
+    np.testing.assert_array_equal(mascarado[~alvo], 0.0)
+    np.testing.assert_array_equal(mascarado[alvo], bloco[alvo])
@@ -69,7 +69,7 @@ def test_main_com_mocks(monkeypatch):
         mock_sel.return_value = {"RECEITAS_ORCADAS_2025": df_fake}
         mock_filt.return_value = df_fake
 
-        main()
+        main([])
 
         mock_sel.assert_called_once()
         mock_filt.assert_called_once()
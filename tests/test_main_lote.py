@@ -0,0 +1,143 @@
+import argparse
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from receitas_orc import main as modulo_main
+from receitas_orc.services import execucao_pipeline
+
+
+def _fontes_brutas(projetos=("Crie - Games",)):
+    meses = ["31/Jan", "28/Fev", "31/Mar"] * len(projetos)
+    por_mes = [projeto for projeto in projetos for _ in range(3)]
+    ccs = [f"CC{i}" for i in range(1, len(projetos) + 1)]
+    return {
+        "RECEITAS_ORCADAS_2025": pd.DataFrame({
+            "[PPA].[PPA com Fotografia].[Descrição de PPA com Fotografia].[MEMBER_CAPTION]": meses,
+            "[Iniciativa].[Iniciativas].[Iniciativa].[MEMBER_CAPTION]": por_mes,
+            "[Natureza Orçamentária].[Descrição de Natureza 4 nível].[Descrição de Natureza 4 nível].[MEMBER_CAPTION]": ["Empresas Beneficiadas"] * len(meses),
+            "[Measures].[ReceitaAjustado]": [100.0, 200.0, 300.0] * len(projetos),
+        }),
+        "acoes": pd.DataFrame({
+            "[PPA].[PPA com Fotografia].[Descrição de PPA com Fotografia].[MEMBER_CAPTION]": meses,
+            "[Iniciativa].[Iniciativas].[Iniciativa].[MEMBER_CAPTION]": por_mes,
+            "[Ação].[Ação].[Nome de Ação].[MEMBER_CAPTION]": ["Ação 1"] * len(meses),
+            "[Measures].[DespesaAjustado]": [50.0, 50.0, 50.0] * len(projetos),
+        }),
+        "cc": pd.DataFrame({"PROJETO": list(projetos), "ACAO": ["Ação 1"] * len(projetos), "CC": ccs,
+                            "UNIDADE": [f"U{i}" for i in range(1, len(projetos) + 1)]}),
+        "RECEITAS_EXEC_2025": pd.DataFrame({
+            "[PPA].[PPA com Fotografia].[Descrição de PPA com Fotografia].[MEMBER_CAPTION]": ["31/Jan", "28/Fev"],
+            "[Measures].[Executado_Receita_ano]": [1.0, 2.0],
+        }),
+        "RECEITAS_DESPESAS_PERCENT": pd.DataFrame({"PROJETO": list(projetos)}),
+        "FatoFechamento": pd.DataFrame({
+            "DATA": ["2025-01-10", "2025-02-10", "2025-03-10"] * len(projetos),
+            "CC": [cc for cc in ccs for _ in range(3)],
+            "VALOR": [10.0, 20.0, 30.0] * len(projetos),
+        }),
+    }
+
+
+@pytest.fixture
+def ambiente_lote():
+    with patch.object(execucao_pipeline, "FECHAMENTO_EM_BLOCOS", False), \
+         patch.object(execucao_pipeline, "selecionar_consulta_por_nome", return_value=_fontes_brutas()) as selecionar, \
+         patch.object(execucao_pipeline, "exportar_resultado") as exportar:
+        yield selecionar, exportar
+
+
+def test_lote_carrega_uma_vez_e_particiona_por_mes(ambiente_lote):
+    selecionar, exportar = ambiente_lote
+
+    df_lote = execucao_pipeline.executar_lote(1, 3)
+
+    selecionar.assert_called_once()
+    assert selecionar.call_args.kwargs["parametros_por_consulta"] == {"FatoFechamento": {"mes_fim": 3}}
+    assert df_lote.columns[0] == "MES_REFERENCIA"
+    assert df_lote["MES_REFERENCIA"].tolist() == [1, 2, 3]
+    # A despesa acumulada do ano cresce mês a mês sobre os mesmos dados em memória
+    assert df_lote["TOTAL_DESPESA_EXECUTADO_ANO"].tolist() == [10.0, 30.0, 60.0]
+    exportar.assert_called_once_with(df_lote, execucao_pipeline.RESULT_FILE_NAME_LOTE, None)
+
+
+def test_lote_equivale_a_execucoes_mensais(ambiente_lote):
+    df_lote = execucao_pipeline.executar_lote(1, 3)
+
+    for mes in (1, 2, 3):
+        df_mes = execucao_pipeline.processar_mes(execucao_pipeline.carregar_fontes(mes), mes)
+        df_do_lote = df_lote[df_lote["MES_REFERENCIA"] == mes].drop(columns="MES_REFERENCIA")
+        pd.testing.assert_frame_equal(df_do_lote.reset_index(drop=True), df_mes.reset_index(drop=True))
+
+
+@pytest.mark.parametrize("valor, esperado", [("3", (3, 3)), ("1-12", (1, 12))])
+def test_intervalo_meses_valido(valor, esperado):
+    assert modulo_main._intervalo_meses(valor) == esperado
+
+
+@pytest.mark.parametrize("valor", ["0", "13", "5-2", "a-b", "1-2-3"])
+def test_intervalo_meses_invalido(valor):
+    with pytest.raises(argparse.ArgumentTypeError):
+        modulo_main._intervalo_meses(valor)
+
+
+def test_main_despacha_modo_lote_sem_interacao():
+    with patch.object(execucao_pipeline, "executar_lote") as lote, \
+         patch.object(execucao_pipeline, "executar_pipeline") as unico, \
+         patch.object(modulo_main, "configurar_ambiente"):
+        modulo_main.main(["--meses", "1-12"])
+
+    lote.assert_called_once_with(1, 12, snapshot=None, formato=None, detalhar_receitas=None)
+    unico.assert_not_called()
+
+
+def test_main_repassa_detalhamento_das_receitas():
+    with patch.object(execucao_pipeline, "executar_pipeline") as unico, \
+         patch.object(modulo_main, "configurar_ambiente"):
+        modulo_main.main(["--detalhar-receitas", "--formato", "csv"])
+
+    unico.assert_called_once_with(snapshot=None, formato="csv", detalhar_receitas=True)
+
+
+def test_main_mostra_os_grafos_sem_executar(capsys):
+    with patch.object(execucao_pipeline, "executar_lote") as lote, \
+         patch.object(execucao_pipeline, "executar_pipeline") as unico, \
+         patch.object(modulo_main, "configurar_ambiente"):
+        modulo_main.main(["--grafo"])
+
+    saida = capsys.readouterr().out
+    assert 'digraph "fontes"' in saida and 'digraph "mes"' in saida
+    lote.assert_not_called()
+    unico.assert_not_called()
+
+
+def test_dicionarios_categoricos_nao_alteram_o_resultado():
+    from receitas_orc.services.dicionarios_categoricos import decodificar
+
+    # Ordem de aparição diferente da ordem alfabética dos projetos
+    fontes = _fontes_brutas(("Feira do Empreendedor", "Crie - Games", "ALI Rural"))
+    resultados = {}
+    for codificar in (False, True):
+        with patch.object(execucao_pipeline, "FECHAMENTO_EM_BLOCOS", False), \
+             patch.object(execucao_pipeline, "selecionar_consulta_por_nome", return_value=fontes), \
+             patch.object(execucao_pipeline, "exportar_resultado"), \
+             patch.object(execucao_pipeline, "CODIFICAR_DIMENSOES", codificar):
+            resultados[codificar] = execucao_pipeline.executar_lote(1, 3)
+
+    esperado, codificado = resultados[False], resultados[True]
+    assert esperado["PROJETO"].nunique() == 3
+    assert isinstance(codificado["PROJETO"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(decodificar(codificado), esperado)
+
+
+def test_lote_registra_etapas_na_instrumentacao(ambiente_lote):
+    from receitas_orc.utils.instrumentacao import obter_instrumentacao
+
+    execucao_pipeline.executar_lote(1, 2)
+
+    etapas = obter_instrumentacao().relatorio()["etapas"]
+    preparar = [e for e in etapas if e["etapa"] == "preparar_dados_base"]
+    assert [e["rotulos"]["mes"] for e in preparar] == [1, 2]
+    assert all(e["pai"] == "aplicar_estrategias_de_apropriacao" for e in preparar)
+    assert sum(e["etapa"] == "carregar_fontes" for e in etapas) == 1
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from receitas_orc.services.pipeline_service import _executar_estrategias, _get_strategy
+
+
+def _executar_por_subconjuntos(df_preparado):
+    """Abordagem anterior: um subconjunto copiado por TipoRegra e concat no final."""
+    resultados = []
+    for tipo_regra in df_preparado['TipoRegra'].unique():
+        subset = df_preparado[df_preparado['TipoRegra'] == tipo_regra].copy()
+        resultados.append(_get_strategy(tipo_regra).apropriar(subset))
+    return pd.concat(resultados, ignore_index=True)
+
+
+@pytest.fixture
+def df_preparado():
+    rng = np.random.default_rng(42)
+    tipos = ["100% CSN", "CCTF", "Outra Regra", "100% CSN Total", "CI Único", None]
+    n = 60
+    return pd.DataFrame({
+        'PROJETO': [f"Projeto {i % 7}" for i in range(n)],
+        'TipoRegra': [tipos[i % len(tipos)] for i in range(n)],
+        'TOTAL_DESPESA_EXECUTADO_MES_PROJETO': rng.random(n) * 1000,
+        'TOTAL_DESPESA_EXECUTADO_ANO_PROJETO': rng.random(n) * 10000,
+        'Coeficiente_DespesaReceita': rng.random(n),
+        'Soma_Total': rng.random(n) * 500,
+    })
+
+
+def test_despacho_vetorizado_equivale_aos_subconjuntos(df_preparado):
+    esperado = _executar_por_subconjuntos(df_preparado)
+
+    resultado = _executar_estrategias(df_preparado)
+
+    pd.testing.assert_frame_equal(resultado, esperado)
+
+
+def test_linhas_sem_tipo_regra_sao_descartadas(df_preparado):
+    resultado = _executar_estrategias(df_preparado)
+
+    assert len(resultado) == df_preparado['TipoRegra'].notna().sum()
+    assert resultado['TipoRegra'].notna().all()
+
+
+def test_estrategias_sem_colunas_de_saida_nao_criam_colunas():
+    df = pd.DataFrame({'PROJETO': ['A', 'B'], 'TipoRegra': ['CCTF', 'Outra Regra']})
+
+    resultado = _executar_estrategias(df)
+
+    assert list(resultado.columns) == ['PROJETO', 'TipoRegra']
+
+
+def test_dataframe_vazio():
+    assert _executar_estrategias(pd.DataFrame()).empty
@@ -0,0 +1,42 @@
+import pytest
+from unittest.mock import patch
+
+from receitas_orc.data_access.queries import consultas, validar_parametros
+
+
+def test_renderizacao_padrao_preserva_filtros_originais():
+    mdx = consultas["RECEITAS_ORCADAS_2025"].sql
+    assert "&[26]" in mdx
+    assert "&[202501]" in mdx and "&[202512]" in mdx
+    assert "${" not in mdx
+
+    sql = consultas["FatoFechamento"].sql
+    assert "DATA >= '20250101' AND DATA < '20260101'" in sql
+
+
+def test_renderizacao_com_parametros_restringe_periodo():
+    sql = consultas["FatoFechamento"].renderizar(ano=2024, mes_fim=3)
+    assert "DATA >= '20240101' AND DATA < '20240401'" in sql
+
+    mdx = consultas["acoes"].renderizar(ano=2024, mes_inicio=2, mes_fim=3, unidade_sebrae=12)
+    assert "&[12]" in mdx and "&[202402]" in mdx and "&[202403]" in mdx
+
+
+@pytest.mark.parametrize("parametros", [
+    {"ano": "2025; DROP TABLE x"},
+    {"mes_fim": 13},
+    {"mes_inicio": 5, "mes_fim": 4},
+    {"unidade": 26},
+    {"ano": True},
+])
+def test_validar_parametros_rejeita_valores_invalidos(parametros):
+    with pytest.raises(ValueError):
+        validar_parametros(parametros)
+
+
+def test_template_nao_e_relido_a_cada_acesso():
+    consultas["cc"].sql  # garante o template em cache
+    with patch("receitas_orc.utils.sql_utils.carregar_sql") as mock_carregar:
+        for _ in range(3):
+            consultas["cc"].sql
+        mock_carregar.assert_not_called()
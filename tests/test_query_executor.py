@@ -32,13 +32,15 @@ def test_mdx_query_retorna_dataframe():
     colunas_falsas[1].name = "col2"
 
     mock_cursor = MagicMock()
-    mock_cursor.fetchall.return_value = dados_falsos
+    mock_cursor.fetchmany.side_effect = [dados_falsos, []]
     mock_cursor.description = colunas_falsas
 
     mock_conexao = MagicMock()
     mock_conexao.__enter__.return_value.cursor.return_value.__enter__.return_value = mock_cursor
 
-    with patch("receitas_orc.data_access.query_executor.Pyadomd", return_value=mock_conexao):
+    classe_pyadomd = MagicMock(return_value=mock_conexao)
+
+    with patch("receitas_orc.data_access.query_executor.obter_pyadomd", return_value=classe_pyadomd):
         criador = CriadorDataFrame(funcao_conexao=lambda _: "string_de_conexao_fake", conexao="dummy", consulta="MDX QUERY", tipo="mdx")
         resultado = criador.executar()
 
@@ -51,3 +53,22 @@ def test_tipo_nao_suportado_gera_erro():
     criador = CriadorDataFrame(funcao_conexao=dummy_conexao, conexao="dummy", consulta="XXX", tipo="graphql")
     resultado = criador.executar()
     assert resultado.empty
+
+
+def test_sql_query_em_blocos_devolve_conexao():
+    blocos_falsos = [pd.DataFrame({"col1": [1, 2]}), pd.DataFrame({"col1": [3]})]
+    conexao = MagicMock()
+
+    with patch("pandas.read_sql_query", return_value=iter(blocos_falsos)) as mock_read:
+        criador = CriadorDataFrame(funcao_conexao=lambda _: conexao, conexao="dummy", consulta="SELECT *", tipo="sql")
+        blocos = list(criador.executar_em_blocos(tamanho_bloco=2))
+
+    assert [len(b) for b in blocos] == [2, 1]
+    assert mock_read.call_args.kwargs["chunksize"] == 2
+    conexao.close.assert_called_once()
+
+
+def test_mdx_em_blocos_nao_suportado():
+    criador = CriadorDataFrame(funcao_conexao=dummy_conexao, conexao="dummy", consulta="MDX", tipo="mdx")
+    with pytest.raises(ValueError):
+        list(criador.executar_em_blocos(tamanho_bloco=10))
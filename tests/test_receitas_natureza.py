@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from receitas_orc.benchmarks.dados_sinteticos import gerar_fontes_sinteticas
+from receitas_orc.services import execucao_pipeline
+from receitas_orc.services.receitas_natureza import detalhar_receitas, resumir_receitas, totais_por_projeto
+from tests.test_main_lote import _fontes_brutas
+
+COLUNA_NATUREZA_MDX = "[Natureza Orçamentária].[Descrição de Natureza 4 nível].[Descrição de Natureza 4 nível].[MEMBER_CAPTION]"
+
+
+def _receitas():
+    return pd.DataFrame({
+        'PROJETO': ['P1', 'P1', 'P1', 'P2', 'P2', 'P3'],
+        'DESCNVL4': ['Empresas Beneficiadas', 'Receitas de Serviços', 'Empresas Beneficiadas',
+                     'Total_Receita_Orcada', 'Receitas de Serviços', 'CSN Programas e Projetos Nacionais'],
+        'VALOR_RECEITA_AJUSTADO': [10.0, 5.0, 1.0, 100.0, 7.0, np.nan],
+    })
+
+
+def test_totais_por_projeto_equivalem_ao_pivot_denso():
+    receitas = _receitas()
+    pivot = pd.pivot_table(receitas, values='VALOR_RECEITA_AJUSTADO', index='PROJETO', columns='DESCNVL4',
+                           aggfunc='sum', fill_value=0)
+    pivot['Soma_Total'] = pivot[pivot.columns.drop('Total_Receita_Orcada')].sum(axis=1)
+
+    totais = totais_por_projeto(resumir_receitas(receitas))
+
+    # Só as naturezas materializadas presentes no mês, mais a Soma_Total
+    assert list(totais.columns) == ['PROJETO', 'CSN Programas e Projetos Nacionais', 'Empresas Beneficiadas', 'Soma_Total']
+    esperado = pivot.reset_index()[list(totais.columns)]
+    esperado.columns.name = None
+    pd.testing.assert_frame_equal(totais, esperado, check_dtype=False)
+
+
+def test_colunas_de_natureza_do_resultado_sao_str():
+    # Nas fontes reais, DESCNVL4 chega categórica e seus valores vêm como np.str_
+    fontes = gerar_fontes_sinteticas(escala=0.1, semente=3)
+
+    with patch.object(execucao_pipeline, "FECHAMENTO_EM_BLOCOS", False), \
+         patch.object(execucao_pipeline, "selecionar_consulta_por_nome", return_value=fontes), \
+         patch.object(execucao_pipeline, "exportar_resultado"):
+        resultado = execucao_pipeline.processar_mes(execucao_pipeline.carregar_fontes(6), 6)
+
+    assert 'Empresas Beneficiadas' in resultado.columns
+    assert [coluna for coluna in resultado.columns if type(coluna) is not str] == []
+
+
+def test_detalhar_receitas_acrescenta_apenas_naturezas_nao_materializadas():
+    receitas_longas = resumir_receitas(_receitas())
+    df_resultado = pd.DataFrame({'PROJETO': ['P2', 'P1', 'P9', 'P1'], 'Empresas Beneficiadas': [0.0, 11.0, 0.0, 0.0]})
+
+    detalhado = detalhar_receitas(df_resultado, receitas_longas)
+
+    assert list(detalhado.columns) == ['PROJETO', 'Empresas Beneficiadas', 'CSN Programas e Projetos Nacionais',
+                                       'Receitas de Serviços', 'Total_Receita_Orcada']
+    np.testing.assert_array_equal(detalhado['Receitas de Serviços'], [7.0, 5.0, np.nan, 5.0])
+    np.testing.assert_array_equal(detalhado['Total_Receita_Orcada'], [100.0, 0.0, np.nan, 0.0])
+    assert detalhar_receitas(df_resultado.iloc[:0], receitas_longas).empty
+
+
+def test_lote_detalhado_so_difere_pelas_colunas_de_natureza():
+    fontes = _fontes_brutas()
+    fontes["RECEITAS_ORCADAS_2025"][COLUNA_NATUREZA_MDX] = ["Empresas Beneficiadas", "Receitas de Serviços", "Empresas Beneficiadas"]
+
+    with patch.object(execucao_pipeline, "FECHAMENTO_EM_BLOCOS", False), \
+         patch.object(execucao_pipeline, "selecionar_consulta_por_nome", return_value=fontes), \
+         patch.object(execucao_pipeline, "exportar_resultado"):
+        enxuto = execucao_pipeline.executar_lote(1, 3, detalhar_receitas=False)
+        detalhado = execucao_pipeline.executar_lote(1, 3, detalhar_receitas=True)
+
+    assert "Receitas de Serviços" not in enxuto.columns
+    pd.testing.assert_frame_equal(detalhado[enxuto.columns], enxuto)
+    # Só fevereiro tem receita de serviços; os demais meses não têm a natureza
+    np.testing.assert_array_equal(detalhado["Receitas de Serviços"], [np.nan, 200.0, np.nan])
@@ -0,0 +1,76 @@
+import os
+
+import pandas as pd
+import pytest
+
+from receitas_orc.services.regras_classificacao import MotorRegras, obter_motor_regras
+
+
+def _motor(linhas):
+    return MotorRegras(pd.DataFrame(linhas, columns=["PROJETO", "TipoRegra", "Correspondencia"]))
+
+
+def test_precedencia_exato_prefixo_mais_longo_e_regex():
+    motor = _motor([
+        ["Crie - Games", "Exata", "exato"],
+        ["Crie", "Prefixo curto", "prefixo"],
+        ["Crie - ", "Prefixo longo", "prefixo"],
+        [r".*rural$", "Regex 1", "regex"],
+        [r"ali .*", "Regex 2", "regex"],
+    ])
+    projetos = pd.Series(["Crie - Games", "CRIE - Moda Autoral", "Criença", "ALI Rural", "ALI Digital", "Outro"])
+
+    resultado = motor.classificar(projetos)
+
+    assert resultado.tolist() == [
+        "Exata", "Prefixo longo", "Prefixo curto", "Regex 1", "Regex 2", "Outra Regra"
+    ]
+
+
+def test_regras_do_projeto_cobrem_prefixos():
+    motor = obter_motor_regras()
+    projetos = pd.Series([
+        "Crie - Audiovisual", "Crie - Políticas Públicas",
+        "Conexões corporativas Sebrae-SP - Serasa", "Conexões Corporativas Sebrae-SP e Grupo Soma/Hering",
+        "Feira do Empreendedor", None,
+    ])
+
+    assert motor.classificar(projetos).tolist() == [
+        "CI Único", "CI Único", "CCTF", "CCTF", "100% EB", "Outra Regra"
+    ]
+
+
+def test_motor_e_recompilado_apenas_quando_arquivo_muda(tmp_path):
+    caminho = tmp_path / "regras.csv"
+    caminho.write_text("PROJETO,TipoRegra\nProjeto X,100% CSN\n", encoding="utf-8")
+
+    motor_1 = obter_motor_regras(str(caminho))
+    assert obter_motor_regras(str(caminho)) is motor_1
+
+    caminho.write_text("PROJETO,TipoRegra\nProjeto X,100% EB\n", encoding="utf-8")
+    mtime = os.stat(caminho).st_mtime_ns + 1_000_000
+    os.utime(caminho, ns=(mtime, mtime))
+
+    motor_2 = obter_motor_regras(str(caminho))
+    assert motor_2 is not motor_1
+    assert motor_2.classificar(pd.Series(["Projeto X"])).tolist() == ["100% EB"]
+
+
+def test_correspondencia_invalida():
+    with pytest.raises(ValueError):
+        _motor([["X", "Y", "contem"]])
+
+
+def test_regex_com_referencia_numerada_vale_dentro_da_propria_regra():
+    motor = _motor([
+        [r"(\w+) sebrae", "Regex 1", "regex"],
+        [r"(\w+) - \1", "Repetido", "regex"],
+    ])
+    projetos = pd.Series(["Crie - Crie", "Crie - Games", "Conexoes Sebrae"])
+
+    assert motor.classificar(projetos).tolist() == ["Repetido", "Outra Regra", "Regex 1"]
+
+
+def test_regex_invalida():
+    with pytest.raises(ValueError):
+        _motor([["(aberto", "Y", "regex"]])
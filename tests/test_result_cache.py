@@ -0,0 +1,67 @@
+import os
+import time
+
+import pandas as pd
+from unittest.mock import MagicMock, patch
+
+from receitas_orc.data_access.result_cache import CacheResultados
+from receitas_orc.data_access.query_executor import CriadorDataFrame
+
+
+def test_cache_grava_e_le_resultado(tmp_path):
+    cache = CacheResultados(diretorio=str(tmp_path), ttl_padrao=60)
+    df = pd.DataFrame({"CC": ["A", "B"], "VALOR": [1.5, 2.5]})
+
+    cache.salvar("OLAP_SME", "SELECT 1", df)
+
+    pd.testing.assert_frame_equal(cache.obter("OLAP_SME", "SELECT 1"), df)
+    assert cache.obter("OLAP_SME", "SELECT 2") is None
+    assert cache.obter("SPSVSQL39_FINANCA", "SELECT 1") is None
+
+
+def test_cache_respeita_ttl(tmp_path):
+    cache = CacheResultados(diretorio=str(tmp_path), ttl_padrao=60)
+    cache.salvar("OLAP_SME", "SELECT 1", pd.DataFrame({"col": [1]}))
+
+    caminho = os.path.join(str(tmp_path), cache.chave("OLAP_SME", "SELECT 1") + ".parquet")
+    antigo = time.time() - 120
+    os.utime(caminho, (antigo, antigo))
+
+    assert cache.obter("OLAP_SME", "SELECT 1") is None
+    assert cache.obter("OLAP_SME", "SELECT 1", ttl=600) is not None
+
+
+def test_cache_descarta_menos_usado_ao_exceder_limite(tmp_path):
+    cache = CacheResultados(diretorio=str(tmp_path), ttl_padrao=60)
+    df = pd.DataFrame({"col": range(100)})
+
+    cache.salvar("c", "Q1", df)
+    tamanho_arquivo = os.path.getsize(os.path.join(str(tmp_path), cache.chave("c", "Q1") + ".parquet"))
+    cache.tamanho_maximo = 2 * tamanho_arquivo
+
+    cache.salvar("c", "Q2", df)
+    cache.obter("c", "Q1")  # Q1 passa a ser o mais recente
+    caminho_q2 = os.path.join(str(tmp_path), cache.chave("c", "Q2") + ".parquet")
+    os.utime(caminho_q2, (time.time() - 50, os.path.getmtime(caminho_q2)))
+    cache.salvar("c", "Q3", df)
+
+    assert cache.obter("c", "Q1") is not None
+    assert cache.obter("c", "Q2") is None
+    assert cache.obter("c", "Q3") is not None
+
+
+def test_criador_dataframe_usa_cache_e_modo_atualizar(tmp_path):
+    cache = CacheResultados(diretorio=str(tmp_path), ttl_padrao=60)
+    df_servidor = pd.DataFrame({"col1": [1, 2]})
+
+    with patch("pandas.read_sql_query", return_value=df_servidor) as mock_read:
+        conexao = MagicMock()
+        for _ in range(2):
+            CriadorDataFrame(lambda _: conexao, "dummy", "SELECT *", "sql", cache=cache).executar()
+        assert mock_read.call_count == 1
+
+        CriadorDataFrame(lambda _: conexao, "dummy", "SELECT *", "sql", cache=cache, modo_cache="atualizar").executar()
+        assert mock_read.call_count == 2
+
+        CriadorDataFrame(lambda _: conexao, "dummy", "SELECT *", "sql", cache=cache, modo_cache="ignorar").executar()
+        assert mock_read.call_count == 3
@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from receitas_orc.data_access.snapshot import (
+    ARQUIVO_MANIFESTO, SnapshotFontes, impressao_consulta, resolver_diretorio_snapshot
+)
+from receitas_orc.services import execucao_pipeline, global_services
+from tests.test_main_lote import _fontes_brutas
+
+
+def test_snapshot_grava_e_reproduz_resultado(tmp_path):
+    df = pd.DataFrame({"CC": ["A", "B"], "VALOR": [1.5, 2.5], "DATA": pd.to_datetime(["2025-01-01", "2025-02-01"])})
+    gravacao = SnapshotFontes(str(tmp_path), "gravar")
+    gravacao.gravar("cc", "abc", df, {"ano": 2025})
+
+    with open(os.path.join(str(tmp_path), ARQUIVO_MANIFESTO), encoding="utf-8") as f:
+        manifesto = json.load(f)
+    assert manifesto["versao_formato"] == 1
+    assert manifesto["consultas"]["cc"]["impressao"] == "abc"
+    assert manifesto["consultas"]["cc"]["linhas"] == 2
+    assert manifesto["consultas"]["cc"]["parametros"] == {"ano": 2025}
+
+    reproducao = SnapshotFontes(str(tmp_path), "reproduzir")
+    assert reproducao.consultas() == ["cc"]
+    pd.testing.assert_frame_equal(reproducao.ler("cc", "abc"), df)
+
+
+def test_snapshot_recusa_consulta_que_mudou_salvo_se_aceita(tmp_path, caplog):
+    df = pd.DataFrame({"col": [1]})
+    SnapshotFontes(str(tmp_path), "gravar").gravar("cc", "abc", df)
+
+    with pytest.raises(ValueError, match="mudou desde a gravação"):
+        SnapshotFontes(str(tmp_path), "reproduzir").ler("cc", "outra")
+    with pytest.raises(ValueError, match="mudou desde a gravação"):
+        list(SnapshotFontes(str(tmp_path), "reproduzir").ler_blocos("cc", 10, "outra"))
+
+    with caplog.at_level(logging.WARNING):
+        congelado = SnapshotFontes(str(tmp_path), "reproduzir", aceitar_divergente=True).ler("cc", "outra")
+    assert "mudou desde a gravação" in caplog.text
+    pd.testing.assert_frame_equal(congelado, df)
+
+
+def test_gravar_blocos_abandona_a_gravacao_quando_o_schema_muda(tmp_path, caplog):
+    blocos = [
+        pd.DataFrame({"A": [1, 2], "T": [None, None]}),
+        pd.DataFrame({"A": [3.0, float("nan")], "T": ["x", "y"]}),
+    ]
+    gravacao = SnapshotFontes(str(tmp_path), "gravar")
+
+    with caplog.at_level(logging.ERROR):
+        repassados = list(gravacao.gravar_blocos("fechamento", "abc", iter(blocos)))
+
+    assert len(repassados) == 2
+    pd.testing.assert_frame_equal(repassados[1], blocos[1])
+    assert "Não foi possível gravar a consulta 'fechamento'" in caplog.text
+    assert "fechamento" not in gravacao.consultas()
+    assert not [arquivo for arquivo in os.listdir(str(tmp_path)) if arquivo.endswith(".tmp")]
+
+
+def test_snapshot_consulta_ausente_e_formato_invalido(tmp_path):
+    SnapshotFontes(str(tmp_path), "gravar").gravar("cc", "abc", pd.DataFrame({"col": [1]}))
+    with pytest.raises(KeyError):
+        SnapshotFontes(str(tmp_path), "reproduzir").ler("acoes")
+
+    with pytest.raises(ValueError):
+        SnapshotFontes(str(tmp_path), "copiar")
+
+    caminho = os.path.join(str(tmp_path), ARQUIVO_MANIFESTO)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump({"versao_formato": 99, "consultas": {}}, f)
+    with pytest.raises(ValueError):
+        SnapshotFontes(str(tmp_path), "reproduzir")
+
+
+def test_resolver_diretorio_usa_versao_mais_recente(tmp_path):
+    for versao in ("20250101_080000", "20250301_080000", "20250201_080000"):
+        SnapshotFontes(str(tmp_path / versao), "gravar").gravar("cc", "abc", pd.DataFrame({"col": [1]}))
+
+    assert resolver_diretorio_snapshot(str(tmp_path)) == str(tmp_path / "20250301_080000")
+    with pytest.raises(FileNotFoundError):
+        resolver_diretorio_snapshot(str(tmp_path / "inexistente"))
+
+
+@patch("receitas_orc.services.global_services.CriadorDataFrame")
+def test_selecionar_consulta_grava_e_reproduz_sem_executar(mock_criador_df, tmp_path):
+    df = pd.DataFrame({"CC": ["A"], "VALOR": [1.0]})
+    mock_criador_df.return_value.executar.return_value = df
+
+    global_services.selecionar_consulta_por_nome(
+        "cc, acoes", paralelo=True, snapshot=SnapshotFontes(str(tmp_path), "gravar")
+    )
+    assert mock_criador_df.call_count == 2
+
+    mock_criador_df.reset_mock()
+    resultado = global_services.selecionar_consulta_por_nome(
+        "cc, acoes", paralelo=True, snapshot=SnapshotFontes(str(tmp_path), "reproduzir")
+    )
+
+    mock_criador_df.assert_not_called()
+    pd.testing.assert_frame_equal(resultado["cc"], df)
+    pd.testing.assert_frame_equal(resultado["acoes"], df)
+
+
+@patch("receitas_orc.services.global_services.CriadorDataFrame")
+def test_fechamento_em_blocos_grava_e_reproduz(mock_criador_df, tmp_path):
+    blocos = [
+        pd.DataFrame({"DATA": pd.to_datetime(["2025-01-10", "2025-02-10"]), "CC": ["A", "B"], "VALOR": [1.0, 2.0]}),
+        pd.DataFrame({"DATA": pd.to_datetime(["2025-02-15"]), "CC": ["A"], "VALOR": [4.0]}),
+    ]
+    mock_criador_df.return_value.executar_em_blocos.return_value = iter(blocos)
+
+    gravado = global_services.carregar_fechamento_agregado(
+        tamanho_bloco=2, parametros={"mes_fim": 2}, snapshot=SnapshotFontes(str(tmp_path), "gravar")
+    )
+
+    mock_criador_df.reset_mock()
+    reproduzido = global_services.carregar_fechamento_agregado(
+        tamanho_bloco=1, parametros={"mes_fim": 2}, snapshot=SnapshotFontes(str(tmp_path), "reproduzir")
+    )
+
+    mock_criador_df.assert_not_called()
+    assert reproduzido.linhas_lidas == gravado.linhas_lidas == 3
+    pd.testing.assert_frame_equal(reproduzido.acumulado(2), gravado.acumulado(2))
+
+
+def test_lote_reproduzido_de_snapshot_igual_ao_original(tmp_path):
+    # Grava as fontes brutas como se tivessem sido consultadas nos servidores
+    gravacao = SnapshotFontes(str(tmp_path), "gravar")
+    for nome, df in _fontes_brutas().items():
+        consulta = global_services._resolver_consulta(nome)
+        texto = consulta.renderizar(ano=execucao_pipeline.ANO_REFERENCIA, **({"mes_fim": 3} if nome == "FatoFechamento" else {}))
+        gravacao.gravar(nome, impressao_consulta(consulta.conexao, consulta.tipo, texto), df)
+
+    with patch.object(execucao_pipeline, "FECHAMENTO_EM_BLOCOS", False), \
+         patch.object(execucao_pipeline, "exportar_resultado"):
+        with patch.object(execucao_pipeline, "selecionar_consulta_por_nome", return_value=_fontes_brutas()):
+            esperado = execucao_pipeline.executar_lote(1, 3)
+        with patch.object(global_services, "CriadorDataFrame", side_effect=AssertionError("acesso ao servidor")):
+            reproduzido = execucao_pipeline.executar_lote(1, 3, snapshot=SnapshotFontes(str(tmp_path), "reproduzir"))
+
+    assert not reproduzido.empty
+    pd.testing.assert_frame_equal(reproduzido, esperado)
+
+
+def test_abrir_snapshot_cria_versao_nova_ao_gravar(tmp_path):
+    assert execucao_pipeline.abrir_snapshot("") is None
+
+    snapshot = execucao_pipeline.abrir_snapshot("gravar", str(tmp_path))
+    assert os.path.dirname(snapshot.diretorio) == str(tmp_path)
+    assert not snapshot.reproduzindo
@@ -24,3 +24,28 @@ def test_startup_falha_carregamento():
 
         assert startup_mod.AdomdConnection is None
         assert startup_mod.Pyadomd is None
+
+
+def test_obter_pyadomd_inicializa_uma_unica_vez():
+    import receitas_orc.config.startup as startup_mod
+
+    mock_pyadomd = MagicMock(name="Pyadomd")
+    with patch.object(startup_mod, "_tentativa_feita", False), \
+         patch.object(startup_mod, "setup_mdx_environment", return_value=(MagicMock(), mock_pyadomd)) as mock_setup:
+        assert startup_mod.obter_pyadomd() is mock_pyadomd
+        assert startup_mod.obter_pyadomd() is mock_pyadomd
+
+    mock_setup.assert_called_once()
+
+
+def test_obter_pyadomd_falha_sem_repetir_a_inicializacao():
+    import pytest
+    import receitas_orc.config.startup as startup_mod
+
+    with patch.object(startup_mod, "_tentativa_feita", False), \
+         patch.object(startup_mod, "setup_mdx_environment", side_effect=FileNotFoundError("DLL")) as mock_setup:
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                startup_mod.obter_pyadomd()
+
+    mock_setup.assert_called_once()
@@ -0,0 +1,20 @@
+import pytest
+
+from receitas_orc.benchmarks.tempo_inicializacao import CENARIOS, main, medir_cenario
+
+
+@pytest.mark.parametrize("cenario", sorted(CENARIOS))
+def test_inicializacao_nao_carrega_modulos_pesados(cenario):
+    resultado = medir_cenario(CENARIOS[cenario], repeticoes=1)
+
+    assert resultado["modulos_pesados"] == []
+    assert resultado["mediana_s"] > 0
+
+
+def test_relatorio_json(tmp_path):
+    saida = tmp_path / "inicializacao.json"
+
+    relatorio = main(["--repeticoes", "1", "--saida", str(saida)])
+
+    assert saida.exists()
+    assert set(relatorio["cenarios"]) == {"interpretador", *CENARIOS}